@@ -80,15 +80,21 @@ else:
     zmq_client = EvrmoreZMQClient()
 
 
-# 🧪 Test connection to Evrmore node
-try:
-    rpc_client.getblockchaininfo()
-except Exception as e:
-    print("❌ Failed to connect to evrmore_rpc. Is your node running locally?\n", e)
-    exit(1)
-else:
-    pass
-    #print("✅ evrmore_rpc client initialized successfully.")
+# 🧪 Test connection to Evrmore node, unless EVRMAIL_OFFLINE is set or an
+#    offline dev command (traffic generation, benchmarks) is being run
+OFFLINE_COMMANDS = ("generate-traffic", "bench-daemon", "bench-micro")
+OFFLINE = bool(os.environ.get("EVRMAIL_OFFLINE")) or (
+    sys.argv[1:2] == ["dev"] and sys.argv[2:3] and sys.argv[2] in OFFLINE_COMMANDS
+)
+if not OFFLINE:
+    try:
+        rpc_client.getblockchaininfo()
+    except Exception as e:
+        print("❌ Failed to connect to evrmore_rpc. Is your node running locally?\n", e)
+        exit(1)
+    else:
+        pass
+        #print("✅ evrmore_rpc client initialized successfully.")
 
 # ─── 📤 EXPORTS ────────────────────────────────────────────────────────────────
 
@@ -96,6 +102,7 @@ __all__ = [
     "evrmail_config", 
     "rpc_client", 
     "zmq_client", 
+    "OFFLINE",
     "main",
     "__version__", 
     "__author__", 
@@ -0,0 +1,38 @@
+# ─── 🏁 EvrMail Benchmarks ────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Offline, reproducible performance measurements of the daemon. Results
+#   are stored as JSON so runs from different commits can be compared.
+#     - replay    : feeds a recorded rawtx/rawblock stream through the live
+#                   notification path (`evrmail dev bench-daemon`)
+#     - synthetic : generates recordings of a made-up chain and mailbox
+#                   traffic (`evrmail dev generate-traffic`)
+#     - micro     : per-call timings of the codec and crypto hot paths
+#                   against a stored baseline (`evrmail dev bench-micro`)
+# ─────────────────────────────────────────────────────────────────────────────
+
+from evrmail.bench.replay import (
+    Recording,
+    load_recording,
+    record_stream,
+    run_replay,
+    run_isolated,
+    compare_results,
+    BENCH_DIR,
+)
+from evrmail.bench.synthetic import SyntheticChain, generate_recording
+from evrmail.bench.micro import run_suite, compare_suite
+
+__all__ = [
+    "Recording",
+    "load_recording",
+    "record_stream",
+    "run_replay",
+    "run_isolated",
+    "compare_results",
+    "BENCH_DIR",
+    "SyntheticChain",
+    "generate_recording",
+    "run_suite",
+    "compare_suite",
+]
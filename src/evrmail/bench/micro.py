@@ -0,0 +1,232 @@
+# ─── ⏱ EvrMail Micro-benchmarks ───────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Per-call timings of the codec and crypto hot paths, so a change to one
+#   of them can be judged on its own:
+#     - codecs : base58, pubkey hash → address, script and asset decoding,
+#                transaction and block decoding
+#     - crypto : payload encryption/decryption, message signing and
+#                verification, signing an asset transfer
+#   Inputs come from a seeded synthetic chain, so every run times the same
+#   bytes. Results are compared against a stored baseline, flagging
+#   anything slower than the threshold. The default baseline is
+#   micro-baseline.json next to this file, committed with the code; its
+#   "machine" entry says where it was recorded, and timings only compare
+#   meaningfully on similar hardware.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import contextlib
+import json
+import os
+import platform
+import statistics
+import time
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from evrmail.bench.replay import DEFAULT_THRESHOLD, git_commit
+
+BASELINE_FILE = Path(__file__).with_name("micro-baseline.json")
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.2      # seconds per repeat
+RESULT_VERSION = 1
+BLOCK_TXS = 200
+
+# ─── 🧩 Fixtures ──────────────────────────────────────────────────────────────
+
+class Fixtures:
+    """Deterministic inputs for every benchmark, built once."""
+
+    def __init__(self, seed: int = 1234):
+        from evrmail.bench.synthetic import SyntheticChain, MESSAGE_ASSET, COIN
+        from evrmail.crypto import sign_message
+        from evrmail.wallet.script.create import create_p2pkh_script, create_transfer_asset_script
+
+        chain = SyntheticChain(wallets=1, addresses_per_wallet=4, strangers=20, seed=seed)
+        self.key = chain.ours[0]
+        self.recipient = chain.strangers[0]
+        height = chain.start_height + 1
+
+        # One batch whose messages are all ours
+        chain.owned_fraction = 1.0
+        self.cid, batch = chain.batch_payload(chain.strangers[1], height)
+        self.payload_message = batch["messages"][0]
+        self.plaintext = json.dumps({"to": self.key.address, "from": self.recipient.address,
+                                     "subject": "Benchmark", "content": "x" * 512}).encode()
+
+        self.p2pkh_script = create_p2pkh_script(self.key.hash160.hex())
+        self.asset_script = create_transfer_asset_script(self.key.hash160, MESSAGE_ASSET, COIN, self.cid)
+        self.asset_part = bytes.fromhex(self.asset_script)[25:]
+
+        # A message-carrying tx and a block of mixed traffic
+        chain.owned_fraction, chain.message_fraction = 0.05, 1.0
+        self.tx_hex = chain.transaction({}, height).hex()
+        chain.message_fraction = 0.05
+        txs = [chain.coinbase(height)] + [chain.transaction({}, height) for _ in range(BLOCK_TXS)]
+        self.block_hex = chain.block(chain.start_hash, height, txs).hex()
+
+        self.signed_text = json.dumps({"to": self.recipient.address, "subject": "Benchmark", "content": "x" * 256})
+        self.signature = sign_message(self.signed_text, self.key.wif)
+
+        # Spendable outputs for an asset transfer
+        self.asset_name = MESSAGE_ASSET
+        self.asset_amount = COIN
+        self.evr_utxos = [
+            {"txid": f"{n:064x}", "vout": 0, "amount": 10 * COIN, "asset": None,
+             "address": self.key.address, "script": self.p2pkh_script}
+            for n in range(1, 3)
+        ]
+        self.asset_utxos = [
+            {"txid": f"{0xa55e7:064x}", "vout": 1, "amount": COIN, "asset": MESSAGE_ASSET,
+             "address": self.key.address, "script": self.asset_script}
+        ]
+        self.wif_privkeys = {self.key.address: self.key.wif}
+
+# ─── 📋 Benchmarks ────────────────────────────────────────────────────────────
+
+def benchmarks(fx: Fixtures) -> Dict[str, Callable[[], object]]:
+    """Name → zero-argument callable. Names are the keys baselines are compared on."""
+    from evrmail.crypto import decode_base58, sign_message, verify_message
+    from evrmail.utils.decrypt_message import decrypt_message
+    from evrmail.utils.encrypt_message import encrypt_to_pubkey
+    from evrmail.wallet.block.decode import decode as decode_block
+    from evrmail.wallet.pubkeyhash import to_address
+    from evrmail.wallet.script.decode import decode as decode_script, parse_op_evr_asset
+    from evrmail.wallet.tx.create.send_asset import create_send_asset
+    from evrmail.wallet.tx.decode import decode_transaction
+
+    hash_hex = fx.key.hash160.hex()
+    recipient_pubkey = fx.key.pubkey.hex()
+    return {
+        "crypto.decode_base58": lambda: decode_base58(fx.key.address),
+        "pubkeyhash.to_address": lambda: to_address(hash_hex),
+        "script.decode[p2pkh]": lambda: decode_script(fx.p2pkh_script),
+        "script.decode[asset]": lambda: decode_script(fx.asset_script),
+        "script.parse_op_evr_asset": lambda: parse_op_evr_asset(fx.asset_part),
+        "tx.decode_transaction": lambda: decode_transaction(fx.tx_hex),
+        "tx.decode_transaction[raw scripts]": lambda: decode_transaction(fx.tx_hex, decode_scripts=False),
+        f"block.decode[{BLOCK_TXS + 1} txs]": lambda: decode_block(fx.block_hex),
+        "encrypt_message": lambda: encrypt_to_pubkey(fx.plaintext, recipient_pubkey),
+        "decrypt_message": lambda: decrypt_message(fx.payload_message, fx.key.privkey),
+        "crypto.sign_message": lambda: sign_message(fx.signed_text, fx.key.wif),
+        "crypto.verify_message": lambda: verify_message(fx.key.address, fx.signature, fx.signed_text),
+        "create_send_asset": lambda: create_send_asset(
+            fx.evr_utxos, fx.asset_utxos, fx.wif_privkeys, fx.recipient.address,
+            fx.asset_name, fx.asset_amount, ipfs_cidv0=fx.cid
+        ),
+    }
+
+# ─── ⏱ Timing ─────────────────────────────────────────────────────────────────
+
+def measure(fn: Callable[[], object], repeat: int = DEFAULT_REPEAT, min_time: float = DEFAULT_MIN_TIME) -> dict:
+    """Time `fn` in loops of at least `min_time` seconds, `repeat` times. Per-call figures in µs."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1 << 24:
+            break
+        # Jump close to the target instead of doubling from 1
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    per_call = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    best = min(per_call)
+    return {
+        "best_us": round(best, 3),
+        "median_us": round(statistics.median(per_call), 3),
+        "ops_per_second": round(1e6 / best, 1) if best else None,
+        "number": number,
+        "repeat": repeat,
+    }
+
+def machine() -> dict:
+    """What the timings were taken on, stored with every result document."""
+    cpu = platform.processor() or None
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {"cpu": cpu, "cores": os.cpu_count(), "arch": platform.machine()}
+
+def run_suite(only: Optional[str] = None, repeat: int = DEFAULT_REPEAT, min_time: float = DEFAULT_MIN_TIME,
+              on_result: Callable[[str, dict], None] = None) -> dict:
+    """
+    Run every benchmark whose name contains `only` (all when None) and
+    return the result document. `on_result(name, timing)` is called as
+    each one finishes.
+    """
+    results = {}
+    # Some script helpers print as they go; keep that off the terminal but inside the timing
+    with open(os.devnull, "w") as sink:
+        with contextlib.redirect_stdout(sink):
+            fx = Fixtures()
+        for name, fn in benchmarks(fx).items():
+            if only and only not in name:
+                continue
+            with contextlib.redirect_stdout(sink):
+                fn()    # warm up caches and lazy imports
+                timing = measure(fn, repeat, min_time)
+            results[name] = timing
+            if on_result is not None:
+                on_result(name, timing)
+    return {
+        "benchmark": "micro",
+        "version": RESULT_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": machine(),
+        "results": results,
+    }
+
+# ─── 💾 Baselines ─────────────────────────────────────────────────────────────
+
+def save_results(document: dict, path) -> Path:
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2))
+    return path
+
+def load_results(path) -> Optional[dict]:
+    path = Path(path).expanduser()
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+def compare_suite(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Best-of-N time per benchmark against `baseline`. A benchmark regresses
+    when it got slower by more than `threshold` percent and improves when
+    it got faster by as much. Benchmarks missing from either side are skipped.
+    """
+    rows = []
+    old_results = baseline.get("results", {})
+    for name, timing in current.get("results", {}).items():
+        old = old_results.get(name, {}).get("best_us")
+        new = timing.get("best_us")
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        rows.append({
+            "name": name,
+            "baseline_us": old,
+            "current_us": new,
+            "change_pct": round(change, 2),
+            "regression": change > threshold,
+            "improvement": change < -threshold,
+        })
+    return rows
+
+__all__ = [
+    "Fixtures",
+    "benchmarks",
+    "measure",
+    "run_suite",
+    "machine",
+    "save_results",
+    "load_results",
+    "compare_suite",
+    "BASELINE_FILE",
+]
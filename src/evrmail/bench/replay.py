@@ -0,0 +1,531 @@
+# ─── 🏁 EvrMail Daemon Replay Benchmark ───────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Replays a recorded rawtx/rawblock stream through the same path the live
+#   ZMQ handlers take (decode, sequence check, `apply_mempool_tx` /
+#   `apply_block`), with no node, no ZMQ socket and no IPFS daemon:
+#     - ReplaySource : fake ZMQ source, dispatches recorded notifications
+#     - StubRPC      : answers the daemon's RPC calls from the recording
+#     - MemoryIPFS   : in-memory payload store behind `scan_payload`
+#   Measures ingestion throughput, per-tx and per-block latency, and memory
+#   growth. The replay runs in a child process whose HOME is a scratch
+#   directory, so the daemon's stores, journal and inbox never touch the
+#   real ~/.evrmail.
+#
+#   Recording format (JSON Lines, one object per line, in arrival order):
+#     {"type": "meta", "start_height": N, "start_hash": "...",
+#      "addresses": [...], "keys": {address: privkey hex}} ← first line
+#     {"type": "rawtx", "hex": "..."}
+#     {"type": "rawblock", "hex": "..."}
+#     {"type": "payload", "cid": "...", "data": {...}}    ← IPFS contents
+# ─────────────────────────────────────────────────────────────────────────────
+
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = Path.home() / ".evrmail" / "bench"
+RESULT_VERSION = 1
+DEFAULT_THRESHOLD = 10.0    # percent
+
+# (result path, True if higher is better)
+COMPARED_METRICS = [
+    ("elapsed_seconds", False),
+    ("transactions.per_second", True),
+    ("transactions.latency_ms.p50", False),
+    ("transactions.latency_ms.p95", False),
+    ("blocks.tx_per_second", True),
+    ("blocks.latency_ms.p50", False),
+    ("blocks.latency_ms.p95", False),
+    ("memory.rss_growth_kb", False),
+]
+
+# ─── 📼 Recording ─────────────────────────────────────────────────────────────
+
+class Recording:
+    """A recorded notification stream plus what the replay needs to answer RPC and IPFS calls."""
+
+    def __init__(self, meta: dict, events: List[tuple], payloads: Dict[str, dict], sha256: str = None,
+                 path: str = None):
+        self.meta = meta
+        self.events = events            # (topic, raw bytes)
+        self.payloads = payloads
+        self.sha256 = sha256
+        self.path = path
+
+    @property
+    def start_height(self) -> int:
+        return int(self.meta.get("start_height", 0))
+
+    @property
+    def start_hash(self) -> str:
+        return self.meta.get("start_hash", "00" * 32)
+
+    def count(self, topic: str) -> int:
+        return sum(1 for t, _ in self.events if t == topic)
+
+def load_recording(path) -> Recording:
+    path = Path(path).expanduser()
+    data = path.read_bytes()
+    meta, events, payloads = {}, [], {}
+    for number, line in enumerate(data.decode("utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        kind = entry.get("type")
+        if kind == "meta":
+            meta = entry
+        elif kind in ("rawtx", "rawblock"):
+            events.append((kind, bytes.fromhex(entry["hex"])))
+        elif kind == "payload":
+            payloads[entry["cid"]] = entry["data"]
+        else:
+            raise ValueError(f"{path}:{number}: unknown entry type {kind!r}")
+    return Recording(meta, events, payloads, hashlib.sha256(data).hexdigest(), str(path))
+
+def record_stream(output, seconds: float, log: Callable[[str], None] = print) -> int:
+    """Record live rawtx/rawblock notifications from the node for `seconds`. Returns the event count."""
+    import threading
+    from evrmore_rpc.zmq import ZMQTopic, EvrmoreZMQClient
+    from evrmail.config import load_config
+    from evrmail.utils.rpc import rpc_from_config
+    from evrmail.wallet import list_wallets, load_wallet
+    from evrmail.wallet.store import watched_addresses
+
+    config = load_config()
+    rpc = rpc_from_config(config)
+    addresses = []
+    for name in list_wallets():
+        wallet = load_wallet(name)
+        if wallet:
+            addresses.extend(watched_addresses(wallet))
+    tip = rpc.getblockcount()
+    meta = {"type": "meta", "start_height": tip, "start_hash": rpc.getblockhash(tip), "addresses": addresses}
+
+    lock = threading.Lock()
+    count = 0
+    output = Path(output).expanduser()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(json.dumps(meta) + "\n")
+
+        def writer(kind):
+            def handle(notification):
+                nonlocal count
+                with lock:
+                    f.write(json.dumps({"type": kind, "hex": notification.body.hex()}) + "\n")
+                    count += 1
+            return handle
+
+        client = EvrmoreZMQClient(
+            topics=[ZMQTopic.RAW_TX, ZMQTopic.RAW_BLOCK],
+            zmq_host=config["rpc_host"].split('tcp://')[1]
+        )
+        client.on(ZMQTopic.RAW_TX)(writer("rawtx"))
+        client.on(ZMQTopic.RAW_BLOCK)(writer("rawblock"))
+        client.start()
+        log(f"⏺ Recording from block {tip} for {seconds:g}s...")
+        try:
+            time.sleep(seconds)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            client.stop_sync()
+    return count
+
+# ─── 🎭 Stand-ins ─────────────────────────────────────────────────────────────
+
+class ReplayNotification:
+    __slots__ = ("topic", "body", "sequence")
+
+    def __init__(self, topic: str, body: bytes, sequence: int):
+        self.topic = topic
+        self.body = body
+        self.sequence = sequence
+
+class ReplaySource:
+    """Fake ZMQ source: hands recorded notifications to handlers in arrival order."""
+
+    def __init__(self, events: List[tuple]):
+        self.events = events
+        self.handlers: Dict[str, Callable] = {}
+
+    def on(self, topic: str):
+        def register(handler):
+            self.handlers[topic] = handler
+            return handler
+        return register
+
+    def replay(self, between: Callable[[], None] = None):
+        sequences = {}
+        for topic, body in self.events:
+            sequence = sequences.get(topic, 0)
+            sequences[topic] = sequence + 1
+            handler = self.handlers.get(topic)
+            if handler is not None:
+                handler(ReplayNotification(topic, body, sequence))
+            if between is not None:
+                between()
+
+class StubRPC:
+    """Answers the daemon's hot-path RPC calls from the recording instead of a node."""
+
+    def __init__(self, recording: Recording, mempool: Callable[[], List[str]] = None):
+        from evrmail.wallet.block.stream import BlockView, TxView
+        self.blocks: Dict[str, bytes] = {}
+        self.hashes: Dict[int, str] = {recording.start_height: recording.start_hash}
+        self.heights: Dict[str, int] = {}
+        self.txs: Dict[str, bytes] = {}
+        height = recording.start_height
+        for topic, raw in recording.events:
+            if topic == "rawblock":
+                block = BlockView(raw)
+                height += 1
+                self.blocks[block.hash] = raw
+                self.hashes[height] = block.hash
+                self.heights[block.hash] = height
+            else:
+                self.txs[TxView.from_bytes(raw)["txid"]] = raw
+        self.tip = recording.start_height
+        self.mempool = mempool or (lambda: [])
+        self.calls = 0
+        self.batches = 0
+
+    def announce(self, block_hash: str):
+        """A block notification means the node's tip is that block."""
+        self.tip = self.heights.get(block_hash, self.tip)
+
+    def getblockcount(self) -> int:
+        self.calls += 1
+        return self.tip
+
+    def getblockhash(self, height: int) -> str:
+        self.calls += 1
+        if height > self.tip or height not in self.hashes:
+            raise ValueError(f"Block height out of range: {height}")
+        return self.hashes[height]
+
+    def getblock(self, block_hash: str, verbosity: int = 0) -> str:
+        self.calls += 1
+        return self.blocks[block_hash].hex()
+
+    def getrawtransaction(self, txid: str) -> str:
+        self.calls += 1
+        return self.txs[txid].hex()
+
+    def getrawmempool(self) -> List[str]:
+        self.calls += 1
+        return list(self.mempool())
+
+    def batch(self, calls, raise_errors: bool = True) -> list:
+        self.batches += 1
+        results = []
+        for method, params in calls:
+            try:
+                results.append(getattr(self, method)(*params))
+            except Exception as e:
+                if raise_errors:
+                    raise
+                results.append(e)
+        return results
+
+class MemoryIPFS:
+    """In-memory stand-in for `fetch_ipfs_json`."""
+
+    def __init__(self, payloads: Dict[str, dict]):
+        self.payloads = payloads
+        self.stats = {"hits": 0, "misses": 0}
+
+    def fetch(self, cid: str, port: int = 5101) -> Optional[dict]:
+        data = self.payloads.get(cid)
+        self.stats["hits" if data is not None else "misses"] += 1
+        return data
+
+# ─── ⏱ Replay ─────────────────────────────────────────────────────────────────
+
+def _rss_kb() -> Optional[int]:
+    """Current resident set size, or None where it can't be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current, but still shows growth
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return None
+
+def _latency(samples: List[float]) -> dict:
+    """Percentiles (nearest rank) of `samples` in milliseconds."""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return round(ordered[min(len(ordered) - 1, max(0, int(p / 100 * len(ordered) + 0.5) - 1))] * 1000, 4)
+
+    return {
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": round(ordered[-1] * 1000, 4),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 4),
+    }
+
+def run_replay(recording: Recording, debug_mode: bool = False, trace_memory: bool = False) -> dict:
+    """
+    Replay `recording` through the daemon's notification path in this process.
+    Uses (and writes to) the daemon's stores under the current HOME; call it
+    through `run_isolated` unless HOME is already a scratch directory.
+    """
+    import logging
+    import tracemalloc
+    import evrmail.daemon.__main__ as daemon
+    import evrmail.utils.scan_payload as scan_payload_module
+    from evrmail.daemon import load_processed_txids
+    from evrmail.daemon.checkpoint import Checkpoint, addresses_digest
+    from evrmail.daemon.journal import journal_from_config
+    from evrmail.daemon.mempool import tracker_from_config
+    from evrmail.daemon.sequence import SequenceTracker
+    from evrmail.daemon.utxo_set import UTXOSet, CONFIRMED, MEMPOOL
+    from evrmail.daemon.utxo_store import get_utxo_store
+    from evrmail.daemon.watchlist import Watchlist
+    from evrmail.utils import configure_logging
+    from evrmail.wallet.block.stream import BlockView, TxView
+
+    configure_logging(level=logging.DEBUG if debug_mode else logging.INFO)
+
+    # Wire the stand-ins in where the daemon would talk to the outside world
+    ipfs = MemoryIPFS(recording.payloads)
+    keys = dict(recording.meta.get("keys", {}))
+    scan_payload_module.fetch_ipfs_json = ipfs.fetch
+    scan_payload_module.get_wallet_decryption_keys = lambda: keys
+    daemon.known_addresses = {address: "bench" for address in recording.meta.get("addresses", [])}
+    daemon.address_indexes = {}
+    daemon.high_water = {}
+    daemon.watchlist = Watchlist(daemon.known_addresses)
+    daemon.ipfs_workers = None
+    daemon.shard_pool = None
+    daemon.mempool_tracker = tracker_from_config(daemon.config)
+    rpc = daemon.rpc = StubRPC(recording, mempool=lambda: list(daemon.mempool_tracker.txs))
+
+    utxo_cache = UTXOSet()
+    processed_txids = load_processed_txids()
+    journal = journal_from_config(daemon.config, get_utxo_store(), processed_txids)
+    journal.start(thread=False)
+    window = int(daemon.config.get("sync_checkpoint_window", 100))
+    checkpoint = Checkpoint(recording.start_height, recording.start_hash, window=window,
+                            addresses=addresses_digest(daemon.known_addresses))
+    sequences = SequenceTracker()
+
+    tx_seconds: List[float] = []
+    block_seconds: List[float] = []
+    counts = {"applied_txs": 0, "block_txs": 0, "new_block_txs": 0}
+
+    # Mirrors on_raw_tx / on_raw_block in daemon.__main__.main
+    def on_raw_tx(notification):
+        started = time.perf_counter()
+        sequences.observe(notification.topic, notification.sequence)
+        tx = TxView.from_bytes(notification.body)
+        counts["applied_txs"] += daemon.apply_mempool_tx(tx, utxo_cache, processed_txids, journal, debug_mode)
+        tx_seconds.append(time.perf_counter() - started)
+
+    def on_raw_block(notification):
+        nonlocal checkpoint
+        started = time.perf_counter()
+        sequences.observe(notification.topic, notification.sequence)
+        block = BlockView(notification.body)
+        rpc.announce(block.hash)
+        processed, checkpoint = daemon.apply_block(block, checkpoint, utxo_cache, processed_txids,
+                                                   journal, None, debug_mode)
+        block_seconds.append(time.perf_counter() - started)
+        counts["block_txs"] += block.tx_count
+        counts["new_block_txs"] += processed
+
+    # The runtime's persistence task, on the same schedule
+    last_tick = time.monotonic()
+
+    def between():
+        nonlocal last_tick
+        if time.monotonic() - last_tick >= journal.flush_interval:
+            journal.tick()
+            last_tick = time.monotonic()
+
+    source = ReplaySource(recording.events)
+    source.on("rawtx")(on_raw_tx)
+    source.on("rawblock")(on_raw_block)
+
+    # Memory is measured over the replay only, not imports and setup
+    rss_start = _rss_kb()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    source.replay(between)
+    journal.commit()
+    elapsed = time.perf_counter() - started
+
+    rss_end = _rss_kb()
+    memory = {
+        "rss_start_kb": rss_start,
+        "rss_end_kb": rss_end,
+        "rss_growth_kb": rss_end - rss_start if rss_start is not None and rss_end is not None else None,
+    }
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory.update({"traced_current_kb": current // 1024, "traced_peak_kb": peak // 1024})
+    journal.stop()
+
+    events = len(recording.events)
+    return {
+        "elapsed_seconds": round(elapsed, 4),
+        "events": events,
+        "events_per_second": round(events / elapsed, 2) if elapsed else 0.0,
+        "transactions": {
+            "count": len(tx_seconds),
+            "applied": counts["applied_txs"],
+            "per_second": round(len(tx_seconds) / sum(tx_seconds), 2) if tx_seconds else 0.0,
+            "latency_ms": _latency(tx_seconds),
+        },
+        "blocks": {
+            "count": len(block_seconds),
+            "transactions": counts["block_txs"],
+            "new_transactions": counts["new_block_txs"],
+            "tx_per_second": round(counts["block_txs"] / sum(block_seconds), 2) if block_seconds else 0.0,
+            "latency_ms": _latency(block_seconds),
+        },
+        "memory": memory,
+        "utxos": {"confirmed": utxo_cache.count(CONFIRMED), "mempool": utxo_cache.count(MEMPOOL)},
+        "ipfs": dict(ipfs.stats),
+        "rpc": {"calls": rpc.calls, "batches": rpc.batches},
+        "zmq_sequence": sequences.stats,
+        "journal": dict(journal.stats),
+    }
+
+# ─── 🧪 Isolated Runs ─────────────────────────────────────────────────────────
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checkout this code runs from, if it is one."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def run_isolated(recording_path, output=None, debug_mode: bool = False, trace_memory: bool = False,
+                 keep_home: bool = False) -> dict:
+    """
+    Replay in a fresh interpreter with HOME pointed at a scratch directory.
+    Writes the result document to `output` (default: BENCH_DIR) and returns it.
+    """
+    recording = load_recording(recording_path)
+    scratch = tempfile.mkdtemp(prefix="evrmail-bench-")
+    raw_result = Path(scratch) / "result.json"
+    # The replay never talks to a node: skip evrmail's import-time RPC check
+    env = dict(os.environ, HOME=scratch, USERPROFILE=scratch, EVRMAIL_OFFLINE="1")
+    # Import the same evrmail as this process, installed or not
+    source_root = str(Path(__file__).resolve().parents[2])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [source_root, env.get("PYTHONPATH")]))
+    cmd = [sys.executable, "-c", "from evrmail.bench.replay import main; main()",
+           recording.path, "--result", str(raw_result)]
+    if debug_mode:
+        cmd.append("--debug")
+    if trace_memory:
+        cmd.append("--tracemalloc")
+    try:
+        # The daemon's console logging is noise here; its log files stay in the scratch HOME
+        completed = subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL)
+        if completed.returncode != 0 or not raw_result.exists():
+            raise RuntimeError(f"Replay failed (exit code {completed.returncode}); scratch HOME kept at {scratch}")
+        results = json.loads(raw_result.read_text())
+    except Exception:
+        keep_home = True
+        raise
+    finally:
+        if not keep_home:
+            import shutil
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    commit = git_commit()
+    document = {
+        "benchmark": "daemon-replay",
+        "version": RESULT_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "recording": {
+            "path": recording.path,
+            "sha256": recording.sha256,
+            "rawtx": recording.count("rawtx"),
+            "rawblock": recording.count("rawblock"),
+            "payloads": len(recording.payloads),
+        },
+        "results": results,
+    }
+    if output is None:
+        output = BENCH_DIR / f"daemon-{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'nocommit'}.json"
+    output = Path(output).expanduser()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2))
+    document["output"] = str(output)
+    return document
+
+# ─── 📊 Comparison ────────────────────────────────────────────────────────────
+
+def _lookup(results: dict, dotted: str):
+    value = results
+    for part in dotted.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Per-metric change from `baseline` to `current` (both result documents).
+    A metric regresses when it got worse by more than `threshold` percent.
+    """
+    rows = []
+    for metric, higher_is_better in COMPARED_METRICS:
+        old = _lookup(baseline.get("results", {}), metric)
+        new = _lookup(current.get("results", {}), metric)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        worse = -change if higher_is_better else change
+        rows.append({
+            "metric": metric,
+            "baseline": old,
+            "current": new,
+            "change_pct": round(change, 2),
+            "regression": worse > threshold,
+        })
+    return rows
+
+# ─── 🚀 Child Entrypoint ──────────────────────────────────────────────────────
+
+def main(argv=None):
+    """Entry point of the child process started by `run_isolated`."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay a recorded stream (run via `evrmail dev bench-daemon`)")
+    parser.add_argument("recording")
+    parser.add_argument("--result", required=True, help="Where to write the raw results JSON")
+    parser.add_argument("--debug", action="store_true", help="Replay with debug logging")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also trace Python heap growth")
+    args = parser.parse_args(argv)
+    results = run_replay(load_recording(args.recording), debug_mode=args.debug, trace_memory=args.tracemalloc)
+    Path(args.result).write_text(json.dumps(results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# ─── 🧪 EvrMail Synthetic Traffic ─────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Generates a chain and mailbox traffic for load tests without a node.
+#   Blocks and transactions are real serialized Evrmore data that
+#   `wallet.block.decode`, `wallet.tx.decode` and the daemon's stream
+#   views parse. The outputs are a mix of:
+#     - P2PKH payments, to our addresses or to strangers
+#     - P2SH payments
+#     - OP_EVR_ASSET transfers carrying an IPFS message hash
+#   Every message hash has a matching batch payload whose messages are
+#   encrypted and signed like real ones, part of them to generated wallets.
+#   The output is a replay recording for `evrmail dev bench-daemon`. The
+#   same seed always gives the same bytes.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import base64
+import hashlib
+import json
+import random
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import base58
+from Crypto.Hash import RIPEMD160
+from coincurve import PrivateKey
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from evrmail.crypto import hex_to_wif, sign_message
+from evrmail.wallet.pubkeyhash import to_address
+from evrmail.wallet.script.create import create_p2pkh_script, create_transfer_asset_script
+
+START_HEIGHT = 1_000_000
+START_TIME = 1_700_000_000
+BLOCK_INTERVAL = 60
+BITS = 0x1b0404cb
+COIN = 100_000_000
+MESSAGE_ASSET = "EVRMAIL~BENCH"
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+def _sha256d(data: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+def _hash160(data: bytes) -> bytes:
+    return RIPEMD160.new(hashlib.sha256(data).digest()).digest()
+
+def _varint(n: int) -> bytes:
+    if n < 0xfd:
+        return bytes([n])
+    if n <= 0xffff:
+        return b"\xfd" + struct.pack("<H", n)
+    if n <= 0xffffffff:
+        return b"\xfe" + struct.pack("<I", n)
+    return b"\xff" + struct.pack("<Q", n)
+
+def _merkle_root(txids: List[bytes]) -> bytes:
+    level = list(txids)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [_sha256d(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+# ─── 🔑 Keys ──────────────────────────────────────────────────────────────────
+
+class SyntheticKey:
+    """A secp256k1 key pair with its P2PKH address."""
+
+    def __init__(self, secret: bytes):
+        self.secret = secret
+        self.privkey = secret.hex()
+        self.pubkey = PrivateKey(secret).public_key.format(compressed=True)
+        self.hash160 = _hash160(self.pubkey)
+        self.address = to_address(self.hash160.hex())
+
+    @property
+    def wif(self) -> str:
+        return hex_to_wif(self.privkey)
+
+# ─── ⛓ Generator ──────────────────────────────────────────────────────────────
+
+class SyntheticChain:
+    """
+    Builds `blocks` blocks of `txs_per_block` transactions (plus coinbase).
+    `owned_fraction` of payment outputs and of batch messages go to the
+    generated wallets, `message_fraction` of transactions carry a batch of
+    `messages_per_batch` messages and `p2sh_fraction` of payments are P2SH.
+    """
+
+    def __init__(self, blocks: int = 10, txs_per_block: int = 100, owned_fraction: float = 0.05,
+                 messages_per_batch: int = 10, message_fraction: float = 0.05, p2sh_fraction: float = 0.1,
+                 wallets: int = 2, addresses_per_wallet: int = 20, strangers: int = 500,
+                 start_height: int = START_HEIGHT, seed: int = 0):
+        self.blocks = blocks
+        self.txs_per_block = txs_per_block
+        self.owned_fraction = owned_fraction
+        self.messages_per_batch = messages_per_batch
+        self.message_fraction = message_fraction
+        self.p2sh_fraction = p2sh_fraction
+        self.start_height = start_height
+        self.rng = random.Random(seed)
+
+        self.wallets: Dict[str, List[SyntheticKey]] = {
+            f"bench{w}": [self._key() for _ in range(addresses_per_wallet)] for w in range(wallets)
+        }
+        self.ours: List[SyntheticKey] = [key for keys in self.wallets.values() for key in keys]
+        self.strangers: List[SyntheticKey] = [self._key() for _ in range(strangers)]
+        self.start_hash = self.rng.randbytes(32).hex()
+
+        self._spendable: List[Tuple[bytes, int]] = []      # (txid in internal order, vout)
+        self.stats = {"blocks": 0, "transactions": 0, "outputs": 0, "owned_outputs": 0, "p2sh_outputs": 0,
+                      "message_outputs": 0, "messages": 0, "owned_messages": 0}
+
+    def _key(self) -> SyntheticKey:
+        while True:
+            secret = self.rng.randbytes(32)
+            if 0 < int.from_bytes(secret, "big") < SECP256K1_ORDER:
+                return SyntheticKey(secret)
+
+    def _block_time(self, height: int) -> int:
+        return START_TIME + (height - self.start_height) * BLOCK_INTERVAL
+
+    def _owner(self) -> Tuple[SyntheticKey, bool]:
+        if self.ours and self.rng.random() < self.owned_fraction:
+            return self.rng.choice(self.ours), True
+        return self.rng.choice(self.strangers), False
+
+    # ─── Payloads ───
+
+    def _encrypt(self, message: dict, sender: SyntheticKey, recipient: SyntheticKey) -> dict:
+        """Encrypt like utils.encrypt_message, with a seeded ephemeral key and nonce."""
+        from evrmail.utils.encrypt_message import encrypt_to_pubkey
+        message = dict(message, content=base64.b64encode(message["content"].encode()).decode())
+        encrypted = encrypt_to_pubkey(
+            json.dumps(message).encode(),
+            recipient.pubkey.hex(),
+            ephemeral_private_key=ec.derive_private_key(self.rng.randrange(1, SECP256K1_ORDER), ec.SECP256K1()),
+            nonce=self.rng.randbytes(12),
+        )
+        return {
+            "to": recipient.address,
+            "from": sender.address,
+            "to_pubkey": recipient.pubkey.hex(),
+            "from_pubkey": sender.pubkey.hex(),
+            **encrypted,
+            "signature": message["signature"]
+        }
+
+    def batch_payload(self, sender: SyntheticKey, height: int) -> Tuple[str, dict]:
+        """A batch of `messages_per_batch` messages and its CIDv0."""
+        messages = []
+        for i in range(self.messages_per_batch):
+            recipient, owned = self._owner()
+            message = {
+                "to": recipient.address,
+                "from": sender.address,
+                "subject": f"Synthetic message {height}-{i}",
+                "content": f"Load test message {i} from block {height}. " * self.rng.randint(1, 8),
+                "encrypted": True
+            }
+            message["signature"] = sign_message(json.dumps(message), sender.wif)
+            messages.append(self._encrypt(message, sender, recipient))
+            self.stats["messages"] += 1
+            self.stats["owned_messages"] += owned
+        batch = {
+            "batch_id": self.rng.randbytes(16).hex(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._block_time(height))),
+            "sender": sender.address,
+            "sender_pubkey": sender.pubkey.hex(),
+            "version": 1,
+            "messages": messages
+        }
+        digest = hashlib.sha256(json.dumps(batch, sort_keys=True).encode()).digest()
+        return base58.b58encode(b"\x12\x20" + digest).decode(), batch
+
+    # ─── Transactions ───
+
+    def _output(self, payloads: Dict[str, dict], height: int, message: bool) -> Tuple[int, bytes]:
+        owner, owned = self._owner()
+        self.stats["outputs"] += 1
+        self.stats["owned_outputs"] += owned
+        if message:
+            cid, batch = self.batch_payload(self.rng.choice(self.strangers), height)
+            payloads[cid] = batch
+            self.stats["message_outputs"] += 1
+            return 0, bytes.fromhex(create_transfer_asset_script(owner.hash160, MESSAGE_ASSET, COIN, cid))
+        value = self.rng.randint(COIN // 100, 1000 * COIN)
+        if not owned and self.rng.random() < self.p2sh_fraction:
+            self.stats["p2sh_outputs"] += 1
+            return value, b"\xa9\x14" + self.rng.randbytes(20) + b"\x87"
+        return value, bytes.fromhex(create_p2pkh_script(owner.hash160.hex()))
+
+    def _inputs(self) -> List[Tuple[bytes, int]]:
+        inputs = []
+        for _ in range(self.rng.randint(1, 2)):
+            if self._spendable and self.rng.random() < 0.9:
+                i = self.rng.randrange(len(self._spendable))
+                self._spendable[i], self._spendable[-1] = self._spendable[-1], self._spendable[i]
+                inputs.append(self._spendable.pop())
+            else:
+                # Coins from before the generated range
+                inputs.append((self.rng.randbytes(32), self.rng.randint(0, 3)))
+        return inputs
+
+    @staticmethod
+    def serialize(inputs: List[Tuple[bytes, int, bytes]], outputs: List[Tuple[int, bytes]]) -> bytes:
+        """Legacy (non-witness) version 2 transaction."""
+        parts = [struct.pack("<I", 2), _varint(len(inputs))]
+        for txid, vout, script_sig in inputs:
+            parts += [txid, struct.pack("<I", vout), _varint(len(script_sig)), script_sig, b"\xff\xff\xff\xff"]
+        parts.append(_varint(len(outputs)))
+        for value, script in outputs:
+            parts += [struct.pack("<q", value), _varint(len(script)), script]
+        parts.append(struct.pack("<I", 0))
+        return b"".join(parts)
+
+    def _script_sig(self) -> bytes:
+        # DER-sized signature and a compressed pubkey; nothing here verifies them
+        return b"\x48" + b"\x30" + self.rng.randbytes(71) + b"\x21" + b"\x02" + self.rng.randbytes(32)
+
+    def transaction(self, payloads: Dict[str, dict], height: int) -> bytes:
+        message = self.rng.random() < self.message_fraction
+        inputs = [(txid, vout, self._script_sig()) for txid, vout in self._inputs()]
+        outputs = [self._output(payloads, height, message)] + [self._output(payloads, height, False)]
+        raw = self.serialize(inputs, outputs)
+        txid = _sha256d(raw)
+        self._spendable.extend((txid, n) for n in range(len(outputs)))
+        self.stats["transactions"] += 1
+        return raw
+
+    def coinbase(self, height: int) -> bytes:
+        height_bytes = height.to_bytes((height.bit_length() + 8) // 8, "little")
+        script_sig = bytes([len(height_bytes)]) + height_bytes + self.rng.randbytes(8)
+        miner = self.rng.choice(self.strangers)
+        raw = self.serialize([(b"\x00" * 32, 0xffffffff, script_sig)],
+                             [(2500 * COIN, bytes.fromhex(create_p2pkh_script(miner.hash160.hex())))])
+        self._spendable.append((_sha256d(raw), 0))
+        return raw
+
+    def block(self, prev_hash: str, height: int, txs: List[bytes]) -> bytes:
+        """KAWPOW-layout block (80-byte header, mixhash, nonce64) around `txs`."""
+        header = (
+            struct.pack("<I", 0x30000000) +
+            bytes.fromhex(prev_hash)[::-1] +
+            _merkle_root([_sha256d(tx) for tx in txs]) +
+            struct.pack("<III", self._block_time(height), BITS, self.rng.getrandbits(32))
+        )
+        return header + self.rng.randbytes(32) + self.rng.randbytes(8) + _varint(len(txs)) + b"".join(txs)
+
+    # ─── Output ───
+
+    def meta(self) -> dict:
+        return {
+            "type": "meta",
+            "start_height": self.start_height,
+            "start_hash": self.start_hash,
+            "addresses": [key.address for key in self.ours],
+            "keys": {key.address: key.privkey for key in self.ours},
+            "wallets": {name: [key.address for key in keys] for name, keys in self.wallets.items()},
+        }
+
+    def events(self, mempool: bool = True) -> Iterator[dict]:
+        """
+        Recording entries in arrival order: meta, then for each block its
+        payloads, its transactions as rawtx (when `mempool`) and the block.
+        """
+        yield self.meta()
+        prev_hash = self.start_hash
+        for height in range(self.start_height + 1, self.start_height + self.blocks + 1):
+            payloads: Dict[str, dict] = {}
+            txs = [self.coinbase(height)] + [self.transaction(payloads, height) for _ in range(self.txs_per_block)]
+            for cid, batch in payloads.items():
+                yield {"type": "payload", "cid": cid, "data": batch}
+            if mempool:
+                for raw in txs[1:]:
+                    yield {"type": "rawtx", "hex": raw.hex()}
+            raw_block = self.block(prev_hash, height, txs)
+            prev_hash = _sha256d(raw_block[:80])[::-1].hex()
+            self.stats["blocks"] += 1
+            yield {"type": "rawblock", "hex": raw_block.hex()}
+
+    def write(self, path, mempool: bool = True) -> dict:
+        """Write the recording to `path`. Returns the generation stats."""
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in self.events(mempool):
+                f.write(json.dumps(entry) + "\n")
+        return dict(self.stats)
+
+def generate_recording(path, mempool: bool = True, **params) -> dict:
+    """Generate a synthetic recording at `path`; `params` go to SyntheticChain."""
+    return SyntheticChain(**params).write(path, mempool)
+
+__all__ = [
+    "SyntheticChain",
+    "SyntheticKey",
+    "generate_recording",
+]
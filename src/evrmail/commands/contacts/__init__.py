@@ -12,6 +12,7 @@ from typing import Optional
 from evrmail.config import load_config, save_config
 from evrmail.crypto import validate_evr_address
 from evrmail.utils import get_address
+from evrmail.utils.events import publish, CONTACT
 
 contacts_app = typer.Typer(
     name="contacts",
@@ -63,6 +64,7 @@ def add_contact(
     
     config["contacts"] = contacts
     save_config(config)
+    publish(CONTACT, action="added", address=address)
     print(f"Added {address} as a contact.")
 
 @contacts_app.command("remove")
@@ -80,6 +82,7 @@ def remove_contact(
     del contacts[address]
     config["contacts"] = contacts
     save_config(config)
+    publish(CONTACT, action="removed", address=address)
     print(f"Removed {address} from contacts.")
 
 @contacts_app.command("requests")
@@ -125,6 +128,7 @@ def accept_request(
     config["contact_requests"] = requests
     config["contacts"] = contacts
     save_config(config)
+    publish(CONTACT, action="accepted", address=address)
     
     print(f"Accepted contact request from {address}")
 
@@ -146,6 +150,7 @@ def reject_request(
     # Update config
     config["contact_requests"] = requests
     save_config(config)
+    publish(CONTACT, action="rejected", address=address)
     
     print(f"Rejected contact request from {address}")
 
@@ -44,6 +44,164 @@ def get_private_key_for_address(address: str):
     """Get the private key for an address."""
     from evrmail.wallet.utils import get_private_key_for_address
     print(get_private_key_for_address(address))
+
+@dev_app.command(name="export-utxos")
+def export_utxos(
+    out_dir: Optional[str] = typer.Option(None, "--out", help="Directory to write mempool.json / confirmed.json to")
+):
+    """Export the UTXO store as JSON for debugging."""
+    from pathlib import Path
+    from evrmail.daemon.utxo_store import get_utxo_store, UTXO_EXPORT_DIR
+    target = Path(out_dir).expanduser() if out_dir else UTXO_EXPORT_DIR
+    paths = get_utxo_store().export_json(target)
+    for pool, path in paths.items():
+        typer.echo(f"✅ Exported {pool} UTXOs to {path}")
+
+@dev_app.command(name="ipfs-cache")
+def ipfs_cache(
+    clear: bool = typer.Option(False, "--clear", help="Remove every cached IPFS object")
+):
+    """Show (or clear) the local IPFS payload cache."""
+    from evrmail.utils.ipfs_cache import get_ipfs_cache
+    cache = get_ipfs_cache()
+    if clear:
+        cache.clear()
+        typer.echo("🧹 Cleared the IPFS cache.")
+    info = cache.info()
+    typer.echo(f"📁 {info['path']}")
+    typer.echo(f"   {info['entries']} entries, {info['size_bytes'] / (1024 * 1024):.1f} / {info['max_bytes'] / (1024 * 1024):.0f} MB")
+
+@dev_app.command(name="utxo-history")
+def utxo_history(
+    address: Optional[str] = typer.Argument(None, help="Only show outputs of this address"),
+    limit: int = typer.Option(50, "--limit", help="Maximum number of outputs to show"),
+    raw: bool = typer.Option(False, "--raw", help="Print raw JSON instead of a table")
+):
+    """Show archived (spent) UTXOs."""
+    import json
+    from evrmail.daemon.utxo_history import get_utxo_history
+    history = get_utxo_history()
+    utxos = history.by_address(address, limit) if address else history.recent(limit)
+    if raw:
+        typer.echo(json.dumps(utxos, indent=2))
+        return
+    typer.echo(f"🗃 {len(history)} archived outputs")
+    for u in utxos:
+        typer.echo(f"{u.get('address')}, {u['txid']}:{u['vout']}, {u.get('asset') or 'EVR'}, {u.get('amount')}, "
+                   f"block {u.get('block_height')}, spent {u.get('spent_height')}")
+
+@dev_app.command(name="record-traffic")
+def record_traffic(
+    output: str = typer.Argument(..., help="Recording file to write (JSON Lines)"),
+    seconds: float = typer.Option(600, "--seconds", help="How long to record")
+):
+    """Record live rawtx/rawblock notifications for `bench-daemon`."""
+    from evrmail.bench import record_stream
+    count = record_stream(output, seconds, log=typer.echo)
+    typer.echo(f"✅ Recorded {count} notifications to {output}")
+
+@dev_app.command(name="generate-traffic")
+def generate_traffic(
+    output: str = typer.Argument(..., help="Recording file to write (JSON Lines)"),
+    blocks: int = typer.Option(10, "--blocks", help="Number of blocks"),
+    txs_per_block: int = typer.Option(100, "--txs-per-block", help="Transactions per block (plus coinbase)"),
+    owned: float = typer.Option(0.05, "--owned", help="Fraction of outputs and messages addressed to the generated wallets"),
+    messages_per_batch: int = typer.Option(10, "--messages-per-batch", help="Messages in each IPFS batch payload"),
+    message_fraction: float = typer.Option(0.05, "--message-fraction", help="Fraction of transactions carrying a message batch"),
+    p2sh_fraction: float = typer.Option(0.1, "--p2sh-fraction", help="Fraction of payments to P2SH addresses"),
+    seed: int = typer.Option(0, "--seed", help="Random seed; the same seed gives the same recording"),
+    no_mempool: bool = typer.Option(False, "--no-mempool", help="Only emit blocks, no rawtx notifications")
+):
+    """Generate a synthetic chain and mailbox traffic recording for `bench-daemon`."""
+    from evrmail.bench import generate_recording
+    stats = generate_recording(
+        output, mempool=not no_mempool, blocks=blocks, txs_per_block=txs_per_block, owned_fraction=owned,
+        messages_per_batch=messages_per_batch, message_fraction=message_fraction,
+        p2sh_fraction=p2sh_fraction, seed=seed
+    )
+    typer.echo(f"✅ Wrote {stats['blocks']} blocks, {stats['transactions']} transactions "
+               f"({stats['owned_outputs']} of {stats['outputs']} outputs ours) and "
+               f"{stats['message_outputs']} payloads ({stats['owned_messages']} of {stats['messages']} messages ours) to {output}")
+
+@dev_app.command(name="bench-daemon")
+def bench_daemon(
+    recording: str = typer.Argument(..., help="Recording to replay (see `record-traffic`)"),
+    output: Optional[str] = typer.Option(None, "--output", help="Where to save the results JSON (default: ~/.evrmail/bench/)"),
+    baseline: Optional[str] = typer.Option(None, "--baseline", help="Results JSON of an earlier run to compare against"),
+    threshold: float = typer.Option(10.0, "--threshold", help="Percent change that counts as a regression"),
+    trace_memory: bool = typer.Option(False, "--tracemalloc", help="Also trace Python heap growth (slows the replay)"),
+    debug: bool = typer.Option(False, "--debug", help="Replay with debug logging"),
+    keep_home: bool = typer.Option(False, "--keep-home", help="Keep the scratch HOME the replay ran in")
+):
+    """Replay recorded traffic through the daemon and measure it."""
+    import json
+    from evrmail.bench import run_isolated, compare_results
+    document = run_isolated(recording, output, debug_mode=debug, trace_memory=trace_memory, keep_home=keep_home)
+    results = document["results"]
+    txs, blocks, memory = results["transactions"], results["blocks"], results["memory"]
+    typer.echo(f"🏁 Replayed {results['events']} notifications in {results['elapsed_seconds']}s "
+               f"({results['events_per_second']}/s) at {document['commit'] or 'unknown commit'}")
+    typer.echo(f"   mempool: {txs['count']} txs, {txs['per_second']} tx/s, "
+               f"p50 {txs['latency_ms']['p50']} ms, p95 {txs['latency_ms']['p95']} ms, p99 {txs['latency_ms']['p99']} ms")
+    typer.echo(f"   blocks : {blocks['count']} blocks, {blocks['transactions']} txs, {blocks['tx_per_second']} tx/s, "
+               f"p50 {blocks['latency_ms']['p50']} ms, p95 {blocks['latency_ms']['p95']} ms, max {blocks['latency_ms']['max']} ms")
+    typer.echo(f"   memory : {memory['rss_growth_kb']} KB RSS growth"
+               + (f", {memory['traced_peak_kb']} KB heap peak" if "traced_peak_kb" in memory else ""))
+    typer.echo(f"💾 Saved to {document['output']}")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            rows = compare_results(json.load(f), document, threshold)
+        typer.echo(f"📊 Against {baseline}:")
+        for row in rows:
+            flag = "❌" if row["regression"] else "  "
+            typer.echo(f"{flag} {row['metric']:<30} {row['baseline']:>12} → {row['current']:<12} ({row['change_pct']:+.1f}%)")
+        if any(row["regression"] for row in rows):
+            raise typer.Exit(1)
+
+@dev_app.command(name="bench-micro")
+def bench_micro(
+    only: Optional[str] = typer.Option(None, "--filter", help="Only run benchmarks whose name contains this"),
+    repeat: int = typer.Option(5, "--repeat", help="Timed loops per benchmark; the best one counts"),
+    min_time: float = typer.Option(0.2, "--min-time", help="Minimum seconds per timed loop"),
+    baseline: Optional[str] = typer.Option(None, "--baseline", help="Results JSON to compare against (default: the baseline committed with evrmail.bench)"),
+    save_baseline: bool = typer.Option(False, "--save-baseline", help="Store this run as the new baseline"),
+    output: Optional[str] = typer.Option(None, "--output", help="Where to save the results JSON (default: ~/.evrmail/bench/)"),
+    threshold: float = typer.Option(10.0, "--threshold", help="Percent slowdown that counts as a regression")
+):
+    """Time the codec and crypto hot paths and compare against a baseline."""
+    import time
+    from evrmail.bench import BENCH_DIR
+    from evrmail.bench.micro import run_suite, save_results, load_results, compare_suite, BASELINE_FILE
+
+    def report(name, timing):
+        typer.echo(f"   {name:<36} {timing['best_us']:>12.2f} µs  {timing['ops_per_second']:>12,.0f}/s")
+
+    typer.echo("⏱  Running micro-benchmarks")
+    document = run_suite(only, repeat=repeat, min_time=min_time, on_result=report)
+    if output is None:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        output = BENCH_DIR / f"micro-{stamp}-{document['commit'] or 'unknown'}.json"
+    typer.echo(f"💾 Saved to {save_results(document, output)}")
+
+    baseline_path = baseline or BASELINE_FILE
+    previous = load_results(baseline_path)
+    if save_baseline:
+        save_results(document, BASELINE_FILE)
+        typer.echo(f"📌 Stored as baseline {BASELINE_FILE}")
+    if previous is None:
+        if baseline:
+            typer.echo(f"⚠️ No baseline at {baseline}")
+        return
+
+    rows = compare_suite(previous, document, threshold)
+    recorded_on = (previous.get("machine") or {}).get("cpu") or previous.get("platform") or "unknown machine"
+    typer.echo(f"📊 Against {baseline_path} ({previous.get('commit') or 'unknown commit'}, {recorded_on}):")
+    for row in rows:
+        flag = "❌" if row["regression"] else "✅" if row["improvement"] else "  "
+        typer.echo(f"{flag} {row['name']:<36} {row['baseline_us']:>12.2f} → {row['current_us']:<12.2f} µs ({row['change_pct']:+.1f}%)")
+    if any(row["regression"] for row in rows):
+        raise typer.Exit(1)
 import os
 import hashlib
 import base58
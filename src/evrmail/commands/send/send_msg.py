@@ -41,7 +41,8 @@ def send_msg(
     raw: bool = typer.Option(False, "--raw", help="📄 Output raw JSON (dry-run only)")
 ):
     from evrmail.utils.create_message_payload import create_message_payload
-    from evrmail import rpc_client
+    from evrmail.utils.rpc import get_rpc
+    rpc_client = get_rpc()
     from evrmail.wallet import addresses 
     import sys   
   
@@ -180,7 +181,8 @@ def send_msg_core(
     encrypted: bool = False
 ):
     from evrmail.utils.create_message_payload import create_message_payload
-    from evrmail import rpc_client
+    from evrmail.utils.rpc import get_rpc
+    rpc_client = get_rpc()
     from evrmail.wallet import addresses 
     import sys   
   
@@ -347,7 +349,8 @@ def send_contact_request_core(
     import typer
     import math
     import sys
-    from evrmail import rpc_client
+    from evrmail.utils.rpc import get_rpc
+    rpc_client = get_rpc()
     from evrmail.wallet.addresses import get_all_addresses, get_outbox_address, validate
     from evrmail.utils.ipfs import add_to_ipfs
     from evrmail.wallet.tx.create.send_asset import create_send_asset_transaction
@@ -34,7 +34,30 @@ DEFAULT_CONFIG = {
     "rpc_host": "tcp://77.90.40.55",
     "rpc_port": 8819,
     "rpc_user": "evruser",
-    "rpc_password": "changeThisToAStrongPassword123"
+    "rpc_password": "changeThisToAStrongPassword123",
+    "processed_txids_prune_depth": 1000,
+    "persistence_flush_interval": 0.5,
+    "persistence_durability": "fsync",
+    "persistence_snapshot_interval": 300,
+    "ipfs_workers": 4,
+    "ipfs_queue_size": 256,
+    "ipfs_max_attempts": 8,
+    "ipfs_retry_base": 5,
+    "ipfs_cache_max_mb": 256,
+    "ipfs_cache_verify": True,
+    "ingest_workers": 0,
+    "ingest_parallel_min_txs": 256,
+    "sync_checkpoint_window": 100,
+    "address_gap_limit": 20,
+    "utxo_archive_depth": 100,
+    "mempool_expiry_hours": 336,
+    "mempool_reconcile_interval": 300,
+    "daemon_executor_workers": 8,
+    "daemon_queue_size": 1024,
+    "daemon_shards": 0,
+    "daemon_shard_timeout": 60,
+    "metrics_host": "127.0.0.1",
+    "metrics_port": 9477
 }
 
 """
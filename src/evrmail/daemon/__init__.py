@@ -4,7 +4,6 @@ import json
 import os
 import subprocess
 import threading
-import time
 import logging
 from pathlib import Path
 
@@ -14,12 +13,9 @@ from evrmail.utils import (
     DAEMON, WALLET, CHAIN, NETWORK
 )
 from evrmail.crypto import wif_to_pubkey
+from evrmail.wallet import WALLET_DIR
 from evrmail.wallet.addresses import validate as validate_evr_address, get_address
 
-# 🛠 Filesystem Monitoring
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
 # ─── 📂 Paths and Config ──────────────────────────────────────────────────────
 
 config = load_config()
@@ -32,35 +28,49 @@ PROCESSED_TXIDS_FILE = STORAGE_DIR / "processed_txids.json"
 STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 UTXO_DIR.mkdir(parents=True, exist_ok=True)
 
-# ─── 🔥 Realtime UTXO Monitoring ──────────────────────────────────────────────
+# ─── 🔥 Realtime Wallet Monitoring ────────────────────────────────────────────
 
-class ConfirmedFileHandler(FileSystemEventHandler):
-    def on_modified(self, event):
-        if event.src_path.endswith("confirmed.json"):
-            from evrmail.utils import daemon as daemon_log
-            daemon_log("info", "🔥 confirmed.json modified, reloading addresses...")
+class WalletDirWatcher:
+    """
+    Turns wallet files written by another process (CLI, GUI) into WALLET
+    events. Changes made in-process are already published by wallet.store.
+    The daemon runtime calls `poll()` every few seconds; a stat of a handful
+    of files is cheaper than an observer thread.
+    """
+    def __init__(self, path=WALLET_DIR):
+        self.path = Path(path)
+        self._seen = self._scan()
+
+    def _scan(self):
+        seen = {}
+        for wallet_file in self.path.glob("*.json"):
             try:
-                from .__main__ import reload_known_addresses
-                reload_known_addresses()
-            except Exception as e:
-                daemon_log("error", f"⚠️ Failed to reload addresses: {e}")
+                seen[wallet_file.stem] = wallet_file.stat().st_mtime_ns
+            except OSError:
+                continue    # removed between glob and stat
+        return seen
 
-def monitor_confirmed_utxos_realtime():
-    observer = Observer()
-    handler = ConfirmedFileHandler()
-    observer.schedule(handler, path=str(UTXO_DIR), recursive=False)
-    observer.start()
-
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
+    def poll(self) -> int:
+        """Publish created/saved/removed for what changed since the last poll."""
+        from evrmail.utils.events import publish, WALLET
+        current = self._scan()
+        changes = 0
+        for name, mtime in current.items():
+            if name not in self._seen:
+                publish(WALLET, action="created", wallet=name)
+                changes += 1
+            elif mtime != self._seen[name]:
+                publish(WALLET, action="saved", wallet=name)
+                changes += 1
+        for name in self._seen.keys() - current.keys():
+            publish(WALLET, action="removed", wallet=name)
+            changes += 1
+        self._seen = current
+        return changes
 
 # ─── 🚀 Daemon Launcher ───────────────────────────────────────────────────────
 
-def start_daemon_threaded(log_callback=None, debug_mode=False):
+def start_daemon_threaded(log_callback=None, debug_mode=False, rescan=False):
     """Start the EvrMail daemon in a background thread"""
     # Set up logging
     log_level = logging.DEBUG if debug_mode else logging.INFO
@@ -90,16 +100,22 @@ def start_daemon_threaded(log_callback=None, debug_mode=False):
             unsubscribe = register_callback(adapter, category)
             unsubscribe_funcs.append(unsubscribe)
     
-    # Start the daemon in a thread
+    # The daemon's event loop runs on this one thread; stop it with stop_daemon()
     def run():
         import evrmail.daemon.__main__ as main_module
-        main_module.main(debug_mode=debug_mode)
+        main_module.main(debug_mode=debug_mode, rescan=rescan)
 
-    thread = threading.Thread(target=run, daemon=True)
+    thread = threading.Thread(target=run, name="evrmail-daemon", daemon=True)
     thread.start()
     
     return thread
 
+def stop_daemon():
+    """Ask a running daemon runtime to shut down cleanly."""
+    import evrmail.daemon.__main__ as main_module
+    if main_module.runtime is not None:
+        main_module.runtime.stop()
+
 # ─── 📬 Inbox & Processed TXIDs ────────────────────────────────────────────────
 
 def load_inbox():
@@ -111,12 +127,19 @@ def save_inbox(messages):
     INBOX_FILE.write_text(json.dumps(messages, indent=2))
 
 def load_processed_txids():
+    """Open the processed-txid tracker, importing the legacy JSON list once."""
+    from evrmail.daemon.txid_tracker import ProcessedTxids, DEFAULT_PRUNE_DEPTH
+    tracker = ProcessedTxids(prune_depth=config.get("processed_txids_prune_depth", DEFAULT_PRUNE_DEPTH))
     if PROCESSED_TXIDS_FILE.exists():
-        return json.loads(PROCESSED_TXIDS_FILE.read_text())
-    return []
+        # Stamp the legacy txids with the synced height so the first prune keeps them
+        from evrmail.daemon.checkpoint import load_checkpoint
+        from evrmail.daemon.utxo_store import get_utxo_store
+        checkpoint = load_checkpoint(get_utxo_store())
+        tracker.import_json(PROCESSED_TXIDS_FILE, checkpoint.height if checkpoint else None)
+    return tracker
 
 def save_processed_txids(txids):
-    PROCESSED_TXIDS_FILE.write_text(json.dumps(txids, indent=2))
+    txids.flush()
 
 # ─── 🌐 IPFS Support ──────────────────────────────────────────────────────────
 
@@ -133,7 +156,8 @@ def read_message(cid: str):
 
 __all__ = [
     "start_daemon_threaded",
-    "monitor_confirmed_utxos_realtime",
+    "stop_daemon",
+    "WalletDirWatcher",
     "load_inbox",
     "save_inbox",
     "load_processed_txids",
@@ -240,6 +264,8 @@ class EVRMailDaemon:
             requests[sender] = contact_info
             self.config["contact_requests"] = requests
             save_config(self.config)
+            from evrmail.utils.events import publish, CONTACT
+            publish(CONTACT, action="requested", address=sender)
             
             daemon_log("info", f"Stored contact request from {sender}")
             return True
@@ -304,24 +330,17 @@ class EVRMailDaemon:
             return False
             
     def run(self):
-        """Main daemon loop."""
-        from evrmail.utils import daemon as daemon_log
+        """Run the daemon runtime on this thread until stop() is called."""
+        import evrmail.daemon.__main__ as main_module
         self.running = True
-        
-        while self.running:
-            try:
-                # Process any pending messages
-                # TODO: Implement message processing loop
-                
-                time.sleep(1)  # Prevent busy waiting
-                
-            except Exception as e:
-                daemon_log("error", f"Error in daemon loop: {e}")
-                time.sleep(5)  # Back off on error
+        try:
+            main_module.main()
+        finally:
+            self.running = False
                 
     def stop(self):
         """Stop the daemon."""
-        self.running = False
+        stop_daemon()
         for thread in self.threads:
             thread.join()
             
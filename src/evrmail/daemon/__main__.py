@@ -1,7 +1,10 @@
 # ─── 📦 EvrMail Daemon Main ────────────────────────────────────────────────────
 
+import asyncio
+import itertools
 import json
 import os
+import threading
 import time
 import traceback
 from pathlib import Path
@@ -11,8 +14,11 @@ from evrmore_rpc import EvrmoreClient
 from evrmore_rpc.zmq import ZMQTopic, EvrmoreZMQClient
 from evrmail.config import load_config
 from evrmail.wallet import list_wallets, load_wallet
+from evrmail.wallet.store import watched_addresses, mark_address_used
 from evrmail.utils.inbox import save_messages
-from evrmail.utils.scan_payload import scan_payload
+from evrmail.utils.scan_payload import scan_payload, PayloadUnavailable
+from evrmail.utils.scan_index import get_scan_index, key_fingerprints, message_id
+from evrmail.utils.events import subscribe, publish, WALLET, ADDRESS, UTXO
 from evrmail.utils import (
     configure_logging, 
     daemon as daemon_log, 
@@ -24,20 +30,54 @@ from evrmail.utils import (
 from evrmail.daemon import (
     STORAGE_DIR, INBOX_FILE, PROCESSED_TXIDS_FILE,
     load_inbox, save_inbox, load_processed_txids, save_processed_txids,
-    monitor_confirmed_utxos_realtime,
+    WalletDirWatcher,
     EVRMailDaemon
 )
+from evrmail.daemon.utxo_set import (
+    UTXOSet, load_utxo_set, save_utxo_set,
+    MEMPOOL, CONFIRMED, MEMPOOL_UTXO_FILE, CONFIRMED_UTXO_FILE
+)
+from evrmail.daemon.utxo_store import get_utxo_store
+from evrmail.daemon.utxo_history import get_utxo_history, compact, DEFAULT_ARCHIVE_DEPTH
+from evrmail.daemon.mempool import tracker_from_config
+from evrmail.daemon.sequence import SequenceTracker, GapRecovery
+from evrmail.daemon.runtime import runtime_from_config
+from evrmail.daemon.metrics import (
+    install_collector, serve_metrics, metrics_endpoint,
+    TRANSACTIONS, BLOCKS, ZMQ_NOTIFICATIONS, BLOCK_SECONDS, DECODE_SECONDS,
+    SCAN_PAYLOAD_SECONDS, SYNC_SECONDS
+)
+from evrmail.utils.rpc import rpc_from_config
+from evrmail.daemon.journal import journal_from_config
+from evrmail.daemon.watchlist import Watchlist
+from evrmail.wallet.block.stream import BlockView, TxView
+from evrmail.daemon.ipfs_worker import ipfs_pool_from_config
+from evrmail.daemon.parallel import ingestor_from_config
+from evrmail.daemon.shards import shards_from_config
+from evrmail.daemon.checkpoint import (
+    Checkpoint, load_checkpoint, save_checkpoint,
+    find_common_ancestor, rollback_to, addresses_digest, CHECKPOINT_META_KEY
+)
 
 # ─── 📂 Paths ──────────────────────────────────────────────────────────────────
 
 UTXO_DIR = STORAGE_DIR / "utxos"
 LOG_FILE = STORAGE_DIR / "daemon.log"
-MEMPOOL_UTXO_FILE = UTXO_DIR / "mempool.json"
-CONFIRMED_UTXO_FILE = UTXO_DIR / "confirmed.json"
+
+CATCH_UP_BATCH = 50
+LAST_SYNC_META_KEY = "last_sync_seconds"
 
 # ─── 🌍 Global State ──────────────────────────────────────────────────────────
 
 known_addresses = {}
+address_indexes = {}    # address → (wallet, derivation index)
+high_water = {}         # wallet → highest used index (None until discovered)
+watchlist = Watchlist()
+ipfs_workers = None
+mempool_tracker = None
+runtime = None                      # DaemonRuntime while main() runs
+shard_pool = None                   # ShardPool in sharded mode
+_address_lock = threading.Lock()    # serialises incremental watch-set updates
 
 # ─── ⚙️ Setup Clients ──────────────────────────────────────────────────────────
 
@@ -48,6 +88,8 @@ rpc_client = EvrmoreClient(
     rpcuser=config["rpc_user"],
     rpcpassword=config["rpc_password"],
 )
+# Keep-alive/batching facade for the daemon's hot RPC paths
+rpc = rpc_from_config(config, fallback=rpc_client)
 zmq_client = EvrmoreZMQClient(
     topics=[ZMQTopic.RAW_TX, ZMQTopic.RAW_BLOCK],
     zmq_host=config["rpc_host"].split('tcp://')[1]
@@ -55,220 +97,423 @@ zmq_client = EvrmoreZMQClient(
 
 # ─── 📦 UTXO Management ────────────────────────────────────────────────────────
 
-def load_utxos():
-    mempool = {}
-    confirmed = {}
-    if MEMPOOL_UTXO_FILE.exists():
-        mempool = json.loads(MEMPOOL_UTXO_FILE.read_text())
-    if CONFIRMED_UTXO_FILE.exists():
-        confirmed = json.loads(CONFIRMED_UTXO_FILE.read_text())
-    return {"mempool": mempool, "confirmed": confirmed}
+def load_utxos() -> UTXOSet:
+    return load_utxo_set()
 
-def save_utxos(utxos):
-    MEMPOOL_UTXO_FILE.write_text(json.dumps(utxos["mempool"], indent=2))
-    CONFIRMED_UTXO_FILE.write_text(json.dumps(utxos["confirmed"], indent=2))
+def save_utxos(utxo_cache: UTXOSet):
+    save_utxo_set(utxo_cache)
 
-def mark_utxos_as_spent(tx, txid, utxo_cache):
+def mark_utxos_as_spent(tx, txid, utxo_cache: UTXOSet, height=None):
     """
     Given a transaction, mark matching UTXOs as spent in the cache.
+    `height` is the block the spend confirmed in, so a reorg can undo it.
     """
     spent_count = 0
     
-    for vin in tx.get("vin", []):
-        spent_txid = vin.get("txid")
-        spent_vout = vin.get("vout")
-        
-        if not spent_txid or spent_vout is None:
+    for spent_txid, spent_vout in spent_outpoints(tx):
+        # Direct outpoint lookup across both mempool and confirmed
+        entry = utxo_cache.mark_spent(spent_txid, spent_vout)
+        if entry is None:
             continue
+        if height is not None:
+            utxo_cache.update(spent_txid, spent_vout, spent_height=height)
 
-        # Check both mempool and confirmed
-        for pool_name in ["mempool", "confirmed"]:
-            pool = utxo_cache.get(pool_name, {})
-            for address, utxos in pool.items():
-                for utxo in utxos:
-                    if utxo["txid"] == spent_txid and utxo["vout"] == spent_vout:
-                        utxo["spent"] = True
-                        spent_count += 1
-                        asset_name = utxo.get("asset", "EVR")
-                        amount = utxo.get("amount", 0)
-                        
-                        # Log with detailed information
-                        chain_log("info", f"🔥 Marked UTXO {spent_txid}:{spent_vout} as spent for address {address}", details={
-                            "txid": spent_txid,
-                            "vout": spent_vout,
-                            "spending_txid": txid if hasattr(tx, "txid") else "Unknown",
-                            "address": address,
-                            "asset": asset_name,
-                            "amount": amount,
-                            "pool": pool_name,
-                            "explorer_link": f"https://explorer.evrmore.org/tx/{spent_txid}"
-                        })
+        pool_name, utxo = entry
+        address = utxo.get("address")
+        spent_count += 1
+        asset_name = utxo.get("asset", "EVR")
+        amount = utxo.get("amount", 0)
+        
+        # Log with detailed information (built only if chain logging is on)
+        chain_log("info", "🔥 Marked UTXO %s:%s as spent for address %s", spent_txid, spent_vout, address, details=lambda: {
+            "txid": spent_txid,
+            "vout": spent_vout,
+            "spending_txid": txid,
+            "address": address,
+            "asset": asset_name,
+            "amount": amount,
+            "pool": pool_name,
+            "explorer_link": f"https://explorer.evrmore.org/tx/{spent_txid}"
+        })
     
     if spent_count > 0:
-        wallet_log("info", f"📤 Marked {spent_count} UTXOs as spent in transaction", details={
+        wallet_log("info", "📤 Marked %d UTXOs as spent in transaction", spent_count, details=lambda: {
             "spent_count": spent_count,
-            "txid": txid if hasattr(tx, "txid") else "Unknown",
-            "explorer_link": f"https://explorer.evrmore.org/tx/{txid}" if hasattr(tx, "txid") else None
+            "txid": txid,
+            "explorer_link": f"https://explorer.evrmore.org/tx/{txid}"
         })
     
     return spent_count
 
+def stamp_spent_height(tx, utxo_cache: UTXOSet, height):
+    """
+    Record the block a spend of ours confirmed in. Our own mempool spends
+    were flagged when first seen, without a height for rollback or compaction.
+    """
+    if height is None:
+        return
+    for spent_txid, spent_vout in spent_outpoints(tx):
+        if utxo_cache.mark_spent(spent_txid, spent_vout) is not None:
+            utxo_cache.update(spent_txid, spent_vout, spent_height=height)
+
 # ─── 📋 Address Reloading ──────────────────────────────────────────────────────
 
 def reload_known_addresses():
-    global known_addresses
+    global known_addresses, address_indexes, high_water, watchlist
     daemon_log("info", "🔄 Reloading known addresses...")
     address_map = {}
+    indexes = {}
+    marks = {}
     for name in list_wallets():
         wallet = load_wallet(name)
         if wallet and "addresses" in wallet:
-            for entry in wallet["addresses"]:
-                if isinstance(entry, dict):
-                    address_map[entry["address"]] = name
-                elif isinstance(entry, str):
-                    address_map[entry] = name
+            marks[name] = wallet.get("highest_used_index")
+            entries = wallet["addresses"]
+            entries = entries.values() if isinstance(entries, dict) else entries
+            for entry in entries:
+                if isinstance(entry, dict) and "index" in entry:
+                    indexes[entry["address"]] = (name, entry["index"])
+            # Only the gap-limit window is watched
+            for address in watched_addresses(wallet):
+                address_map[address] = name
     known_addresses = address_map
+    address_indexes = indexes
+    high_water = marks
+    watchlist = Watchlist(address_map)
+
+def refresh_wallet(name) -> bool:
+    """
+    Bring one wallet's addresses up to date in the watch set. Returns False
+    if nothing changed. Everything is copied and swapped in, so the ZMQ
+    threads never see a half-updated set.
+    """
+    with _address_lock:
+        return _refresh_wallet(name)
+
+def _refresh_wallet(name) -> bool:
+    global known_addresses, address_indexes, high_water, watchlist
+    wallet = load_wallet(name)
+    watched = set(watched_addresses(wallet)) if wallet else set()
+    current = {a for a, w in known_addresses.items() if w == name}
+    mark = wallet.get("highest_used_index") if wallet else None
+    if watched == current and high_water.get(name) == mark and (wallet is None) == (name not in high_water):
+        return False
+
+    address_map = dict(known_addresses)
+    indexes = {a: entry for a, entry in address_indexes.items() if entry[0] != name}
+    marks = dict(high_water)
+    new_watchlist = watchlist.copy()
+    for address in current - watched:
+        del address_map[address]
+        new_watchlist.discard(address)
+    for address in watched - current:
+        address_map[address] = name
+        new_watchlist.add(address)
+    if wallet is None:
+        marks.pop(name, None)
+    else:
+        marks[name] = mark
+        entries = wallet.get("addresses", {})
+        entries = entries.values() if isinstance(entries, dict) else entries
+        for entry in entries:
+            if isinstance(entry, dict) and "index" in entry:
+                indexes[entry["address"]] = (name, entry["index"])
+
+    known_addresses, address_indexes, high_water, watchlist = address_map, indexes, marks, new_watchlist
+    wallet_log("info", f"🔄 Wallet {name} changed; watching {len(known_addresses)} addresses", details={
+        "wallet": name,
+        "added": len(watched - current),
+        "removed": len(current - watched)
+    })
+    return True
+
+def on_wallet_event(topic, payload):
+    """Event bus subscriber for WALLET and ADDRESS changes."""
+    name = payload.get("wallet")
+    if name and refresh_wallet(name) and shard_pool is not None:
+        # New addresses may also mean new keys for their shards
+        shard_pool.sync_watchlist(watchlist)
+        shard_pool.reload_keys()
+
+# ─── 🔭 Gap Limit ──────────────────────────────────────────────────────────────
+
+def note_address_activity(address) -> bool:
+    """
+    Extend the watched window when `address` is above its wallet's high-water
+    mark. Returns True if the mark moved and the watch set was reloaded.
+    """
+    name, index = address_indexes.get(address, (None, None))
+    if name is None:
+        return False
+    highest = high_water.get(name)
+    if highest is not None and index <= highest:
+        return False
+    # The ADDRESS event this publishes refreshes the watch set
+    derived = mark_address_used(name, index)
+    wallet_log("info", f"🔭 Address #{index} of wallet {name} used; watching {len(known_addresses)} addresses", details={
+        "wallet": name,
+        "index": index,
+        "derived": len(derived)
+    })
+    return True
+
+def discover_used_addresses(rpc, chunk_size=100) -> int:
+    """
+    Startup gap-limit scan: ask the node which watched addresses have any
+    history and raise each wallet's high-water mark until `gap_limit` unused
+    addresses trail the last used one. Returns the number of passes that
+    moved a mark.
+    """
+    passes = 0
+    while True:
+        used = {}
+        addresses = list(known_addresses)
+        for i in range(0, len(addresses), chunk_size):
+            chunk = addresses[i:i + chunk_size]
+            results = rpc.batch(
+                [("getaddresstxids", [{"addresses": [a]}]) for a in chunk], raise_errors=False
+            )
+            for address, txids in zip(chunk, results):
+                if isinstance(txids, Exception) or not txids:
+                    continue
+                name, index = address_indexes.get(address, (None, None))
+                if name is not None:
+                    used[name] = max(used.get(name, -1), index)
+        moved = False
+        for name, highest in high_water.items():
+            index = used.get(name, -1)
+            if highest is None or index > highest:
+                mark_address_used(name, index)
+                moved = True
+        if not moved:
+            return passes
+        passes += 1
+
+# ─── ✉️ Payload Delivery ───────────────────────────────────────────────────────
+
+def scan_new_payload(ipfs_hash, raise_unavailable=False):
+    """
+    Scan a payload unless it was already scanned against every current key.
+    Returns (messages, record): only messages that haven't been delivered
+    from this CID before, and a callable that marks the CID scanned (None
+    if there is nothing to mark). Call `record` only once the messages
+    are delivered, see `deliver_payload`.
+    """
+    index = get_scan_index()
+    fingerprints = key_fingerprints(known_addresses)
+    if index.lookup(ipfs_hash, fingerprints) is not None:
+        debug_log(f"Skipping already scanned payload {ipfs_hash}")
+        return [], None
+    try:
+        scan = shard_pool.scan_payload if shard_pool is not None else scan_payload
+        with SCAN_PAYLOAD_SECONDS.time():
+            decrypted_messages = scan(ipfs_hash, raise_unavailable=True)
+    except PayloadUnavailable:
+        # Never record a payload we couldn't fetch
+        if raise_unavailable:
+            raise
+        return [], None
+    ids = [message_id(msg) for msg in decrypted_messages]
+    # A rescan after adding keys must not re-deliver what we already have
+    previous = set(index.message_ids(ipfs_hash))
+    new_messages = [msg for msg, mid in zip(decrypted_messages, ids) if mid not in previous]
+    return new_messages, lambda: index.record(ipfs_hash, fingerprints, ids)
+
+def deliver_payload(ipfs_hash, txid, scanned):
+    """
+    Deliver a `scan_new_payload` result, then record the CID as scanned.
+    If delivery raises, nothing is recorded and a later scan delivers again.
+    """
+    messages, record = scanned
+    handle_payload_messages(ipfs_hash, txid, messages)
+    if record is not None:
+        record()
+
+def handle_payload_messages(ipfs_hash, txid, decrypted_messages):
+    """Route decrypted messages from a payload to contacts or the inbox."""
+    contact_requests = []
+    regular_messages = []
+
+    # Separate contact requests from regular messages
+    for msg in decrypted_messages:
+        # Get the content either directly or from content field
+        content = msg.get("content", {})
+        raw_content = msg.get("raw", {})
+
+        # Try to parse JSON content if it's a string (might be a serialized contact request)
+        if isinstance(content, str):
+            try:
+                parsed_content = json.loads(content)
+                if isinstance(parsed_content, dict) and parsed_content.get("type") == "contact_request":
+                    # It's a contact request in JSON string format
+                    daemon_log("info", f"Found contact request in JSON string format")
+                    contact_requests.append({"content": parsed_content, "from": parsed_content.get("from")})
+                    continue
+            except json.JSONDecodeError:
+                # Not JSON, treat as regular message
+                pass
+
+        # Check standard contact request format
+        if isinstance(content, dict) and content.get("type") == "contact_request":
+            contact_requests.append(msg)
+            daemon_log("info", f"📇 Received contact request from {content.get('from')}", details={
+                "from": content.get("from"),
+                "name": content.get("name", "Unnamed"),
+                "time": content.get("timestamp")
+            })
+        # Also check in raw field if available
+        elif isinstance(raw_content, dict) and raw_content.get("type") == "contact_request":
+            contact_requests.append({"content": raw_content, "from": raw_content.get("from")})
+            daemon_log("info", f"📇 Received contact request from {raw_content.get('from')} (in raw field)")
+        # Also check if subject is a contact request indicator
+        elif (isinstance(content, dict) and 
+              content.get("subject", "").lower() == "contact request" and 
+              content.get("from") is not None):
+            try:
+                # Try to extract contact request data
+                contact_data = content.get("content", "{}")
+                if isinstance(contact_data, str):
+                    contact_data = json.loads(contact_data)
+
+                if isinstance(contact_data, dict) and "from" in contact_data:
+                    contact_requests.append({"content": contact_data, "from": contact_data.get("from")})
+                    daemon_log("info", f"📇 Detected contact request by subject from {contact_data.get('from')}")
+                else:
+                    # Use message data as contact request
+                    contact_requests.append({"content": {
+                        "type": "contact_request",
+                        "from": content.get("from"),
+                        "name": content.get("from"),  # Use address as name if not provided
+                        "timestamp": content.get("timestamp", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+                    }, "from": content.get("from")})
+                    daemon_log("info", f"📇 Created contact request from message with Contact Request subject")
+            except Exception as e:
+                daemon_log("warning", f"Failed to process potential contact request: {e}")
+        else:
+            regular_messages.append(msg)
+
+    # Add verbose debugging for contact request detection
+    if decrypted_messages and not contact_requests and not regular_messages:
+        daemon_log("debug", f"Messages found but none classified as contact request or regular message")
+        # Log first message structure for debugging
+        if decrypted_messages:
+            first_msg = decrypted_messages[0]
+            daemon_log("debug", f"First message structure: {json.dumps(first_msg, default=str)}")
+
+    # Process contact requests with EVRMailDaemon
+    if contact_requests:
+        daemon = EVRMailDaemon()
+        for request in contact_requests:
+            daemon_log("info", f"Processing contact request from {request.get('from')}")
+            daemon.process_contact_request(request.get("content"))
+
+    # Save regular messages to inbox
+    if regular_messages:
+        inbox = load_inbox()
+        inbox.extend(regular_messages)
+        save_inbox(inbox)
+        daemon_log("info", f"✉️ Saved {len(regular_messages)} new messages to inbox.", details={
+            "message_count": len(regular_messages),
+            "ipfs_cid": ipfs_hash,
+            "message_subjects": [msg.get("content", {}).get("subject", "No Subject") for msg in regular_messages[:3]]
+        })
+
+    if not decrypted_messages:
+        daemon_log("info", f"ℹ️ No messages for us in payload {ipfs_hash}", details={
+            "ipfs_cid": ipfs_hash,
+            "txid": txid
+        })
 
 # ─── 🧠 Transaction Handling ───────────────────────────────────────────────────
 
-def add_utxo(cache, address, utxo):
-    cache.setdefault(address, []).append(utxo)
+def candidate_outputs(tx, rematch=None):
+    """
+    Outputs that may concern us. Undecoded outputs go through the raw
+    hash160 prefilter first; for a TxView that runs on the script bytes
+    in the block buffer, and only hits are built into vout dicts.
 
-def process_transaction(tx, txid, utxo_cache, is_confirmed, debug_mode=False):
+    For a parallel/sharded summary, `rematch` is (watchlist it was matched
+    against, callable returning its TxView). If the watch set changes while
+    the summary is processed, the remaining outputs are matched afresh.
+    """
+    if isinstance(tx, TxView):
+        yield from _raw_candidates(tx)
+        return
+    last = -1
     for vout in tx.get("vout", []):
+        if rematch is not None and watchlist is not rematch[0]:
+            break
+        script = vout.get("scriptPubKey", {})
+        if "type" not in script:
+            hit, has_message = watchlist.match(bytes.fromhex(script.get("hex", "")))
+            if hit is None and not has_message:
+                continue
+        last = vout["n"]
+        yield vout
+    if rematch is not None and watchlist is not rematch[0]:
+        yield from _raw_candidates(rematch[1](), start=last + 1)
+
+def _raw_candidates(tx: TxView, start: int = 0):
+    for n in range(start, tx.output_count):
+        raw = tx.script(n)
+        # The watch set is looked up per output, the gap limit may grow it mid-transaction
+        hit, has_message = watchlist.match(raw)
+        if hit is not None or has_message:
+            yield {"value": tx.value(n), "n": n, "scriptPubKey": {"hex": raw.hex()}}
+
+def process_transaction(tx, txid, utxo_cache: UTXOSet, is_confirmed, debug_mode=False, height=None,
+                        rematch=None):
+    from evrmail.wallet.script import decode as decode_script
+    TRANSACTIONS.inc(pool=CONFIRMED if is_confirmed else MEMPOOL)
+    for vout in candidate_outputs(tx, rematch):
         script = vout.get("scriptPubKey", {})
         
+        # Prefilter hits still need their script decoded
+        if "type" not in script:
+            decoded = decode_script(script.get("hex"))
+            decoded["hex"] = script.get("hex")
+            script = decoded
+        
         # Only log in debug mode
         if debug_mode:
-            debug_log(f"Processing script in tx {txid}...", details={
+            debug_log("Processing script in tx %s...", txid, details=lambda: {
                 "txid": txid,
                 "vout_index": vout.get("n"),
                 "script_type": script.get("type"),
                 "addresses": script.get("addresses")
             })
-            debug_log(f"Script content: {script}")
+            debug_log("Script content: %s", script)
         
-        from evrmail.wallet.script import decode as decode_script
         # 📡 Always scan for IPFS message
-        decoded_script = decode_script(script.get('hex'))
+        decoded_script = script
         asset = decoded_script.get("asset", {})
         ipfs_hash = asset.get("message")
         
         # Debug logging only when needed
         if debug_mode:
-            debug_log(f"Decoded script: {decoded_script}")
-            debug_log(f"Asset info: {asset}")
-            debug_log(f"IPFS hash: {ipfs_hash}")
+            debug_log("Decoded script: %s", decoded_script)
+            debug_log("Asset info: %s", asset)
+            debug_log("IPFS hash: %s", ipfs_hash)
         
         if ipfs_hash:
-            chain_log("info", f"🛰 Detected IPFS CID in TX {txid}: {ipfs_hash}", details={
+            chain_log("info", "🛰 Detected IPFS CID in TX %s: %s", txid, ipfs_hash, details=lambda: {
                 "txid": txid,
                 "ipfs_cid": ipfs_hash,
                 "asset_name": asset.get("name"),
                 "explorer_link": f"https://explorer.evrmore.org/tx/{txid}"
             })
-            try:
-                # Get any decrypted messages from the payload
-                decrypted_messages = scan_payload(ipfs_hash)
-                
-                contact_requests = []
-                regular_messages = []
-                
-                # Separate contact requests from regular messages
-                for msg in decrypted_messages:
-                    # Get the content either directly or from content field
-                    content = msg.get("content", {})
-                    raw_content = msg.get("raw", {})
-                    
-                    # Try to parse JSON content if it's a string (might be a serialized contact request)
-                    if isinstance(content, str):
-                        try:
-                            parsed_content = json.loads(content)
-                            if isinstance(parsed_content, dict) and parsed_content.get("type") == "contact_request":
-                                # It's a contact request in JSON string format
-                                daemon_log("info", f"Found contact request in JSON string format")
-                                contact_requests.append({"content": parsed_content, "from": parsed_content.get("from")})
-                                continue
-                        except json.JSONDecodeError:
-                            # Not JSON, treat as regular message
-                            pass
-                    
-                    # Check standard contact request format
-                    if isinstance(content, dict) and content.get("type") == "contact_request":
-                        contact_requests.append(msg)
-                        daemon_log("info", f"📇 Received contact request from {content.get('from')}", details={
-                            "from": content.get("from"),
-                            "name": content.get("name", "Unnamed"),
-                            "time": content.get("timestamp")
-                        })
-                    # Also check in raw field if available
-                    elif isinstance(raw_content, dict) and raw_content.get("type") == "contact_request":
-                        contact_requests.append({"content": raw_content, "from": raw_content.get("from")})
-                        daemon_log("info", f"📇 Received contact request from {raw_content.get('from')} (in raw field)")
-                    # Also check if subject is a contact request indicator
-                    elif (isinstance(content, dict) and 
-                          content.get("subject", "").lower() == "contact request" and 
-                          content.get("from") is not None):
-                        try:
-                            # Try to extract contact request data
-                            contact_data = content.get("content", "{}")
-                            if isinstance(contact_data, str):
-                                contact_data = json.loads(contact_data)
-                            
-                            if isinstance(contact_data, dict) and "from" in contact_data:
-                                contact_requests.append({"content": contact_data, "from": contact_data.get("from")})
-                                daemon_log("info", f"📇 Detected contact request by subject from {contact_data.get('from')}")
-                            else:
-                                # Use message data as contact request
-                                contact_requests.append({"content": {
-                                    "type": "contact_request",
-                                    "from": content.get("from"),
-                                    "name": content.get("from"),  # Use address as name if not provided
-                                    "timestamp": content.get("timestamp", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
-                                }, "from": content.get("from")})
-                                daemon_log("info", f"📇 Created contact request from message with Contact Request subject")
-                        except Exception as e:
-                            daemon_log("warning", f"Failed to process potential contact request: {e}")
-                    else:
-                        regular_messages.append(msg)
-                
-                # Add verbose debugging for contact request detection
-                if decrypted_messages and not contact_requests and not regular_messages:
-                    daemon_log("debug", f"Messages found but none classified as contact request or regular message")
-                    # Log first message structure for debugging
-                    if decrypted_messages:
-                        first_msg = decrypted_messages[0]
-                        daemon_log("debug", f"First message structure: {json.dumps(first_msg, default=str)}")
-                
-                # Process contact requests with EVRMailDaemon
-                if contact_requests:
-                    daemon = EVRMailDaemon()
-                    for request in contact_requests:
-                        daemon_log("info", f"Processing contact request from {request.get('from')}")
-                        daemon.process_contact_request(request.get("content"))
-                
-                # Save regular messages to inbox
-                if regular_messages:
-                    inbox = load_inbox()
-                    inbox.extend(regular_messages)
-                    save_inbox(inbox)
-                    daemon_log("info", f"✉️ Saved {len(regular_messages)} new messages to inbox.", details={
-                        "message_count": len(regular_messages),
-                        "ipfs_cid": ipfs_hash,
-                        "message_subjects": [msg.get("content", {}).get("subject", "No Subject") for msg in regular_messages[:3]]
-                    })
-                
-                if not decrypted_messages:
-                    daemon_log("info", f"ℹ️ No messages for us in payload {ipfs_hash}", details={
+            if ipfs_workers is not None:
+                # Fetch and decrypt off the ZMQ thread
+                ipfs_workers.submit(ipfs_hash, txid)
+            else:
+                try:
+                    deliver_payload(ipfs_hash, txid, scan_new_payload(ipfs_hash))
+                except Exception as e:
+                    daemon_log("error", f"⚠️ Failed to scan IPFS payload {ipfs_hash}: {e}", details={
                         "ipfs_cid": ipfs_hash,
+                        "error": str(e),
                         "txid": txid
                     })
-            except Exception as e:
-                daemon_log("error", f"⚠️ Failed to scan IPFS payload {ipfs_hash}: {e}", details={
-                    "ipfs_cid": ipfs_hash,
-                    "error": str(e),
-                    "txid": txid
-                })
 
         # 🔵 Normal UTXO tracking
         addresses = script.get("addresses", [])
@@ -282,15 +527,16 @@ def process_transaction(tx, txid, utxo_cache, is_confirmed, debug_mode=False):
             
         # Only log detailed information in debug mode
         if debug_mode:
-            debug_log(f"Transaction output details: {vout}")
+            debug_log("Transaction output details: %s", vout)
 
         # Add UTXO to appropriate cache
         if address and address in known_addresses:
+            note_address_activity(address)
             amount = vout.get("value") if asset_name is None else script.get("amount")
             
             # Log with detailed information
             if asset_name:
-                chain_log("info", f"Found {asset_name} for address {address} in tx {txid}", details={
+                chain_log("info", "Found %s for address %s in tx %s", asset_name, address, txid, details=lambda: {
                     "asset": asset_name,
                     "address": address,
                     "amount": amount * 1e8,
@@ -299,7 +545,7 @@ def process_transaction(tx, txid, utxo_cache, is_confirmed, debug_mode=False):
                     "explorer_link": f"https://explorer.evrmore.org/tx/{txid}"
                 })
             else:
-                chain_log("info", f"Found EVR for address {address} in tx {txid}", details={
+                chain_log("info", "Found EVR for address %s in tx %s", address, txid, details=lambda: {
                     "address": address,
                     "amount": amount * 1e8,
                     "txid": txid,
@@ -317,30 +563,162 @@ def process_transaction(tx, txid, utxo_cache, is_confirmed, debug_mode=False):
                 "script": script_hex,
                 "address": address
             }
-            pool = "confirmed" if is_confirmed else "mempool"
-            add_utxo(utxo_cache[pool], address, utxo)
-
-def move_utxo_from_mempool_to_confirmed(txid, utxo_cache):
-    found = False
-    for address, utxos in list(utxo_cache["mempool"].items()):
-        new_utxos = []
-        for utxo in utxos:
-            if utxo["txid"] == txid:
-                utxo["confirmations"] = 1
-                add_utxo(utxo_cache["confirmed"], address, utxo)
-                found = True
-            else:
-                new_utxos.append(utxo)
-        if new_utxos:
-            utxo_cache["mempool"][address] = new_utxos
+            if is_confirmed and height is not None:
+                utxo["block_height"] = height
+            elif not is_confirmed:
+                utxo["first_seen"] = time.time()
+            utxo_cache.add(utxo, CONFIRMED if is_confirmed else MEMPOOL)
+
+def move_utxo_from_mempool_to_confirmed(txid, utxo_cache: UTXOSet, height=None):
+    return utxo_cache.confirm_tx(txid, height)
+
+def spent_outpoints(tx):
+    """(txid, vout) of every non-coinbase input; read straight from the buffer for a TxView."""
+    if isinstance(tx, TxView):
+        return list(tx.outpoints())
+    return [(vin["txid"], vin["vout"]) for vin in tx.get("vin", [])
+            if vin.get("txid") and vin.get("vout") is not None]
+
+def fetch_node_mempool():
+    """
+    The node's mempool txids when a reconcile is due, else None. Call this
+    before taking the UTXO lock so the RPC round trip doesn't hold it.
+    """
+    if mempool_tracker is None or not mempool_tracker.reconcile_due():
+        return None
+    try:
+        return set(rpc.getrawmempool())
+    except Exception as e:
+        network_log("warning", f"⚠️ Mempool reconciliation failed: {e}")
+        return None
+
+def evict_stale_mempool(utxo_cache: UTXOSet, node_txids=None):
+    """Expire old mempool txs and reconcile against `node_txids` from `fetch_node_mempool`."""
+    if mempool_tracker is None:
+        return 0
+    evicted = mempool_tracker.expire(utxo_cache)
+    if node_txids is not None:
+        evicted += mempool_tracker.reconcile(node_txids, utxo_cache)
+    if evicted:
+        chain_log("info", f"🧹 Evicted {evicted} stale mempool transactions", details=mempool_tracker.metrics())
+    return evicted
+
+def archive_spent_utxos(utxo_cache: UTXOSet, tip_height):
+    """Move outputs spent deeper than `utxo_archive_depth` into the history store."""
+    # Never archive inside the checkpoint window, a reorg may still unspend them
+    depth = max(int(config.get("utxo_archive_depth", DEFAULT_ARCHIVE_DEPTH)),
+                int(config.get("sync_checkpoint_window", 100)))
+    archived = compact(utxo_cache, get_utxo_history(), tip_height, depth)
+    if archived:
+        wallet_log("info", f"🗃 Archived {archived} spent UTXOs", details={
+            "archived": archived,
+            "tip_height": tip_height,
+            "depth": depth,
+            "live_utxos": len(utxo_cache)
+        })
+    return archived
+
+# ─── 📦 Block Handling ─────────────────────────────────────────────────────────
+
+def ingest_block(block: BlockView, utxo_cache: UTXOSet, processed_txids, height=None,
+                 ingestor=None, debug_mode=False):
+    """Apply a block's transactions in order. Returns how many were new to us."""
+    with BLOCK_SECONDS.time():
+        processed_tx_count = _ingest_block(block, utxo_cache, processed_txids, height, ingestor, debug_mode)
+    BLOCKS.inc()
+    return processed_tx_count
+
+def block_transactions(block: BlockView, ingestor=None):
+    """
+    (tx, rematch) for `block`'s transactions, in order. With an ingestor
+    these are its summaries until the watch set changes (the gap limit
+    derives addresses mid-block). After that, the rest of the block is
+    matched sequentially on its own TxViews, exactly as without one.
+    `rematch` is what process_transaction needs for a change in the middle
+    of a summary.
+    """
+    if ingestor is None or not ingestor.wants(block):
+        for tx in block:
+            yield tx, None
+        return
+    matched_with = watchlist
+    for i, summary in enumerate(ingestor.classify(block, matched_with)):
+        if watchlist is not matched_with:
+            for tx in itertools.islice(block, i, None):
+                yield tx, None
+            return
+        yield summary, (matched_with, lambda i=i: next(itertools.islice(block, i, None)))
+
+def _ingest_block(block, utxo_cache, processed_txids, height, ingestor, debug_mode):
+    processed_tx_count = 0
+    for tx, rematch in block_transactions(block, ingestor):
+        txid = tx["txid"]
+
+        # Mempool txs double-spending this one's inputs can never confirm now
+        if mempool_tracker is not None:
+            mempool_tracker.confirm(txid, spent_outpoints(tx), utxo_cache)
+
+        moved = move_utxo_from_mempool_to_confirmed(txid, utxo_cache, height)
+        if moved:
+            stamp_spent_height(tx, utxo_cache, height)
         else:
-            del utxo_cache["mempool"][address]
-    return found
+            # Mark existing UTXOs as spent first
+            mark_utxos_as_spent(tx, txid, utxo_cache, height)
+            process_transaction(tx, txid, utxo_cache, is_confirmed=True, debug_mode=debug_mode, height=height,
+                                rematch=rematch)
+            processed_tx_count += 1
+
+        processed_txids.add(txid, height)
+
+    processed_txids.set_tip(height)
+    return processed_tx_count
+
+def catch_up(checkpoint: Checkpoint, utxo_cache: UTXOSet, processed_txids, ingestor=None, debug_mode=False):
+    """
+    Replay blocks the node has beyond `checkpoint`, rolling back first if
+    our tip was reorged out. Returns the number of blocks replayed, or None
+    when the fork is deeper than the checkpoint window.
+    """
+    ancestor = find_common_ancestor(rpc, checkpoint)
+    if ancestor is None:
+        return None
+    if ancestor < checkpoint.height:
+        removed, unspent = rollback_to(utxo_cache, ancestor)
+        chain_log("warning", f"🔀 Reorg detected, rolled back {checkpoint.height - ancestor} blocks to height {ancestor}", details={
+            "old_tip": checkpoint.hash,
+            "old_height": checkpoint.height,
+            "ancestor_height": ancestor,
+            "removed_utxos": removed,
+            "unspent_utxos": unspent
+        })
+        checkpoint.advance(ancestor, checkpoint.hash_at(ancestor))
+
+    tip = rpc.getblockcount()
+    for start in range(ancestor + 1, tip + 1, CATCH_UP_BATCH):
+        heights = range(start, min(start + CATCH_UP_BATCH, tip + 1))
+        hashes = rpc.batch([("getblockhash", [height]) for height in heights])
+        raw_blocks = rpc.batch([("getblock", [block_hash, 0]) for block_hash in hashes])
+        for height, block_hash, raw in zip(heights, hashes, raw_blocks):
+            block = BlockView(bytes.fromhex(raw))
+            ingest_block(block, utxo_cache, processed_txids, height, ingestor, debug_mode)
+            checkpoint.advance(height, block_hash)
+    if tip > ancestor:
+        chain_log("info", f"⏩ Caught up {tip - ancestor} blocks to height {tip}", details={
+            "from_height": ancestor,
+            "to_height": tip
+        })
+    return tip - ancestor
 
-def sync_utxos_from_node(rpc, known_addresses, log_callback):
+def sync_utxos_from_node(rpc, known_addresses, log_callback, utxo_set: UTXOSet = None, journal=None):
+    """
+    Rebuild the confirmed pool from the node's address index. With a
+    `journal`, the changes are recorded through it so they land in order
+    with what it already holds; otherwise they are saved straight to the store.
+    """
     log = log_callback
     log("🔄 Fetching full UTXO set from node...")
     address_list = list(known_addresses.keys())
+    started = time.perf_counter()
     
     # Stats for logging
     stats = {
@@ -348,190 +726,361 @@ def sync_utxos_from_node(rpc, known_addresses, log_callback):
         "total_asset_utxos": 0,
         "updated_utxos": 0,
         "new_utxos": 0,
+        "pruned_utxos": 0,
         "addresses_with_utxos": set(),
         "assets_found": set()
     }
 
-    # Ensure directory exists
-    UTXO_DIR.mkdir(parents=True, exist_ok=True)
+    # Load the existing UTXO set unless the caller shares one
+    if utxo_set is None:
+        utxo_set = load_utxo_set()
 
-    # Load existing UTXO file if it exists
-    confirmed_path = UTXO_DIR / "confirmed.json"
-    existing_confirmed = {}
-    if confirmed_path.exists():
-        existing_confirmed = json.loads(confirmed_path.read_text())
+    # Hash join on outpoint: every node UTXO is matched in O(1) and anything
+    # confirmed locally that the node no longer reports is pruned afterwards.
+    seen = set()
+    failed_addresses = set()
 
-    # Mark all existing UTXOs as spent initially
-    for addr, utxos in existing_confirmed.items():
-        for utxo in utxos:
-            utxo["spent"] = True
+    def merge(u, asset_name):
+        outpoint = (u["txid"], u["outputIndex"])
+        seen.add(outpoint)
+        confirmations = u.get("confirmations", 1)
+        if utxo_set.pool_of(*outpoint) == CONFIRMED:
+            existing = utxo_set.get(*outpoint)
+            if existing.get("spent") or existing.get("confirmations") != confirmations:
+                utxo_set.update(*outpoint, spent=False, confirmations=confirmations)
+                stats["updated_utxos"] += 1
+            return
+        utxo_set.add({
+            "txid": outpoint[0],
+            "vout": outpoint[1],
+            "amount": u.get("satoshis"),
+            "asset": asset_name,
+            "confirmations": confirmations,
+            "block_height": u.get("height"),
+            "spent": False,
+            "script": u.get("script"),
+            "address": u["address"]
+        }, CONFIRMED)
+        stats["new_utxos"] += 1
 
     # Fetch current node UTXOs
     for i in range(0, len(address_list), 100):
         chunk = address_list[i:i+100]
         try:
-            # 🟢 Normal EVR UTXOs
-            evr_utxos = rpc.getaddressutxos({"addresses": chunk})
+            # 🟢 Normal EVR and 🟠 asset UTXOs in one round trip
+            evr_utxos, asset_utxos = rpc.batch([
+                ("getaddressutxos", [{"addresses": chunk}]),
+                ("getaddressutxos", [{"addresses": chunk, "assetName": "*"}])
+            ])
             stats["total_evr_utxos"] += len(evr_utxos)
             
             for u in evr_utxos:
-                addr = u["address"]
-                txid = u["txid"]
-                vout = u["outputIndex"]
-                stats["addresses_with_utxos"].add(addr)
-
-                # Find the matching old UTXO or add new
-                found = False
-                for utxo in existing_confirmed.get(addr, []):
-                    if utxo["txid"] == txid and utxo["vout"] == vout:
-                        utxo["spent"] = False
-                        utxo["confirmations"] = u.get("confirmations", 1)
-                        found = True
-                        stats["updated_utxos"] += 1
-                        break
-                if not found:
-                    utxo = {
-                        "txid": txid,
-                        "vout": vout,
-                        "amount": u["satoshis"],
-                        "asset": None,
-                        "confirmations": u.get("confirmations", 1),
-                        "block_height": u.get("height"),
-                        "spent": False,
-                        "script": u.get("script"),
-                        "address": addr
-                    }
-                    existing_confirmed.setdefault(addr, []).append(utxo)
-                    stats["new_utxos"] += 1
-
-            # 🟠 Asset UTXOs
-            asset_utxos = rpc.getaddressutxos({"addresses": chunk, "assetName": "*"})
+                stats["addresses_with_utxos"].add(u["address"])
+                merge(u, None)
+
             stats["total_asset_utxos"] += len(asset_utxos)
             
             for u in asset_utxos:
-                addr = u["address"]
-                txid = u["txid"]
-                vout = u["outputIndex"]
                 asset_name = u.get("assetName")
-                stats["addresses_with_utxos"].add(addr)
+                stats["addresses_with_utxos"].add(u["address"])
                 if asset_name:
                     stats["assets_found"].add(asset_name)
-
-                found = False
-                for utxo in existing_confirmed.get(addr, []):
-                    if utxo["txid"] == txid and utxo["vout"] == vout:
-                        utxo["spent"] = False
-                        utxo["confirmations"] = u.get("confirmations", 1)
-                        found = True
-                        stats["updated_utxos"] += 1
-                        break
-                if not found:
-                    utxo = {
-                        "txid": txid,
-                        "vout": vout,
-                        "amount": u.get("satoshis"),
-                        "asset": asset_name,
-                        "confirmations": u.get("confirmations", 1),
-                        "block_height": u.get("height"),
-                        "spent": False,
-                        "script": u.get("script"),
-                        "address": addr
-                    }
-                    existing_confirmed.setdefault(addr, []).append(utxo)
-                    stats["new_utxos"] += 1
+                merge(u, asset_name)
 
         except Exception as e:
+            failed_addresses.update(chunk)
             log(f"⚠️ Failed to fetch UTXOs for chunk: {e}")
 
-    # Save updated
-    confirmed_path.write_text(json.dumps(existing_confirmed, indent=2))
+    # 🧹 Archive spent entries, leaving addresses we could not query untouched
+    pruned = [
+        dict(utxo, spent=True) for utxo in utxo_set.iter(CONFIRMED)
+        if (utxo["txid"], utxo["vout"]) not in seen and utxo.get("address") not in failed_addresses
+    ]
+    get_utxo_history().archive(pruned)
+    for utxo in pruned:
+        utxo_set.remove(utxo["txid"], utxo["vout"])
+    stats["pruned_utxos"] = len(pruned)
 
     # Reset mempool (optional depending if you want to do smarter merging there too)
-    mempool_path = UTXO_DIR / "mempool.json"
-    mempool_path.write_text("{}")
+    utxo_set.clear_pool(MEMPOOL)
+
+    # Save updated
+    if journal is not None:
+        journal.record(utxo_set)
+    else:
+        save_utxo_set(utxo_set)
+
+    # Sync timing, compared with the previous full sync
+    store = get_utxo_store()
+    sync_seconds = round(time.perf_counter() - started, 3)
+    SYNC_SECONDS.observe(sync_seconds)
+    previous_seconds = store.get_meta(LAST_SYNC_META_KEY)
+    store.set_meta(LAST_SYNC_META_KEY, str(sync_seconds))
 
     # Calculate totals for detailed logging
-    total_utxos = sum(len(v) for v in existing_confirmed.values())
-    active_addresses = len([a for a, utxos in existing_confirmed.items() if any(not u.get("spent", False) for u in utxos)])
+    total_utxos = utxo_set.count(CONFIRMED)
+    active_addresses = len({u.get("address") for u in utxo_set.iter(CONFIRMED, include_spent=False)})
     
     # Log detailed statistics
-    wallet_log("info", f"📊 Synced {total_utxos} UTXOs for {active_addresses} active addresses", details={
+    wallet_log("info", f"📊 Synced {total_utxos} UTXOs for {active_addresses} active addresses in {sync_seconds}s", details={
         "total_utxos": total_utxos,
         "active_addresses": active_addresses,
         "evr_utxos": stats["total_evr_utxos"],
         "asset_utxos": stats["total_asset_utxos"],
         "updated_utxos": stats["updated_utxos"],
         "new_utxos": stats["new_utxos"],
+        "pruned_utxos": stats["pruned_utxos"],
         "addresses_with_utxos": len(stats["addresses_with_utxos"]),
-        "assets_found": list(stats["assets_found"])
+        "assets_found": list(stats["assets_found"]),
+        "sync_seconds": sync_seconds,
+        "previous_sync_seconds": float(previous_seconds) if previous_seconds else None
     })
     
-    # Return a simple structure for backward compatibility
-    return {
-        "confirmed": existing_confirmed,
-        "mempool": {}
-    }
+    return utxo_set
+
+# ─── 📡 Live Notifications ─────────────────────────────────────────────────────
+#   What the rawtx / rawblock handlers do once a notification is decoded.
+#   Callers hold the UTXO lock.
+
+def apply_mempool_tx(tx, utxo_cache: UTXOSet, processed_txids, journal, debug_mode=False, rematch=None) -> bool:
+    """
+    Apply a new mempool transaction. Returns False if it was already
+    processed. `rematch` as for process_transaction, for a sharded summary.
+    """
+    txid = tx["txid"]
+    if txid in processed_txids:
+        return False
+    processed_txids.add(txid)
+    outpoints = spent_outpoints(tx)
+    replaced = mempool_tracker.replace_conflicts(txid, outpoints, utxo_cache)
+    mark_utxos_as_spent(tx, txid, utxo_cache)
+    process_transaction(tx, txid, utxo_cache, is_confirmed=False, debug_mode=debug_mode, rematch=rematch)
+    mempool_tracker.track(txid, outpoints, utxo_cache)
+    if replaced:
+        chain_log("info", f"♻️ {txid} replaced {replaced} mempool transactions", details={
+            "txid": txid,
+            "replaced": replaced
+        })
+    if journal.record(utxo_cache):
+        publish(UTXO, action="mempool", txid=txid)
+    return True
+
+def apply_block(block: BlockView, checkpoint: Checkpoint, utxo_cache: UTXOSet, processed_txids, journal,
+                ingestor=None, debug_mode=False, node_txids=None):
+    """
+    Apply a new tip block, catching up first if it doesn't extend `checkpoint`.
+    `node_txids` is a `fetch_node_mempool` result to reconcile against.
+    Returns (new tx count, checkpoint); the checkpoint is replaced after a full resync.
+    """
+    # Did the checkpoint cover the watched set before this block?
+    covered = checkpoint.addresses == addresses_digest(known_addresses)
+    if block.previous_block_hash == checkpoint.hash:
+        height = checkpoint.height + 1
+        processed_tx_count = ingest_block(block, utxo_cache, processed_txids, height, ingestor, debug_mode)
+        checkpoint.advance(height, rpc.getblockhash(height))
+    else:
+        # Missed blocks or a reorg: walk back to the common ancestor and replay
+        chain_log("warning", f"⚠️ Block {block.get('hash')} does not extend our tip {checkpoint.hash}, catching up...")
+        processed_tx_count = 0
+        if catch_up(checkpoint, utxo_cache, processed_txids, ingestor, debug_mode) is None:
+            tip = rpc.getblockcount()
+            checkpoint = Checkpoint(tip, rpc.getblockhash(tip), window=checkpoint.window,
+                                    addresses=checkpoint.addresses)
+            sync_utxos_from_node(rpc, known_addresses,
+                                 lambda msg: daemon_log("info", msg), utxo_set=utxo_cache, journal=journal)
+            covered = True
+
+    # Lookahead addresses derived on activity are covered from here on
+    if covered:
+        checkpoint.addresses = addresses_digest(known_addresses)
+    archive_spent_utxos(utxo_cache, checkpoint.height)
+    evict_stale_mempool(utxo_cache, node_txids)
+    if journal.record(utxo_cache, {CHECKPOINT_META_KEY: checkpoint.to_json()}):
+        publish(UTXO, action="block", height=checkpoint.height, block_hash=checkpoint.hash)
+    return processed_tx_count, checkpoint
 
 # ─── 🚀 Main Entry ─────────────────────────────────────────────────────────────
 
-def main(debug_mode=False):
-    """Main daemon entry point with optional debug mode"""
+def main(debug_mode=False, rescan=False):
+    """Main daemon entry point with optional debug mode and forced full rescan"""
+    global ipfs_workers, mempool_tracker, runtime, shard_pool
     # Configure logging
     log_level = logging.DEBUG if debug_mode else logging.INFO
     configure_logging(level=log_level)
     
     daemon_log("info", "📡 EvrMail Daemon starting...")
     reload_known_addresses()
+    # Wallet and address changes update the watch set incrementally from here on
+    subscribe(WALLET, on_wallet_event)
+    subscribe(ADDRESS, on_wallet_event)
+    try:
+        discover_used_addresses(rpc)
+    except Exception as e:
+        daemon_log("warning", f"⚠️ Gap-limit address discovery failed: {e}")
     wallet_log("info", f"🔑 Loaded {len(known_addresses)} known addresses.", details={
         "address_count": len(known_addresses),
         "addresses": list(known_addresses.keys())[:5] + (["..."] if len(known_addresses) > 5 else [])
     })
     
+    # Fork ingestion workers (or shards) before any daemon threads exist
+    shard_pool = shards_from_config(config)
+    if shard_pool is not None:
+        shard_pool.start()
+        shard_pool.sync_watchlist(watchlist)
+        daemon_log("info", f"🧩 Sharded mode: {shard_pool.count} shards", details=shard_pool.metrics())
+    ingestor = shard_pool or ingestor_from_config(config)
+    if ingestor is not None:
+        ingestor.start()
+    
     daemon_log("info", "🔄 Syncing UTXOs from node...")
-    utxo_data = sync_utxos_from_node(rpc_client, known_addresses, 
-                         lambda msg: daemon_log("info", msg))
+    processed_txids = load_processed_txids()
     
-    # Update the global utxo cache
+    # Replay any journaled deltas a previous run left behind
+    journal = journal_from_config(config, get_utxo_store(), processed_txids)
     utxo_cache = load_utxos()
-    utxo_cache.update(utxo_data)
+    replayed = journal.recover(utxo_cache)
+    if replayed:
+        daemon_log("info", f"📓 Recovered {replayed} journaled UTXO changes.")
     
-    processed_txids = load_processed_txids()
+    # Resume from the checkpoint unless a rescan is requested or the watched addresses changed
+    store = get_utxo_store()
+    digest = addresses_digest(known_addresses)
+    window = int(config.get("sync_checkpoint_window", 100))
+    checkpoint = None if rescan else load_checkpoint(store, window)
+    caught_up = None
+    if checkpoint is not None and checkpoint.addresses == digest:
+        daemon_log("info", f"📍 Resuming from block {checkpoint.height}...")
+        caught_up = catch_up(checkpoint, utxo_cache, processed_txids, ingestor, debug_mode)
+    
+    if caught_up is None:
+        # Full resync; blocks mined meanwhile are replayed on the next block
+        tip = rpc.getblockcount()
+        checkpoint = Checkpoint(tip, rpc.getblockhash(tip), window=window, addresses=digest)
+        utxo_cache = sync_utxos_from_node(rpc, known_addresses, 
+                             lambda msg: daemon_log("info", msg), utxo_set=utxo_cache, journal=journal)
+    archive_spent_utxos(utxo_cache, checkpoint.height)
     
-    total_utxos = sum(len(utxos) for utxos in utxo_cache["confirmed"].values()) + \
-                  sum(len(utxos) for utxos in utxo_cache["mempool"].values())
+    # Track what survived in the mempool pool so it can still expire
+    mempool_tracker = tracker_from_config(config)
+    mempool_tracker.load(utxo_cache)
+    evict_stale_mempool(utxo_cache, fetch_node_mempool())
+    journal.record(utxo_cache, {CHECKPOINT_META_KEY: checkpoint.to_json()})
+    
+    # Everything from here on runs as tasks on the runtime's event loop
+    runtime = runtime_from_config(config)
+    journal.start(thread=False)
+    runtime.periodic("persistence", journal.flush_interval, journal.tick)
+    
+    ipfs_workers = ipfs_pool_from_config(
+        config,
+        lambda cid: scan_new_payload(cid, raise_unavailable=True),
+        deliver_payload
+    )
+    runtime.task("ipfs", lambda: ipfs_workers.serve(runtime))
+    if ipfs_workers.pending():
+        daemon_log("info", f"🛰 Resuming {ipfs_workers.pending()} pending IPFS payloads.")
+    
+    total_utxos = len(utxo_cache)
     
     daemon_log("info", f"✅ Synced {total_utxos} total UTXOs (spent + unspent).", details={
-        "confirmed_utxos": sum(len(utxos) for utxos in utxo_cache["confirmed"].values()),
-        "mempool_utxos": sum(len(utxos) for utxos in utxo_cache["mempool"].values()),
+        "confirmed_utxos": utxo_cache.count(CONFIRMED),
+        "mempool_utxos": utxo_cache.count(MEMPOOL),
         "processed_txids": len(processed_txids)
     })
 
-    @zmq_client.on(ZMQTopic.RAW_TX)
+    # ZMQ handlers and gap recovery both mutate the UTXO cache
+    utxo_lock = threading.RLock()
+    sequences = SequenceTracker()
+
+    def apply_tx(tx, rematch=None):
+        return apply_mempool_tx(tx, utxo_cache, processed_txids, journal, debug_mode, rematch)
+
+    def recover_blocks():
+        """Replay blocks missed while notifications were being dropped."""
+        nonlocal checkpoint
+        with utxo_lock:
+            replayed = catch_up(checkpoint, utxo_cache, processed_txids, ingestor, debug_mode)
+            if replayed is None:
+                tip = rpc.getblockcount()
+                checkpoint = Checkpoint(tip, rpc.getblockhash(tip), window=checkpoint.window,
+                                        addresses=checkpoint.addresses)
+                sync_utxos_from_node(rpc, known_addresses,
+                                     lambda msg: daemon_log("info", msg), utxo_set=utxo_cache,
+                                     journal=journal)
+            archive_spent_utxos(utxo_cache, checkpoint.height)
+            if journal.record(utxo_cache, {CHECKPOINT_META_KEY: checkpoint.to_json()}):
+                publish(UTXO, action="block", height=checkpoint.height, block_hash=checkpoint.hash)
+        chain_log("info", f"🩹 Recovered missed blocks up to {checkpoint.height}", details={
+            "replayed": replayed,
+            "height": checkpoint.height
+        })
+
+    def recover_mempool():
+        """Fetch mempool txs we never heard about, then reconcile evictions."""
+        # RPC round trips happen outside the lock so the listener keeps going
+        node_txids = set(rpc.getrawmempool())
+        missing = [txid for txid in node_txids if txid not in processed_txids]
+        raw_txs = []
+        for i in range(0, len(missing), CATCH_UP_BATCH):
+            chunk = missing[i:i + CATCH_UP_BATCH]
+            raw_txs.extend(rpc.batch([("getrawtransaction", [txid]) for txid in chunk], raise_errors=False))
+        applied = 0
+        with utxo_lock:
+            for raw in raw_txs:
+                if isinstance(raw, Exception):
+                    continue   # confirmed or evicted since getrawmempool
+                applied += apply_tx(TxView.from_bytes(bytes.fromhex(raw)))
+            evicted = mempool_tracker.reconcile(node_txids, utxo_cache)
+            if journal.record(utxo_cache):
+                publish(UTXO, action="mempool")
+        chain_log("info", f"🩹 Recovered {applied} missed mempool transactions", details={
+            "missing": len(missing),
+            "applied": applied,
+            "evicted": evicted
+        })
+
+    gap_recovery = GapRecovery(recover_blocks, recover_mempool,
+                               wake=lambda: runtime.notify("gap-recovery"))
+    runtime.signalled("gap-recovery", gap_recovery.run_pending)
+
+    def check_sequence(notification, blocks):
+        missed = sequences.observe(notification.topic, getattr(notification, "sequence", None))
+        if missed:
+            network_log("warning", f"⚠️ Missed {missed} {notification.topic} notifications, recovering...", details={
+                "topic": notification.topic,
+                "missed": missed,
+                "sequence": notification.sequence
+            })
+            gap_recovery.request(blocks=blocks, mempool=True)
+
     def on_raw_tx(notification):
-        from evrmail.wallet.tx import decode_transaction
-        tx = decode_transaction(notification.hex)
+        check_sequence(notification, blocks=False)
+        ZMQ_NOTIFICATIONS.inc(topic="rawtx")
+        with DECODE_SECONDS.time():
+            tx = TxView.from_bytes(notification.body)
+        rematch = None
+        if shard_pool is not None:
+            view, matched_with = tx, watchlist
+            tx = shard_pool.classify_tx(view, matched_with)
+            rematch = (matched_with, lambda: view)
         txid = tx["txid"]
 
-        if txid not in processed_txids:
-            processed_txids.append(txid)
-            mark_utxos_as_spent(tx, txid, utxo_cache)
-            process_transaction(tx, txid, utxo_cache, is_confirmed=False, debug_mode=debug_mode)
-            save_utxos(utxo_cache)
-            save_processed_txids(processed_txids)
-            chain_log("info", f"💬 Mempool TX: {txid}", details={
-                "txid": txid,
-                "vins": len(tx.get("vin", [])),
-                "vouts": len(tx.get("vout", [])),
-                "explorer_link": f"https://explorer.evrmore.org/tx/{txid}"
-            })
+        with utxo_lock:
+            if not apply_tx(tx, rematch):
+                return
+        chain_log("info", "💬 Mempool TX: %s", txid, details=lambda: {
+            "txid": txid,
+            "vins": tx.input_count if isinstance(tx, TxView) else len(tx.get("vin", [])),
+            "vouts": tx.output_count if isinstance(tx, TxView) else len(tx.get("vout", [])),
+            "explorer_link": f"https://explorer.evrmore.org/tx/{txid}"
+        })
 
-    @zmq_client.on(ZMQTopic.RAW_BLOCK)
     def on_raw_block(notification):
-        from evrmail.wallet.block import decode as decode_block
-        from evrmail.wallet.tx import decode_transaction
-
-        block = decode_block(notification.hex)
-        tx_count = len(block['tx'])
+        nonlocal checkpoint
+        check_sequence(notification, blocks=True)
+        ZMQ_NOTIFICATIONS.inc(topic="rawblock")
+        block = BlockView(notification.body)
+        tx_count = block.tx_count
         
         chain_log("info", f"📦 Received block with {tx_count} transactions", details={
             "block_hash": block.get("hash"),
@@ -541,23 +1090,10 @@ def main(debug_mode=False):
             "explorer_link": f"https://explorer.evrmore.org/block/{block.get('hash')}"
         })
         
-        processed_tx_count = 0
-        for tx_hex in block["tx"]:
-            tx = decode_transaction(tx_hex)
-            txid = tx["txid"]
-
-            moved = move_utxo_from_mempool_to_confirmed(txid, utxo_cache)
-            if not moved:
-                # Mark existing UTXOs as spent first
-                mark_utxos_as_spent(tx, txid, utxo_cache)
-                process_transaction(tx, txid, utxo_cache, is_confirmed=True, debug_mode=debug_mode)
-                processed_tx_count += 1
-
-            if txid not in processed_txids:
-                processed_txids.append(txid)
-
-        save_utxos(utxo_cache)
-        save_processed_txids(processed_txids)
+        node_txids = fetch_node_mempool()
+        with utxo_lock:
+            processed_tx_count, checkpoint = apply_block(block, checkpoint, utxo_cache, processed_txids,
+                                                         journal, ingestor, debug_mode, node_txids)
         chain_log("info", f"📦 Processed {processed_tx_count} new transactions in block", details={
             "block_hash": block.get("hash"),
             "tx_count": tx_count,
@@ -565,30 +1101,75 @@ def main(debug_mode=False):
             "total_processed_txids": len(processed_txids)
         })
 
-    network_log("info", "🌐 Starting ZMQ client...", details={
-        "zmq_topics": ["rawtx", "rawblock"],
-        "endpoint": f"tcp://{config['rpc_host'].split('tcp://')[1]}:28332"
-    })
-    zmq_client.start()
-    daemon_log("info", "👁️ Starting UTXO monitoring...")
-    monitor_confirmed_utxos_realtime()
+    def expire_mempool():
+        node_txids = fetch_node_mempool()
+        with utxo_lock:
+            if evict_stale_mempool(utxo_cache, node_txids) and journal.record(utxo_cache):
+                publish(UTXO, action="mempool")
 
-    daemon_log("info", "✅ Daemon listening for transactions and blocks.", details={
-        "total_utxos": total_utxos,
-        "known_addresses": len(known_addresses),
-        "processed_txids": len(processed_txids)
-    })
+    # Processing tasks, in order per topic; handlers run in the executor
+    runtime.consumer("rawtx", on_raw_tx)
+    runtime.consumer("rawblock", on_raw_block)
+    runtime.periodic("mempool-expiry", min(60.0, mempool_tracker.reconcile_interval), expire_mempool)
+    daemon_log("info", "👁️ Starting wallet monitoring...")
+    runtime.periodic("wallet-watch", 2.0, WalletDirWatcher().poll)
+
+    # ZMQ's receive thread only queues notifications for the consumers above.
+    # A full queue blocks it, and drops past the node's high-water mark show
+    # up as sequence gaps.
+    zmq_client.on(ZMQTopic.RAW_TX)(lambda notification: runtime.feed("rawtx", notification))
+    zmq_client.on(ZMQTopic.RAW_BLOCK)(lambda notification: runtime.feed("rawblock", notification))
+
+    async def zmq_intake():
+        network_log("info", "🌐 Starting ZMQ client...", details={
+            "zmq_topics": ["rawtx", "rawblock"],
+            "endpoint": f"tcp://{config['rpc_host'].split('tcp://')[1]}:28332"
+        })
+        await runtime.run_blocking(zmq_client.start)
+        daemon_log("info", "✅ Daemon listening for transactions and blocks.", details={
+            "total_utxos": total_utxos,
+            "known_addresses": len(known_addresses),
+            "processed_txids": len(processed_txids)
+        })
+        try:
+            await asyncio.Event().wait()    # park until shutdown cancels us
+        finally:
+            await runtime.run_blocking(zmq_client.stop_sync)
+
+    endpoint = metrics_endpoint(config)
+    if endpoint is not None:
+        install_collector(utxo_cache, journal, runtime, ipfs_workers, components={
+            "runtime": runtime.stats,
+            "mempool": mempool_tracker.metrics,
+            "zmq_sequence": sequences.stats,
+            "gap_recovery": gap_recovery.stats,
+            "rpc_batches": lambda: {"batches": rpc.batches},
+            "shards": shard_pool.metrics if shard_pool is not None else {},
+        })
+        runtime.task("metrics", lambda: serve_metrics(*endpoint))
+
+    # Registered last so shutdown cancels intake before the consumers
+    runtime.task("zmq", zmq_intake)
+
+    runtime.on_shutdown("ipfs", ipfs_workers.stop)
+    if ingestor is not None:
+        runtime.on_shutdown("ingestor", ingestor.close)
+    runtime.on_shutdown("journal", journal.stop)
+    runtime.on_shutdown("rpc", rpc_client.close_sync)
 
     try:
-        while True:
-            time.sleep(10)
-    except KeyboardInterrupt:
-        daemon_log("info", "🛑 Shutting down.")
+        runtime.run()
     finally:
-        zmq_client.stop_sync()
-        rpc_client.close_sync()
+        daemon_log("info", "🛑 Shutting down.")
+        runtime = None
+        shard_pool = None
 
 # ─── 🚀 Entrypoint ─────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="EvrMail daemon")
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--rescan", action="store_true", help="Ignore the sync checkpoint and resync all UTXOs from the node")
+    args = parser.parse_args()
+    main(debug_mode=args.debug, rescan=args.rescan)
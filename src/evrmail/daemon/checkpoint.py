@@ -0,0 +1,116 @@
+# ─── 📍 EvrMail Sync Checkpoint ───────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Remembers the last block the daemon fully processed, plus a window of
+#   recent block hashes. On startup the daemon replays only the blocks it
+#   missed. If the node's chain no longer contains our tip, it walks back
+#   through the window to the common ancestor, rolls the UTXO set back to it
+#   and replays the new branch. Without a usable checkpoint it falls back to
+#   the full `sync_utxos_from_node` rescan.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+from evrmail.daemon.utxo_set import UTXOSet, CONFIRMED
+
+CHECKPOINT_META_KEY = "checkpoint"
+DEFAULT_WINDOW = 100
+
+# ─── 🧠 Checkpoint ────────────────────────────────────────────────────────────
+
+class Checkpoint:
+    """Tip height/hash with the hashes of the last `window` blocks."""
+
+    def __init__(self, height: int, block_hash: str, recent: List[Tuple[int, str]] = None,
+                 window: int = DEFAULT_WINDOW, addresses: str = None):
+        self.height = height
+        self.hash = block_hash
+        self.window = window
+        self.addresses = addresses     # digest of the watched address set
+        self.recent: List[Tuple[int, str]] = list(recent or [(height, block_hash)])
+
+    def advance(self, height: int, block_hash: str):
+        """Move the tip forward, dropping anything above `height` first."""
+        self.recent = [(h, bh) for h, bh in self.recent if h < height]
+        self.recent.append((height, block_hash))
+        del self.recent[:-self.window]
+        self.height, self.hash = height, block_hash
+
+    def hash_at(self, height: int) -> Optional[str]:
+        for h, block_hash in self.recent:
+            if h == height:
+                return block_hash
+        return None
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "height": self.height, "hash": self.hash,
+            "recent": self.recent, "addresses": self.addresses
+        })
+
+    @classmethod
+    def from_json(cls, data: str, window: int = DEFAULT_WINDOW) -> "Checkpoint":
+        raw = json.loads(data)
+        return cls(raw["height"], raw["hash"], [tuple(r) for r in raw.get("recent", [])],
+                   window, raw.get("addresses"))
+
+def addresses_digest(addresses) -> str:
+    """Fingerprint of a watched address set; a change means history must be resynced."""
+    return hashlib.sha256("\n".join(sorted(addresses)).encode()).hexdigest()
+
+# ─── 💾 Persistence ───────────────────────────────────────────────────────────
+
+def load_checkpoint(store, window: int = DEFAULT_WINDOW) -> Optional[Checkpoint]:
+    data = store.get_meta(CHECKPOINT_META_KEY)
+    if not data:
+        return None
+    try:
+        return Checkpoint.from_json(data, window)
+    except (ValueError, KeyError):
+        return None
+
+def save_checkpoint(store, checkpoint: Checkpoint):
+    store.set_meta(CHECKPOINT_META_KEY, checkpoint.to_json())
+
+# ─── 🔀 Reorg Handling ────────────────────────────────────────────────────────
+
+def find_common_ancestor(rpc, checkpoint: Checkpoint) -> Optional[int]:
+    """
+    Highest height in the checkpoint window that is still on the node's
+    best chain, or None if the fork is deeper than the window. `rpc` is an
+    RPCFacade; the window's hashes are fetched in one batch.
+    """
+    node_height = rpc.getblockcount()
+    window = [(h, bh) for h, bh in sorted(checkpoint.recent, reverse=True) if h <= node_height]
+    node_hashes = rpc.batch([("getblockhash", [h]) for h, _ in window])
+    for (height, block_hash), node_hash in zip(window, node_hashes):
+        if node_hash == block_hash:
+            return height
+    return None
+
+def rollback_to(utxo_set: UTXOSet, height: int) -> Tuple[int, int]:
+    """
+    Undo confirmed state above `height`: drop outputs created in orphaned
+    blocks and unspend outputs spent there. Returns (removed, unspent).
+    """
+    removed = unspent = 0
+    for utxo in list(utxo_set.iter(CONFIRMED)):
+        if (utxo.get("block_height") or 0) > height:
+            utxo_set.remove(utxo["txid"], utxo["vout"])
+            removed += 1
+        elif utxo.get("spent") and (utxo.get("spent_height") or 0) > height:
+            utxo_set.update(utxo["txid"], utxo["vout"], spent=False, spent_height=None)
+            unspent += 1
+    return removed, unspent
+
+__all__ = [
+    "Checkpoint",
+    "load_checkpoint",
+    "save_checkpoint",
+    "find_common_ancestor",
+    "rollback_to",
+    "addresses_digest",
+    "CHECKPOINT_META_KEY",
+]
@@ -0,0 +1,346 @@
+# ─── 🛰 EvrMail IPFS Worker Pool ──────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Moves IPFS payload fetching and decryption off the ZMQ callbacks. CIDs
+#   found in transactions are submitted to a persisted pending set; a
+#   scheduler feeds due jobs into a bounded queue drained by a pool of fetch
+#   workers, and a single delivery thread hands decrypted messages to the
+#   inbox writer. CIDs that are not yet retrievable are retried with
+#   exponential backoff. The pending set is written to disk by the
+#   scheduler, never by `submit()`, so callers holding the daemon's UTXO
+#   lock don't wait on a file rewrite. Under the daemon runtime, `serve()`
+#   runs the same scheduler, fetchers and delivery as asyncio tasks
+#   instead of threads.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from evrmail.daemon import STORAGE_DIR
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+IPFS_QUEUE_FILE = STORAGE_DIR / "ipfs_queue.json"
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_RETRY_BASE = 5.0
+DEFAULT_RETRY_MAX = 600.0
+
+# ─── 🧠 Worker Pool ────────────────────────────────────────────────────────────
+
+class IPFSWorkerPool:
+    """
+    Bounded fetch/decrypt pool.
+
+    `fetch(cid)` returns the scan result for a CID (decrypted messages) and
+    raises to ask for a retry. `deliver(cid, txid, result)` runs on one
+    thread, in completion order.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], List[dict]],
+        deliver: Callable[[str, Optional[str], List[dict]], None],
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        path: Path = IPFS_QUEUE_FILE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_base: float = DEFAULT_RETRY_BASE,
+        retry_max: float = DEFAULT_RETRY_MAX,
+    ):
+        self.fetch = fetch
+        self.deliver = deliver
+        self.workers = max(1, workers)
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        self._jobs: Dict[str, dict] = {}     # cid -> job, persisted until delivered
+        self._dirty = False                  # jobs changed since the queue file was written
+        self._active: set = set()            # cids queued or being fetched
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._results: queue.Queue = queue.Queue()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._notify: Optional[Callable[[], None]] = None       # wakes serve()'s scheduler
+        self._depths: Optional[Callable[[], tuple]] = None      # serve()'s queue depths
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "retries": 0,
+            "failed": 0,
+            "backpressure_waits": 0,
+            "max_queue_depth": 0,
+        }
+        self._load()
+
+    # ─── Persistence ───
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            jobs = json.loads(self.path.read_text())
+        except (json.JSONDecodeError, OSError):
+            return
+        for job in jobs:
+            if isinstance(job, dict) and job.get("cid"):
+                self._jobs[job["cid"]] = job
+
+    def _persist(self):
+        with self._io_lock:
+            with self._lock:
+                jobs = list(self._jobs.values())
+                self._dirty = False
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(jobs))
+            os.replace(tmp, self.path)
+
+    def flush(self):
+        """Write the queue file if the pending set changed since the last write."""
+        if self._dirty:
+            self._persist()
+
+    # ─── Submission ───
+
+    def submit(self, cid: str, txid: str = None) -> bool:
+        """Queue `cid` for fetching. Never blocks; returns False if already pending."""
+        with self._lock:
+            if cid in self._jobs:
+                return False
+            self._jobs[cid] = {"cid": cid, "txid": txid, "attempts": 0, "next_attempt": 0}
+            self._dirty = True
+        self.stats["submitted"] += 1
+        self._wake.set()
+        if self._notify is not None:
+            self._notify()
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def metrics(self) -> dict:
+        """Counters plus current queue depth and in-flight work."""
+        with self._lock:
+            pending, active = len(self._jobs), len(self._active)
+        queue_depth, delivery_backlog = (
+            self._depths() if self._depths else (self._queue.qsize(), self._results.qsize())
+        )
+        return {
+            **self.stats,
+            "pending": pending,
+            "in_flight": active,
+            "queue_depth": queue_depth,
+            "delivery_backlog": delivery_backlog,
+        }
+
+    # ─── Threads ───
+
+    def _due(self) -> List[dict]:
+        now = time.time()
+        with self._lock:
+            due = [job for cid, job in self._jobs.items()
+                   if cid not in self._active and job["next_attempt"] <= now]
+        return sorted(due, key=lambda j: j["next_attempt"])
+
+    def _activate(self, job: dict, depth: int):
+        with self._lock:
+            self._active.add(job["cid"])
+        if depth > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = depth
+
+    def _schedule(self):
+        while not self._stop.is_set():
+            self._wake.wait(1.0)
+            self._wake.clear()
+            self.flush()
+            for job in self._due():
+                try:
+                    self._queue.put(job, timeout=0.5)
+                except queue.Full:
+                    # Workers are saturated; leave the rest pending for the next pass
+                    self.stats["backpressure_waits"] += 1
+                    break
+                self._activate(job, self._queue.qsize())
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                messages = self.fetch(job["cid"])
+            except Exception as e:
+                self._retry(job, e)
+            else:
+                self._results.put((job, messages))
+            finally:
+                self._queue.task_done()
+
+    def _retry(self, job: dict, error: Exception):
+        from evrmail.utils import daemon as daemon_log
+        job["attempts"] += 1
+        if job["attempts"] >= self.max_attempts:
+            self.stats["failed"] += 1
+            daemon_log("error", f"⚠️ Giving up on IPFS payload {job['cid']}: {error}", details={
+                "ipfs_cid": job["cid"],
+                "txid": job.get("txid"),
+                "attempts": job["attempts"]
+            })
+            self._finish(job)
+            return
+        delay = min(self.retry_max, self.retry_base * (2 ** (job["attempts"] - 1)))
+        job["next_attempt"] = time.time() + delay
+        self.stats["retries"] += 1
+        daemon_log("info", f"⏳ IPFS payload {job['cid']} not available, retrying in {delay:.0f}s", details={
+            "ipfs_cid": job["cid"],
+            "attempts": job["attempts"],
+            "error": str(error)
+        })
+        with self._lock:
+            self._active.discard(job["cid"])
+            self._dirty = True
+        self._wake.set()
+        if self._notify is not None:
+            self._notify()
+
+    def _finish(self, job: dict):
+        with self._lock:
+            self._jobs.pop(job["cid"], None)
+            self._active.discard(job["cid"])
+            self._dirty = True
+        self._wake.set()
+        if self._notify is not None:
+            self._notify()
+
+    def _deliver(self):
+        while not (self._stop.is_set() and self._results.empty()):
+            try:
+                job, messages = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._deliver_one(job, messages)
+
+    def _deliver_one(self, job: dict, messages: List[dict]):
+        try:
+            self.deliver(job["cid"], job.get("txid"), messages)
+            self.stats["completed"] += 1
+        except Exception as e:
+            from evrmail.utils import daemon as daemon_log
+            daemon_log("error", f"⚠️ Failed to deliver IPFS payload {job['cid']}: {e}")
+        self._finish(job)
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        targets = [(self._schedule, "evrmail-ipfs-scheduler"), (self._deliver, "evrmail-ipfs-deliver")]
+        targets += [(self._work, f"evrmail-ipfs-worker-{i}") for i in range(self.workers)]
+        for target, name in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop all threads. Undelivered jobs stay in the queue file for the next run."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._persist()
+
+    # ─── Asyncio ───
+
+    async def serve(self, runtime):
+        """
+        Run the pool as tasks on `runtime`'s loop until cancelled. Fetches
+        and deliveries run in the runtime's executor, and delivery stays in
+        completion order on one task. Use this or start(), not both.
+        """
+        wake = asyncio.Event()
+        jobs: asyncio.Queue = asyncio.Queue(maxsize=self._queue.maxsize)
+        results: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._notify = lambda: loop.call_soon_threadsafe(wake.set)
+        self._depths = lambda: (jobs.qsize(), results.qsize())
+
+        async def schedule():
+            while True:
+                try:
+                    await asyncio.wait_for(wake.wait(), 1.0)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+                if self._dirty:
+                    await runtime.run_blocking(self.flush)
+                for job in self._due():
+                    if jobs.full():
+                        self.stats["backpressure_waits"] += 1
+                        break
+                    jobs.put_nowait(job)
+                    self._activate(job, jobs.qsize())
+
+        async def work():
+            while True:
+                job = await jobs.get()
+                try:
+                    messages = await runtime.run_blocking(self.fetch, job["cid"])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await runtime.run_blocking(self._retry, job, e)
+                else:
+                    await results.put((job, messages))
+
+        async def deliver():
+            while True:
+                job, messages = await results.get()
+                await runtime.run_blocking(self._deliver_one, job, messages)
+
+        tasks = [asyncio.ensure_future(schedule()), asyncio.ensure_future(deliver())]
+        tasks += [asyncio.ensure_future(work()) for _ in range(self.workers)]
+        wake.set()
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._notify = None
+            self._depths = None
+            self._persist()
+
+# ─── ⚙️ Config ────────────────────────────────────────────────────────────────
+
+def ipfs_pool_from_config(config: dict, fetch, deliver) -> IPFSWorkerPool:
+    return IPFSWorkerPool(
+        fetch,
+        deliver,
+        workers=int(config.get("ipfs_workers", DEFAULT_WORKERS)),
+        queue_size=int(config.get("ipfs_queue_size", DEFAULT_QUEUE_SIZE)),
+        max_attempts=int(config.get("ipfs_max_attempts", DEFAULT_MAX_ATTEMPTS)),
+        retry_base=float(config.get("ipfs_retry_base", DEFAULT_RETRY_BASE)),
+    )
+
+__all__ = [
+    "IPFSWorkerPool",
+    "ipfs_pool_from_config",
+    "IPFS_QUEUE_FILE",
+]
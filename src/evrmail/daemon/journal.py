@@ -0,0 +1,276 @@
+# ─── 📓 EvrMail Persistence Journal ───────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Write-behind persistence for daemon state. ZMQ callbacks only hand UTXO
+#   deltas to the journal; a background thread appends them to a write-ahead
+#   log in groups (group commit) and periodically compacts the log into the
+#   SQLite snapshot. On startup, `recover()` replays whatever the log holds
+#   beyond the last snapshot.
+#
+#   Every snapshot bumps a generation number stored with it, so a reader
+#   outside the daemon (`load_utxo_set`) can tell that the log it read was
+#   folded and truncated under it.
+#
+#   Durability levels:
+#     - "sync"  : commit and fsync inside every `record()` call
+#     - "fsync" : group commit every `flush_interval` seconds, fsync per group
+#     - "flush" : group commit to the OS page cache without fsync
+# ─────────────────────────────────────────────────────────────────────────────
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from evrmail.daemon import STORAGE_DIR
+from evrmail.daemon.utxo_set import UTXOSet
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+JOURNAL_FILE = STORAGE_DIR / "daemon.journal"
+
+GENERATION_META_KEY = "journal_generation"
+
+DURABILITY_LEVELS = ("sync", "fsync", "flush")
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_DURABILITY = "fsync"
+DEFAULT_SNAPSHOT_INTERVAL = 300
+DEFAULT_GROUP_SIZE = 512
+DEFAULT_SNAPSHOT_BYTES = 16 * 1024 * 1024
+
+# ─── 🧠 Journal ────────────────────────────────────────────────────────────────
+
+class PersistenceJournal:
+    """Group-committed write-ahead log of UTXO deltas over a UTXOStore snapshot."""
+
+    def __init__(
+        self,
+        store,
+        txids=None,
+        path: Path = JOURNAL_FILE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        durability: str = DEFAULT_DURABILITY,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+        group_size: int = DEFAULT_GROUP_SIZE,
+        snapshot_bytes: int = DEFAULT_SNAPSHOT_BYTES,
+    ):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level {durability!r}; expected one of {DURABILITY_LEVELS}")
+        self.store = store
+        self.txids = txids
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.snapshot_interval = snapshot_interval
+        self.group_size = group_size
+        self.snapshot_bytes = snapshot_bytes
+
+        self._buffer: List[str] = []
+        self._pending: Dict[tuple, Optional[tuple]] = {}   # changes not yet in the snapshot
+        self._pending_meta: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = False
+        self._last_snapshot = time.monotonic()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+        self.stats = {"records": 0, "commits": 0, "snapshots": 0, "last_commit_seconds": 0.0}
+
+    # ─── Recording ───
+
+    def record(self, utxo_set: UTXOSet, meta: Dict[str, str] = None) -> int:
+        """
+        Capture the outpoints `utxo_set` changed since the last call, plus
+        store meta values (e.g. the sync checkpoint) that must land with them.
+        Returns how many outpoints changed.
+        """
+        lines = []
+        changes = {}
+        for txid, vout in utxo_set.take_dirty():
+            utxo = utxo_set.get(txid, vout)
+            if utxo is None:
+                changes[(txid, vout)] = None
+                lines.append(json.dumps({"op": "del", "txid": txid, "vout": vout}))
+            else:
+                pool = utxo_set.pool_of(txid, vout)
+                changes[(txid, vout)] = (pool, dict(utxo))
+                lines.append(json.dumps({"op": "put", "pool": pool, "utxo": utxo}))
+        for key, value in (meta or {}).items():
+            lines.append(json.dumps({"op": "meta", "key": key, "value": value}))
+
+        with self._lock:
+            self._buffer.extend(lines)
+            self._pending.update(changes)
+            self._pending_meta.update(meta or {})
+            buffered = len(self._buffer)
+        self.stats["records"] += len(lines)
+
+        if self.durability == "sync" or not self._started:
+            self.commit()
+        elif buffered >= self.group_size:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.commit()
+        return len(changes)
+
+    # ─── Group commit ───
+
+    def commit(self):
+        """Append buffered records to the log and make them durable."""
+        with self._io_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            self._write(lines)
+
+    def _write(self, lines: List[str]):
+        """Append `lines` to the log; the caller holds `_io_lock`."""
+        started = time.perf_counter()
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            if self.durability != "flush":
+                os.fsync(self._file.fileno())
+        if self.txids is not None:
+            self.txids.flush()
+        if lines:
+            self.stats["commits"] += 1
+            self.stats["last_commit_seconds"] = time.perf_counter() - started
+
+    def snapshot(self):
+        """Fold pending changes into the SQLite snapshot and truncate the log."""
+        # One critical section: nothing may reach the log between taking the
+        # pending changes and truncating it, or those lines would be lost
+        with self._io_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+                pending, self._pending = self._pending, {}
+                meta, self._pending_meta = self._pending_meta, {}
+            self._write(lines)
+            meta[GENERATION_META_KEY] = str(generation(self.store) + 1)
+            self.store.apply(pending, meta)
+            self._file.truncate(0)
+            self._file.seek(0)
+        self._last_snapshot = time.monotonic()
+        self.stats["snapshots"] += 1
+
+    def _snapshot_due(self) -> bool:
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            return True
+        try:
+            return self.path.stat().st_size >= self.snapshot_bytes
+        except OSError:
+            return False
+
+    # ─── Recovery ───
+
+    def recover(self, utxo_set: UTXOSet) -> int:
+        """
+        Replay journal records on top of a snapshot-loaded `utxo_set`, then
+        snapshot so the log starts empty. Returns the number of records replayed.
+        """
+        records = read_journal(self.path)
+        meta = replay_records(utxo_set, records)
+        if records:
+            self.record(utxo_set, meta)
+            self.snapshot()
+        return len(records)
+
+    # ─── Background flusher ───
+
+    def tick(self):
+        """One flush pass: commit the group, snapshot if due."""
+        self.commit()
+        if self._snapshot_due():
+            self.snapshot()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.tick()
+            except Exception as e:
+                from evrmail.utils import daemon as daemon_log
+                daemon_log("error", f"⚠️ Persistence flush failed: {e}")
+
+    def start(self, thread: bool = True):
+        """
+        Switch to group commit. With `thread=False` the caller runs `tick()`
+        every `flush_interval` seconds instead (the daemon runtime does).
+        """
+        self._started = True
+        if thread and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="evrmail-journal", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and leave everything in the snapshot."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.snapshot()
+        self._file.close()
+
+# ─── 📖 Reading ───────────────────────────────────────────────────────────────
+
+def read_journal(path: Path = JOURNAL_FILE) -> List[dict]:
+    """Committed records in the log, stopping at a torn tail."""
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break   # torn tail from a crash (or a writer) mid-line
+    except FileNotFoundError:
+        pass
+    return records
+
+def generation(store) -> int:
+    """How many times the journal has been folded into `store`."""
+    return int(store.get_meta(GENERATION_META_KEY, "0"))
+
+def replay_records(utxo_set: UTXOSet, records: List[dict]) -> Dict[str, str]:
+    """Apply put/del records to `utxo_set` in order. Returns the last value of each meta key."""
+    meta = {}
+    for record in records:
+        op = record.get("op")
+        if op == "put":
+            utxo_set.add(record["utxo"], record["pool"])
+        elif op == "del":
+            utxo_set.remove(record["txid"], record["vout"])
+        elif op == "meta":
+            meta[record["key"]] = record["value"]
+    return meta
+
+# ─── ⚙️ Config ────────────────────────────────────────────────────────────────
+
+def journal_from_config(config: dict, store, txids=None) -> PersistenceJournal:
+    return PersistenceJournal(
+        store,
+        txids,
+        flush_interval=float(config.get("persistence_flush_interval", DEFAULT_FLUSH_INTERVAL)),
+        durability=config.get("persistence_durability", DEFAULT_DURABILITY),
+        snapshot_interval=float(config.get("persistence_snapshot_interval", DEFAULT_SNAPSHOT_INTERVAL)),
+    )
+
+__all__ = [
+    "PersistenceJournal",
+    "journal_from_config",
+    "read_journal",
+    "replay_records",
+    "generation",
+    "JOURNAL_FILE",
+    "GENERATION_META_KEY",
+    "DURABILITY_LEVELS",
+]
@@ -0,0 +1,160 @@
+# ─── ⏳ EvrMail Mempool Tracker ───────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Evicts unconfirmed UTXOs whose transaction can no longer confirm. Without
+#   it, a mempool entry leaves only when a block confirms the same txid. This
+#   tracker records which outpoints each of our mempool transactions spends.
+#   A tx is evicted, together with any of our mempool txs built on it, when:
+#     - another mempool tx spends the same outpoint   (replaced)
+#     - a block confirms a different spend of it      (conflicted)
+#     - it has waited longer than the expiry          (expired)
+#     - the node's getrawmempool no longer lists it   (dropped)
+#   Eviction drops the tx's mempool outputs and unspends what it spent.
+#   Each spent output carries the spending txid (`spent_by`), so the spends
+#   survive a restart with the UTXO set.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from evrmail.daemon.utxo_set import UTXOSet, MEMPOOL
+
+Outpoint = Tuple[str, int]
+
+DEFAULT_EXPIRY_HOURS = 336          # same as the node's -mempoolexpiry
+DEFAULT_RECONCILE_INTERVAL = 300
+RECONCILE_GRACE = 60                # don't drop txs younger than this on reconcile
+
+# ─── 🧠 Tracker ───────────────────────────────────────────────────────────────
+
+class MempoolTracker:
+    """Spent-outpoint index for our unconfirmed transactions."""
+
+    def __init__(self, expiry: float = DEFAULT_EXPIRY_HOURS * 3600,
+                 reconcile_interval: float = DEFAULT_RECONCILE_INTERVAL):
+        self.expiry = expiry
+        self.reconcile_interval = reconcile_interval
+        self.spends: Dict[Outpoint, str] = {}          # outpoint → mempool txid spending it
+        self.txs: Dict[str, dict] = {}                 # txid → {"first_seen", "spends"}
+        self._last_reconcile = float("-inf")    # reconcile on first chance
+        self.stats = {"replaced": 0, "conflicted": 0, "expired": 0, "dropped": 0, "reconciles": 0}
+
+    def load(self, utxo_set: UTXOSet):
+        """Start tracking mempool txs already in a freshly loaded set, with what they spend."""
+        now = time.time()
+        for utxo in utxo_set.iter(MEMPOOL):
+            entry = self.txs.setdefault(utxo["txid"], {"first_seen": utxo.get("first_seen", now), "spends": []})
+            entry["first_seen"] = min(entry["first_seen"], utxo.get("first_seen", now))
+        for utxo in utxo_set.iter():
+            spender = utxo.get("spent_by")
+            if not spender or not utxo.get("spent") or utxo.get("spent_height") is not None:
+                continue    # unspent, or the spend already confirmed
+            outpoint = (utxo["txid"], utxo["vout"])
+            entry = self.txs.setdefault(spender, {"first_seen": now, "spends": []})
+            entry["spends"].append(outpoint)
+            self.spends[outpoint] = spender
+
+    # ─── Events ───
+
+    def replace_conflicts(self, txid: str, outpoints: Iterable[Outpoint], utxo_set: UTXOSet) -> int:
+        """
+        Call for a new mempool tx before its spends are applied. Earlier
+        mempool txs that spend the same outpoints are evicted as replaced.
+        Returns how many txs were evicted.
+        """
+        evicted = 0
+        for outpoint in outpoints:
+            other = self.spends.get(outpoint)
+            if other is not None and other != txid:
+                evicted += self.evict(other, utxo_set, "replaced")
+        return evicted
+
+    def track(self, txid: str, outpoints: Iterable[Outpoint], utxo_set: UTXOSet):
+        """Track `txid` after processing if it created or spent any of our outputs."""
+        if txid in self.txs:
+            return
+        ours = [op for op in outpoints if op in utxo_set]
+        if ours or utxo_set.has_tx(txid):
+            self.txs[txid] = {"first_seen": time.time(), "spends": ours}
+            for outpoint in ours:
+                self.spends[outpoint] = txid
+                utxo_set.update(*outpoint, spent_by=txid)
+
+    def confirm(self, txid: str, outpoints: Iterable[Outpoint], utxo_set: UTXOSet) -> int:
+        """
+        A block confirmed `txid`. Mempool txs that spent any of the same
+        outpoints can never confirm now and are evicted as conflicted.
+        """
+        evicted = 0
+        for outpoint in outpoints:
+            other = self.spends.get(outpoint)
+            if other is not None and other != txid:
+                evicted += self.evict(other, utxo_set, "conflicted")
+        self._forget(txid)
+        return evicted
+
+    # ─── Eviction ───
+
+    def _forget(self, txid: str) -> Optional[dict]:
+        entry = self.txs.pop(txid, None)
+        if entry is not None:
+            for outpoint in entry["spends"]:
+                if self.spends.get(outpoint) == txid:
+                    del self.spends[outpoint]
+        return entry
+
+    def evict(self, txid: str, utxo_set: UTXOSet, reason: str) -> int:
+        """Drop `txid` and its mempool descendants. Returns how many txs went."""
+        entry = self._forget(txid)
+        removed = utxo_set.remove_tx(txid, MEMPOOL)
+        if entry is None and not removed:
+            return 0
+        for outpoint in (entry or {}).get("spends", ()):
+            utxo = utxo_set.get(*outpoint)
+            if utxo is not None and utxo.get("spent") and utxo.get("spent_height") is None:
+                utxo_set.update(*outpoint, spent=False, spent_by=None)
+        self.stats[reason] += 1
+        evicted = 1
+        # Children spending outputs of the evicted tx can't confirm either
+        children = {child for (parent, _), child in self.spends.items() if parent == txid}
+        for child in children:
+            evicted += self.evict(child, utxo_set, reason)
+        return evicted
+
+    def expire(self, utxo_set: UTXOSet, now: float = None) -> int:
+        now = now or time.time()
+        stale = [txid for txid, entry in self.txs.items() if now - entry["first_seen"] > self.expiry]
+        return sum(self.evict(txid, utxo_set, "expired") for txid in stale if txid in self.txs)
+
+    def reconcile(self, node_txids: Set[str], utxo_set: UTXOSet, now: float = None) -> int:
+        """Evict tracked txs the node's mempool no longer holds."""
+        now = now or time.time()
+        self._last_reconcile = time.monotonic()
+        self.stats["reconciles"] += 1
+        missing = [
+            txid for txid, entry in self.txs.items()
+            if txid not in node_txids and now - entry["first_seen"] > RECONCILE_GRACE
+        ]
+        return sum(self.evict(txid, utxo_set, "dropped") for txid in missing if txid in self.txs)
+
+    def reconcile_due(self) -> bool:
+        return time.monotonic() - self._last_reconcile >= self.reconcile_interval
+
+    # ─── Metrics ───
+
+    def metrics(self) -> dict:
+        return dict(self.stats, tracked=len(self.txs), tracked_spends=len(self.spends),
+                    evicted=sum(self.stats[k] for k in ("replaced", "conflicted", "expired", "dropped")))
+
+# ─── ⚙️ Config ────────────────────────────────────────────────────────────────
+
+def tracker_from_config(config: dict) -> MempoolTracker:
+    return MempoolTracker(
+        expiry=float(config.get("mempool_expiry_hours", DEFAULT_EXPIRY_HOURS)) * 3600,
+        reconcile_interval=float(config.get("mempool_reconcile_interval", DEFAULT_RECONCILE_INTERVAL)),
+    )
+
+__all__ = [
+    "MempoolTracker",
+    "tracker_from_config",
+]
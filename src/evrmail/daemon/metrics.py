@@ -0,0 +1,139 @@
+# ─── 📈 EvrMail Daemon Metrics ────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Daemon measurements plus a local HTTP endpoint that serves them in the
+#   Prometheus text format at /metrics.
+#     - counters   : transactions and blocks processed, ZMQ notifications
+#     - histograms : block processing, transaction decode, payload scans,
+#                    UTXO syncs (IPFS fetches and RPC calls are timed
+#                    where they happen, in utils.ipfs and utils.rpc)
+#     - gauges     : UTXO pool sizes, queue depths, last persistence
+#                    flush, plus the stats dicts of the daemon's components
+#   Gauges are read from live state at scrape time, so the hot paths only
+#   ever increment counters and histograms.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import asyncio
+from typing import Callable, Dict, Optional, Union
+
+from evrmail.daemon.utxo_set import UTXOSet, CONFIRMED, MEMPOOL
+from evrmail.utils.metrics import REGISTRY, counter, gauge, histogram
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = 9477
+
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+SYNC_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# ─── 🔢 Measurements ──────────────────────────────────────────────────────────
+
+TRANSACTIONS = counter("evrmail_transactions_total", "Transactions checked against the watch set, by pool", ("pool",))
+BLOCKS = counter("evrmail_blocks_processed_total", "Blocks applied to the UTXO set (live and catch-up)")
+ZMQ_NOTIFICATIONS = counter("evrmail_zmq_notifications_total", "ZMQ notifications handled, by topic", ("topic",))
+
+BLOCK_SECONDS = histogram("evrmail_block_processing_seconds", "Time to apply one block to the UTXO set")
+DECODE_SECONDS = histogram("evrmail_decode_transaction_seconds", "Time to decode one raw mempool transaction",
+                           buckets=FAST_BUCKETS)
+SCAN_PAYLOAD_SECONDS = histogram("evrmail_scan_payload_seconds", "Time to fetch and decrypt one IPFS payload")
+SYNC_SECONDS = histogram("evrmail_utxo_sync_seconds", "Duration of full UTXO syncs from the node", buckets=SYNC_BUCKETS)
+
+UTXOS = gauge("evrmail_utxos", "UTXOs in the live set, by pool", ("pool",))
+QUEUE_DEPTH = gauge("evrmail_queue_depth", "Items waiting, by queue", ("queue",))
+FLUSH_SECONDS = gauge("evrmail_persistence_flush_seconds", "Duration of the last journal group commit")
+COMPONENT_STATS = gauge("evrmail_component_stat", "Internal counters of daemon components", ("component", "stat"))
+
+# ─── 🧲 Collector ─────────────────────────────────────────────────────────────
+
+def _set_stats(component: str, stats: dict, prefix: str = ""):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _set_stats(component, value, f"{prefix}{key}_")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            COMPONENT_STATS.set(value, component=component, stat=f"{prefix}{key}")
+
+def install_collector(utxo_cache: UTXOSet, journal=None, runtime=None, ipfs_workers=None,
+                      components: Dict[str, Union[dict, Callable[[], dict]]] = None) -> Callable[[], None]:
+    """
+    Refresh the daemon gauges from live objects on every scrape.
+    `components` maps a name to a stats dict (or a function returning one).
+    Returns a function that uninstalls the collector.
+    """
+    def collect():
+        UTXOS.set(utxo_cache.count(CONFIRMED), pool="confirmed")
+        UTXOS.set(utxo_cache.count(MEMPOOL), pool="mempool")
+        if journal is not None:
+            FLUSH_SECONDS.set(journal.stats["last_commit_seconds"])
+            _set_stats("journal", journal.stats)
+        if runtime is not None:
+            for name, depth in runtime.queue_depths().items():
+                QUEUE_DEPTH.set(depth, queue=name)
+        if ipfs_workers is not None:
+            ipfs = ipfs_workers.metrics()
+            QUEUE_DEPTH.set(ipfs["queue_depth"], queue="ipfs_fetch")
+            QUEUE_DEPTH.set(ipfs["delivery_backlog"], queue="ipfs_deliver")
+            QUEUE_DEPTH.set(ipfs["pending"], queue="ipfs_pending")
+            _set_stats("ipfs", ipfs)
+        for name, stats in (components or {}).items():
+            _set_stats(name, stats() if callable(stats) else stats)
+
+    return REGISTRY.add_collector(collect)
+
+# ─── 🌐 Endpoint ──────────────────────────────────────────────────────────────
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), 5.0)
+        while True:
+            header = await asyncio.wait_for(reader.readline(), 5.0)
+            if header in (b"\r\n", b"\n", b""):
+                break
+        parts = request_line.split()
+        path = parts[1].split(b"?")[0] if len(parts) > 1 else b""
+        if path in (b"/", b"/metrics"):
+            # Collectors take component locks; keep them off the event loop
+            body = (await asyncio.get_running_loop().run_in_executor(None, REGISTRY.render)).encode()
+            status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, status, content_type = b"not found\n", "404 Not Found", "text/plain"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def serve_metrics(host: str = DEFAULT_METRICS_HOST, port: int = DEFAULT_METRICS_PORT):
+    """Serve /metrics until cancelled. A port that can't be bound only disables the endpoint."""
+    from evrmail.utils import daemon as daemon_log
+    try:
+        server = await asyncio.start_server(_handle, host, port)
+    except OSError as e:
+        daemon_log("warning", f"⚠️ Metrics endpoint disabled, could not listen on {host}:{port}: {e}")
+        await asyncio.Event().wait()    # stay parked; the runtime treats a finished task as a crash
+        return
+    daemon_log("info", f"📈 Metrics at http://{host}:{port}/metrics")
+    async with server:
+        await server.serve_forever()
+
+def metrics_endpoint(config: dict) -> Optional[tuple]:
+    """(host, port) from config, or None when `metrics_port` is 0."""
+    port = int(config.get("metrics_port", DEFAULT_METRICS_PORT))
+    if port <= 0:
+        return None
+    return config.get("metrics_host", DEFAULT_METRICS_HOST), port
+
+__all__ = [
+    "install_collector",
+    "serve_metrics",
+    "metrics_endpoint",
+    "TRANSACTIONS",
+    "BLOCKS",
+    "ZMQ_NOTIFICATIONS",
+    "BLOCK_SECONDS",
+    "DECODE_SECONDS",
+    "SCAN_PAYLOAD_SECONDS",
+    "SYNC_SECONDS",
+]
@@ -0,0 +1,144 @@
+# ─── ⚡ EvrMail Parallel Block Ingestion ───────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Fans the CPU-bound part of block handling out over a process pool. The
+#   main process only walks transaction boundaries and splits the block into
+#   contiguous chunks. Workers parse each chunk, compute txids and run the
+#   watchlist prefilter, and send back compact per-transaction summaries in
+#   block order. UTXO mutations stay on the main process and go through the
+#   same mark_utxos_as_spent / process_transaction path as sequential ingestion.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from evrmail.daemon.watchlist import Watchlist
+from evrmail.wallet.block.decode import read_varint
+from evrmail.wallet.block.stream import BlockView, TxView
+
+DEFAULT_MIN_TXS = 256
+
+# ─── 🔪 Chunking ──────────────────────────────────────────────────────────────
+
+def _skip_tx(buf: memoryview, cursor: int) -> int:
+    """Return the offset just past the transaction starting at `cursor`."""
+    cursor += 4
+    segwit = buf[cursor] == 0x00 and buf[cursor + 1] != 0x00
+    if segwit:
+        cursor += 2
+    vin_count, cursor = read_varint(buf, cursor)
+    for _ in range(vin_count):
+        script_len, cursor = read_varint(buf, cursor + 36)
+        cursor += script_len + 4
+    vout_count, cursor = read_varint(buf, cursor)
+    for _ in range(vout_count):
+        script_len, cursor = read_varint(buf, cursor + 8)
+        cursor += script_len
+    if segwit:
+        for _ in range(vin_count):
+            item_count, cursor = read_varint(buf, cursor)
+            for _ in range(item_count):
+                item_size, cursor = read_varint(buf, cursor)
+                cursor += item_size
+    return cursor + 4
+
+def split_block(block: BlockView, parts: int) -> List[bytes]:
+    """Split a block's transactions into at most `parts` contiguous raw chunks."""
+    buf = block._buf
+    per_chunk = max(1, -(-block.tx_count // parts))
+    chunks = []
+    cursor = chunk_start = block.tx_start
+    for i in range(block.tx_count):
+        cursor = _skip_tx(buf, cursor)
+        if (i + 1) % per_chunk == 0 or i + 1 == block.tx_count:
+            chunks.append(bytes(buf[chunk_start:cursor]))
+            chunk_start = cursor
+    return chunks
+
+# ─── 👷 Worker ────────────────────────────────────────────────────────────────
+
+def matching_outputs(tx: TxView, watchlist: Watchlist, messages: bool = True) -> List[dict]:
+    """Outputs of `tx` that hit the watchlist (or carry an IPFS message), as vout entries."""
+    vout = []
+    for n in range(tx.output_count):
+        script = tx.script(n)
+        hit, has_message = watchlist.match(script)
+        if hit is not None or (messages and has_message):
+            vout.append({"value": tx.value(n), "n": n, "scriptPubKey": {"hex": script.hex()}})
+    return vout
+
+def classify_chunk(raw: bytes, pubkey_hashes: dict, script_hashes: dict) -> List[dict]:
+    """
+    Parse consecutive transactions and keep only what ingestion needs: the
+    txid, spent outpoints and the outputs that pass the watchlist prefilter.
+    """
+    watchlist = Watchlist()
+    watchlist.pubkey_hashes = pubkey_hashes
+    watchlist.script_hashes = script_hashes
+
+    buf = memoryview(raw)
+    cursor = 0
+    summaries = []
+    while cursor < len(buf):
+        tx = TxView(buf, cursor)
+        cursor += tx.size
+        summaries.append({
+            "txid": tx.txid,
+            "vin": [{"txid": txid, "vout": n} for txid, n in tx.outpoints()],
+            "vout": matching_outputs(tx, watchlist),
+        })
+    return summaries
+
+# ─── 🏭 Ingestor ──────────────────────────────────────────────────────────────
+
+class ParallelIngestor:
+    """Process pool that classifies large blocks; smaller ones stay sequential."""
+
+    def __init__(self, workers: int, min_txs: int = DEFAULT_MIN_TXS):
+        self.workers = workers
+        self.min_txs = min_txs
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Fork the workers up front, before the daemon starts its threads."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            list(self._executor.map(abs, range(self.workers)))
+
+    def wants(self, block: BlockView) -> bool:
+        return block.tx_count >= self.min_txs
+
+    def classify(self, block: BlockView, watchlist: Watchlist) -> List[dict]:
+        """Per-transaction summaries for `block`, in block order."""
+        self.start()
+        chunks = split_block(block, self.workers * 4)
+        futures = [
+            self._executor.submit(classify_chunk, chunk, watchlist.pubkey_hashes, watchlist.script_hashes)
+            for chunk in chunks
+        ]
+        summaries = []
+        for future in futures:
+            summaries.extend(future.result())
+        return summaries
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+# ─── ⚙️ Config ────────────────────────────────────────────────────────────────
+
+def ingestor_from_config(config: dict) -> Optional[ParallelIngestor]:
+    """A ParallelIngestor when `ingest_workers` > 0, else None (sequential ingestion)."""
+    workers = int(config.get("ingest_workers", 0))
+    if workers <= 0:
+        return None
+    return ParallelIngestor(workers, int(config.get("ingest_parallel_min_txs", DEFAULT_MIN_TXS)))
+
+__all__ = [
+    "ParallelIngestor",
+    "ingestor_from_config",
+    "classify_chunk",
+    "matching_outputs",
+    "split_block",
+]
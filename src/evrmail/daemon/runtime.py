@@ -0,0 +1,230 @@
+# ─── 🔁 EvrMail Daemon Runtime ────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Runs the daemon on a single asyncio event loop. Each long-running job is
+#   an explicit task on that loop:
+#     - consumers  : ordered queues (rawtx, rawblock) fed from other threads
+#     - periodic   : jobs repeated every N seconds (persistence, expiry, ...)
+#     - signalled  : jobs that run when another thread calls `notify(name)`
+#     - tasks      : any other coroutine (ZMQ intake, the IPFS pool)
+#   Blocking and CPU-heavy work (RPC, block parsing, SQLite, `ipfs cat`) goes
+#   to the runtime's executor, so the loop itself only schedules work.
+#   Shutdown is safe to cancel at any point. Tasks are cancelled in reverse
+#   start order, then each shutdown hook runs exactly once, whatever
+#   stopped the loop.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import asyncio
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+DEFAULT_EXECUTOR_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 1024
+
+# ─── 🧠 Runtime ───────────────────────────────────────────────────────────────
+
+class DaemonRuntime:
+    """Owns the event loop, the executor and every long-running daemon task."""
+
+    def __init__(self, workers: int = DEFAULT_EXECUTOR_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+        self._specs: List[tuple] = []                       # (name, coroutine function)
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._slots: Dict[str, threading.Semaphore] = {}    # bounds each queue across threads
+        self._signals: Dict[str, Optional[asyncio.Event]] = {}
+        self._cleanup: List[tuple] = []                     # (name, callable)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._closed = threading.Event()
+
+        self.stats = {"fed": 0, "dropped": 0, "processed": 0, "failed": 0, "periodic_runs": 0}
+
+    # ─── Registration (before run) ───
+
+    def task(self, name: str, coro_fn: Callable[[], Awaitable[Any]]):
+        """Run `coro_fn()` as a task for the lifetime of the runtime."""
+        self._specs.append((name, coro_fn))
+
+    def consumer(self, name: str, handler: Callable[[Any], Any]):
+        """
+        Process items passed to `feed(name, item)` one at a time, in arrival
+        order, with `handler(item)` running in the executor.
+        """
+        self._slots[name] = threading.BoundedSemaphore(self.queue_size)
+
+        async def consume():
+            queue = self._queues[name]
+            while True:
+                item = await queue.get()
+                try:
+                    await self.run_blocking(handler, item)
+                    self.stats["processed"] += 1
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    _log_failure(name, e)
+                finally:
+                    self._slots[name].release()
+
+        self.task(name, consume)
+
+    def periodic(self, name: str, interval: float, fn: Callable[[], Any]):
+        """Run `fn()` in the executor every `interval` seconds."""
+        async def repeat():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.run_blocking(fn)
+                    self.stats["periodic_runs"] += 1
+                except Exception as e:
+                    _log_failure(name, e)
+
+        self.task(name, repeat)
+
+    def signalled(self, name: str, fn: Callable[[], Any]):
+        """
+        Run `fn()` in the executor each time `notify(name)` is called.
+        Notifications that arrive while `fn` runs trigger one more run.
+        """
+        self._signals[name] = None
+
+        async def wait():
+            event = self._signals[name]
+            while True:
+                await event.wait()
+                event.clear()
+                try:
+                    await self.run_blocking(fn)
+                except Exception as e:
+                    _log_failure(name, e)
+
+        self.task(name, wait)
+
+    def on_shutdown(self, name: str, fn: Callable[[], Any]):
+        """Run `fn()` once on shutdown, after the tasks stop. Hooks run in registration order."""
+        self._cleanup.append((name, fn))
+
+    # ─── Thread-safe entry points ───
+
+    def feed(self, name: str, item: Any) -> bool:
+        """
+        Queue `item` for consumer `name` from any thread. Blocks while the
+        queue is full, so the caller feels the backpressure. Returns False
+        once the runtime is shutting down.
+        """
+        self._ready.wait()
+        slots = self._slots[name]
+        while not self._closed.is_set():
+            if not slots.acquire(timeout=0.5):
+                continue
+            try:
+                self.loop.call_soon_threadsafe(self._queues[name].put_nowait, item)
+            except RuntimeError:
+                # Loop already closed
+                slots.release()
+                break
+            self.stats["fed"] += 1
+            return True
+        self.stats["dropped"] += 1
+        return False
+
+    def notify(self, name: str):
+        """Wake the signalled job `name` from any thread."""
+        if self._ready.is_set() and not self._closed.is_set():
+            self.loop.call_soon_threadsafe(self._signals[name].set)
+
+    def stop(self):
+        """Ask the runtime to shut down. Safe from any thread and from signal handlers."""
+        if self._ready.is_set() and not self._closed.is_set():
+            self.loop.call_soon_threadsafe(self._stopping.set)
+
+    async def run_blocking(self, fn: Callable, *args) -> Any:
+        """Run `fn(*args)` in the executor and wait for it."""
+        return await self.loop.run_in_executor(self.executor, fn, *args)
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    # ─── Lifecycle ───
+
+    def run(self):
+        """Run the event loop on the calling thread until `stop()` or SIGINT/SIGTERM."""
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="evrmail-runtime")
+        self.loop.set_default_executor(self.executor)
+        self._stopping = asyncio.Event()
+        for name in self._slots:
+            self._queues[name] = asyncio.Queue()
+        for name in self._signals:
+            self._signals[name] = asyncio.Event()
+
+        # Signal handlers can only be installed on the main thread (not in the GUI's daemon thread)
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    self.loop.add_signal_handler(sig, self._stopping.set)
+                except (NotImplementedError, RuntimeError):
+                    pass
+
+        try:
+            for name, coro_fn in self._specs:
+                self._tasks[name] = self.loop.create_task(self._guard(name, coro_fn), name=f"evrmail-{name}")
+            self._ready.set()
+            await self._stopping.wait()
+        finally:
+            await self._shutdown()
+
+    async def _guard(self, name: str, coro_fn):
+        # A task that exits on its own takes a daemon component with it: stop cleanly
+        try:
+            await coro_fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _log_failure(name, e)
+        self._stopping.set()
+
+    async def _shutdown(self):
+        self._closed.set()
+        tasks = list(self._tasks.values())
+        for task in reversed(tasks):
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for name, fn in self._cleanup:
+            try:
+                await self.run_blocking(fn)
+            except Exception as e:
+                _log_failure(name, e)
+        self.executor.shutdown(wait=True)
+
+def _log_failure(name: str, error: Exception):
+    from evrmail.utils import daemon as daemon_log
+    daemon_log("error", f"⚠️ Daemon task {name} failed: {error}", details={
+        "task": name,
+        "error": repr(error)
+    })
+
+# ─── ⚙️ Config ────────────────────────────────────────────────────────────────
+
+def runtime_from_config(config: dict) -> DaemonRuntime:
+    # The IPFS fetchers hold executor threads while `ipfs cat` runs; leave room for the rest
+    ipfs_workers = int(config.get("ipfs_workers", 4))
+    workers = int(config.get("daemon_executor_workers", DEFAULT_EXECUTOR_WORKERS))
+    return DaemonRuntime(
+        workers=max(workers, ipfs_workers + 4),
+        queue_size=int(config.get("daemon_queue_size", DEFAULT_QUEUE_SIZE)),
+    )
+
+__all__ = [
+    "DaemonRuntime",
+    "runtime_from_config",
+]
@@ -0,0 +1,130 @@
+# ─── 🔢 EvrMail ZMQ Sequence Tracking ─────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   The node stamps every ZMQ notification with a per-topic uint32 sequence
+#   number. A jump means we missed messages: a slow callback, a reconnect or
+#   a high-water-mark drop. Missed messages would otherwise silently leave
+#   the UTXO cache out of step. The SequenceTracker notices the jump and the
+#   GapRecovery thread runs a targeted catch-up: missed blocks by height,
+#   then a getrawmempool reconciliation. The ZMQ listener keeps running the
+#   whole time.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import threading
+from typing import Callable, Dict, Optional
+
+SEQUENCE_MODULUS = 1 << 32
+
+# ─── 🧮 Gap Detection ─────────────────────────────────────────────────────────
+
+class SequenceTracker:
+    """Last sequence number seen per topic, with gap counters."""
+
+    def __init__(self):
+        self._last: Dict[str, int] = {}
+        self.stats: Dict[str, dict] = {}
+
+    def observe(self, topic: str, sequence: Optional[int]) -> int:
+        """
+        Record `sequence` for `topic`. Returns how many messages were missed
+        since the previous one (1 when the node restarted and the count is
+        unknown), or 0.
+        """
+        stats = self.stats.setdefault(topic, {"received": 0, "gaps": 0, "missed": 0, "resets": 0})
+        stats["received"] += 1
+        if sequence is None:
+            return 0
+        previous = self._last.get(topic)
+        self._last[topic] = sequence
+        if previous is None:
+            return 0
+        expected = (previous + 1) % SEQUENCE_MODULUS
+        if sequence == expected:
+            return 0
+        if sequence == 0:
+            # Node restarted; whatever it published while we reconnected is lost
+            stats["resets"] += 1
+            missed = 1
+        else:
+            missed = (sequence - expected) % SEQUENCE_MODULUS
+        stats["gaps"] += 1
+        stats["missed"] += missed
+        return missed
+
+    def reset(self, topic: str = None):
+        if topic is None:
+            self._last.clear()
+        else:
+            self._last.pop(topic, None)
+
+# ─── 🩹 Recovery ──────────────────────────────────────────────────────────────
+
+class GapRecovery:
+    """
+    Background thread that runs the catch-up callbacks. Requests that come
+    in while one is running are merged into a single follow-up pass.
+    """
+
+    def __init__(self, recover_blocks: Callable[[], None], recover_mempool: Callable[[], None],
+                 wake: Callable[[], None] = None):
+        self.recover_blocks = recover_blocks
+        self.recover_mempool = recover_mempool
+        self.wake = wake    # set when something other than start() drives run_pending()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pending = {"blocks": False, "mempool": False}
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"requests": 0, "block_recoveries": 0, "mempool_recoveries": 0, "failures": 0}
+
+    def request(self, blocks: bool = False, mempool: bool = True):
+        with self._lock:
+            self._pending["blocks"] |= blocks
+            self._pending["mempool"] |= mempool
+        self.stats["requests"] += 1
+        self._wake.set()
+        if self.wake is not None:
+            self.wake()
+
+    def run_pending(self):
+        """Run whatever recovery has been requested since the last pass."""
+        with self._lock:
+            pending, self._pending = self._pending, {"blocks": False, "mempool": False}
+        try:
+            # Blocks first so the mempool pass doesn't resurrect confirmed txs
+            if pending["blocks"]:
+                self.recover_blocks()
+                self.stats["block_recoveries"] += 1
+            if pending["mempool"]:
+                self.recover_mempool()
+                self.stats["mempool_recoveries"] += 1
+        except Exception as e:
+            self.stats["failures"] += 1
+            from evrmail.utils import daemon as daemon_log
+            daemon_log("error", f"⚠️ ZMQ gap recovery failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(1.0)
+            if not self._wake.is_set():
+                continue
+            self._wake.clear()
+            self.run_pending()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="evrmail-gap-recovery", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+__all__ = [
+    "SequenceTracker",
+    "GapRecovery",
+]
@@ -0,0 +1,376 @@
+# ─── 🧩 EvrMail Sharded Daemon ────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Spreads output matching and payload decryption over N long-lived shard
+#   processes, for deployments watching tens of thousands of addresses. The
+#   daemon process stays the coordinator: it receives the ZMQ notifications
+#   and owns the UTXO store, the journal and the inbox.
+#
+#   Each shard owns a partition of the watched hash160 set, picked by the
+#   hash's leading bytes. It also holds the private keys for that partition
+#   and nothing else. Shards load those keys from the wallet files
+#   themselves, so keys never cross a pipe.
+#
+#   A raw block or transaction goes to every shard over its pipe. Every
+#   shard matches all outputs against its own partition. For its stride of
+#   transactions it also builds the full summary (txid, inputs, message
+#   outputs). The coordinator merges these back into block order and feeds
+#   them through the usual ingest path.
+#
+#   A fetched IPFS batch is split by recipient, and each shard decrypts only
+#   the messages addressed to its partition; the replies are merged back
+#   into payload order. When a shard fails or times out, the coordinator
+#   logs it and handles that request locally.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Iterable, List, Optional, Set
+
+import base58
+
+from evrmail.daemon.parallel import classify_chunk, matching_outputs
+from evrmail.daemon.watchlist import Watchlist
+from evrmail.wallet.block.stream import BlockView, TxView
+
+DEFAULT_TIMEOUT = 60.0
+
+class ShardError(Exception):
+    """A shard crashed, timed out or raised while handling a request."""
+
+# ─── 🔀 Partitioning ──────────────────────────────────────────────────────────
+
+def shard_of(hash160: bytes, count: int) -> int:
+    """Shard owning a 20-byte pubkey/script hash. Hashes are uniform, so leading bytes suffice."""
+    return int.from_bytes(hash160[:4], "big") % count
+
+def shard_of_address(address: str, count: int) -> Optional[int]:
+    try:
+        raw = base58.b58decode_check(address)
+    except ValueError:
+        return None
+    if len(raw) != 21:
+        return None
+    return shard_of(raw[1:], count)
+
+def partition(watchlist: Watchlist, count: int) -> List[Set[str]]:
+    """Watched addresses grouped by owning shard."""
+    parts = [set() for _ in range(count)]
+    for hashes in (watchlist.pubkey_hashes, watchlist.script_hashes):
+        for hash160, address in hashes.items():
+            parts[shard_of(hash160, count)].add(address)
+    return parts
+
+# ─── 👷 Shard Process ─────────────────────────────────────────────────────────
+
+class _Shard:
+    """State that lives inside one shard process."""
+
+    def __init__(self, index: int, count: int):
+        self.index = index
+        self.count = count
+        self.watchlist = Watchlist()
+        self.keys: Dict[str, str] = {}
+
+    def load_keys(self) -> int:
+        from evrmail.utils.scan_payload import get_wallet_decryption_keys
+        self.keys = {
+            address: key for address, key in get_wallet_decryption_keys().items()
+            if shard_of_address(address, self.count) == self.index
+        }
+        return len(self.keys)
+
+    def watch(self, added: List[str], removed: List[str]) -> int:
+        for address in removed:
+            self.watchlist.discard(address)
+        for address in added:
+            self.watchlist.add(address)
+        return len(self.watchlist)
+
+    def classify(self, raw: bytes, is_block: bool) -> list:
+        """
+        (index, summary) for transactions in this shard's stride and
+        (index, extra outputs) for other transactions that hit our partition.
+        """
+        txs = BlockView(raw) if is_block else (TxView.from_bytes(raw),)
+        results = []
+        for i, tx in enumerate(txs):
+            if i % self.count == self.index:
+                results.append((i, {
+                    "txid": tx.txid,
+                    "vin": [{"txid": txid, "vout": n} for txid, n in tx.outpoints()],
+                    "vout": matching_outputs(tx, self.watchlist),
+                }))
+            else:
+                hits = matching_outputs(tx, self.watchlist, messages=False)
+                if hits:
+                    results.append((i, hits))
+        return results
+
+    def decrypt(self, batch: dict, cid: str, positions: List[int]) -> List[tuple]:
+        """(position in the full payload, message) for each message decrypted from this part."""
+        from evrmail.utils.scan_payload import decrypt_batch
+        messages = batch.get("messages")
+        raw = messages if isinstance(messages, list) else [messages]
+        position_of = {id(message): position for message, position in zip(raw, positions)}
+        return [(position_of[id(found["raw"])], found) for found in decrypt_batch(batch, self.keys, cid)]
+
+def _shard_main(index: int, count: int, conn):
+    shard = _Shard(index, count)
+    shard.load_keys()
+    operations = {
+        "watch": shard.watch,
+        "load_keys": shard.load_keys,
+        "classify": shard.classify,
+        "decrypt": shard.decrypt,
+    }
+    while True:
+        try:
+            req_id, op, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if op == "stop":
+            break
+        try:
+            conn.send((req_id, True, operations[op](*args)))
+        except Exception as e:
+            conn.send((req_id, False, repr(e)))
+
+# ─── 📞 Coordinator Side ──────────────────────────────────────────────────────
+
+class _ShardHandle:
+    """Pipe to one shard, with a reader thread resolving replies by request id."""
+
+    def __init__(self, index: int, count: int, context):
+        self.index = index
+        self._conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_shard_main, args=(index, count, child),
+            name=f"evrmail-shard-{index}", daemon=True
+        )
+        self.process.start()
+        child.close()
+        self._send_lock = threading.Lock()
+        self._futures: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._reader: Optional[threading.Thread] = None
+        self.assigned: Set[str] = set()
+
+    def listen(self):
+        self._reader = threading.Thread(target=self._read, name=f"evrmail-shard-{self.index}-reader", daemon=True)
+        self._reader.start()
+
+    def call(self, op: str, *args) -> Future:
+        future = Future()
+        with self._send_lock:
+            req_id = next(self._ids)
+            self._futures[req_id] = future
+            try:
+                self._conn.send((req_id, op, args))
+            except (OSError, ValueError) as e:
+                self._futures.pop(req_id, None)
+                future.set_exception(ShardError(f"shard {self.index}: {e}"))
+        return future
+
+    def _read(self):
+        while True:
+            try:
+                req_id, ok, result = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._futures.pop(req_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(ShardError(f"shard {self.index}: {result}"))
+        # The shard is gone; fail whatever is still waiting on it
+        for req_id in list(self._futures):
+            future = self._futures.pop(req_id, None)
+            if future is not None and not future.done():
+                future.set_exception(ShardError(f"shard {self.index} exited"))
+
+    def close(self, timeout: float):
+        try:
+            self._conn.send((None, "stop", ()))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self._conn.close()
+        if self._reader is not None:
+            self._reader.join(timeout)
+
+class ShardPool:
+    """
+    Coordinator for the shard processes. Has the same wants / classify /
+    close interface as ParallelIngestor, so it plugs into ingest_block.
+    """
+
+    def __init__(self, count: int, timeout: float = DEFAULT_TIMEOUT):
+        self.count = max(1, count)
+        self.timeout = timeout
+        self._shards: List[_ShardHandle] = []
+        self._watch_lock = threading.Lock()
+        self.stats = {"blocks": 0, "txs": 0, "payloads": 0, "watch_updates": 0, "fallbacks": 0}
+
+    def start(self):
+        """Fork every shard before starting any reader thread (or other daemon threads)."""
+        if self._shards:
+            return
+        context = multiprocessing.get_context()
+        self._shards = [_ShardHandle(i, self.count, context) for i in range(self.count)]
+        for shard in self._shards:
+            shard.listen()
+
+    def _wait(self, futures: Iterable[Future]) -> list:
+        try:
+            return [future.result(self.timeout) for future in futures]
+        except FutureTimeout:
+            raise ShardError(f"no reply within {self.timeout:.0f}s")
+
+    def _fallback(self, what: str, error: Exception):
+        from evrmail.utils import daemon as daemon_log
+        self.stats["fallbacks"] += 1
+        daemon_log("warning", f"⚠️ Shard {what} failed, handling it locally: {error}")
+
+    # ─── Watch set and keys ───
+
+    def sync_watchlist(self, watchlist: Watchlist):
+        """Send each shard the additions and removals for its partition since the last sync."""
+        with self._watch_lock:
+            updates = []
+            for shard, addresses in zip(self._shards, partition(watchlist, self.count)):
+                added, removed = addresses - shard.assigned, shard.assigned - addresses
+                if added or removed:
+                    updates.append(shard.call("watch", sorted(added), sorted(removed)))
+                    shard.assigned = addresses
+            if updates:
+                self.stats["watch_updates"] += 1
+                self._wait(updates)
+
+    def reload_keys(self) -> int:
+        """Have every shard reload its partition's private keys. Returns the total held."""
+        return sum(self._wait([shard.call("load_keys") for shard in self._shards]))
+
+    # ─── Matching ───
+
+    def wants(self, block: BlockView) -> bool:
+        return True
+
+    def _classify(self, raw: bytes, is_block: bool) -> List[dict]:
+        replies = self._wait([shard.call("classify", raw, is_block) for shard in self._shards])
+        summaries: Dict[int, dict] = {}
+        extra: Dict[int, List[dict]] = {}
+        for reply in replies:
+            for i, item in reply:
+                if isinstance(item, dict):
+                    summaries[i] = item
+                else:
+                    extra.setdefault(i, []).extend(item)
+        # Outputs carrying a message can also be another shard's hit
+        for i, hits in extra.items():
+            vout = summaries[i]["vout"]
+            seen = {entry["n"] for entry in vout}
+            vout.extend(entry for entry in hits if entry["n"] not in seen)
+            vout.sort(key=lambda entry: entry["n"])
+        return [summaries[i] for i in range(len(summaries))]
+
+    def classify(self, block: BlockView, watchlist: Watchlist) -> List[dict]:
+        """Per-transaction summaries for `block`, in block order."""
+        self.stats["blocks"] += 1
+        try:
+            return self._classify(bytes(block._buf), True)
+        except ShardError as e:
+            self._fallback("block matching", e)
+            return classify_chunk(bytes(block._buf[block.tx_start:]),
+                                  watchlist.pubkey_hashes, watchlist.script_hashes)
+
+    def classify_tx(self, tx: TxView, watchlist: Watchlist) -> dict:
+        """Summary for a single mempool transaction."""
+        self.stats["txs"] += 1
+        try:
+            return self._classify(bytes(tx.raw()), False)[0]
+        except ShardError as e:
+            self._fallback("tx matching", e)
+            return classify_chunk(bytes(tx.raw()), watchlist.pubkey_hashes, watchlist.script_hashes)[0]
+
+    # ─── Decryption ───
+
+    def _split_batch(self, batch: dict) -> Dict[int, tuple]:
+        """shard → (its part of `batch`, each message's position in the full payload)."""
+        messages = batch.get("messages", [])
+        if isinstance(messages, dict):
+            shard = shard_of_address(messages.get("to") or "", self.count)
+            return {} if shard is None else {shard: (batch, [0])}
+        parts: Dict[int, list] = {}
+        for position, message in enumerate(messages if isinstance(messages, list) else ()):
+            shard = shard_of_address(message.get("to") or "", self.count) if isinstance(message, dict) else None
+            if shard is not None:
+                parts.setdefault(shard, []).append((position, message))
+        return {
+            shard: (dict(batch, messages=[message for _, message in part]), [position for position, _ in part])
+            for shard, part in parts.items()
+        }
+
+    def scan_payload(self, cid: str, raise_unavailable: bool = False) -> List[dict]:
+        """Drop-in for utils.scan_payload.scan_payload with decryption spread over the shards."""
+        from evrmail.utils.ipfs import fetch_ipfs_json
+        from evrmail.utils.scan_payload import PayloadUnavailable, decrypt_batch, get_wallet_decryption_keys
+        batch = fetch_ipfs_json(cid)
+        if not batch:
+            if raise_unavailable:
+                raise PayloadUnavailable(cid)
+            return []
+        self.stats["payloads"] += 1
+        parts = self._split_batch(batch)
+        try:
+            replies = self._wait([
+                self._shards[shard].call("decrypt", part, cid, positions)
+                for shard, (part, positions) in parts.items()
+            ])
+        except ShardError as e:
+            self._fallback("decryption", e)
+            return decrypt_batch(batch, get_wallet_decryption_keys(), cid)
+        # Same order as decrypt_batch over the whole payload
+        return [message for _, message in sorted(
+            (tagged for reply in replies for tagged in reply), key=lambda tagged: tagged[0]
+        )]
+
+    # ─── Lifecycle ───
+
+    def metrics(self) -> dict:
+        return dict(
+            self.stats,
+            shards=self.count,
+            alive=sum(shard.process.is_alive() for shard in self._shards),
+            watched=[len(shard.assigned) for shard in self._shards],
+        )
+
+    def close(self):
+        for shard in self._shards:
+            shard.close(timeout=5.0)
+        self._shards = []
+
+# ─── ⚙️ Config ────────────────────────────────────────────────────────────────
+
+def shards_from_config(config: dict) -> Optional[ShardPool]:
+    """A ShardPool when `daemon_shards` > 0, else None (single-process matching)."""
+    count = int(config.get("daemon_shards", 0))
+    if count <= 0:
+        return None
+    return ShardPool(count, float(config.get("daemon_shard_timeout", DEFAULT_TIMEOUT)))
+
+__all__ = [
+    "ShardPool",
+    "ShardError",
+    "shards_from_config",
+    "shard_of",
+    "shard_of_address",
+    "partition",
+]
@@ -0,0 +1,165 @@
+# ─── 🧾 EvrMail Processed TXID Tracker ────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Set-backed record of transactions the daemon has already handled.
+#   Entries remember the block height they were seen at and are pruned once
+#   they are deeper than a configurable number of blocks. Entries added
+#   before the tip is known (height 0 on a fresh log) take the first tip.
+#
+#   Persistence is an append-only binary log of fixed-size records
+#   (32-byte txid + little-endian uint32 height). Adding a txid appends one
+#   record; the file is only rewritten when pruned records dominate it.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from evrmail.daemon import STORAGE_DIR
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+PROCESSED_TXIDS_LOG = STORAGE_DIR / "processed_txids.bin"
+LEGACY_PROCESSED_TXIDS_FILE = STORAGE_DIR / "processed_txids.json"
+
+DEFAULT_PRUNE_DEPTH = 1000
+
+_RECORD = struct.Struct("<32sI")
+
+# ─── 🧠 Tracker ────────────────────────────────────────────────────────────────
+
+class ProcessedTxids:
+    """Bounded set of processed txids with append-only persistence."""
+
+    def __init__(self, path: Path = PROCESSED_TXIDS_LOG, prune_depth: int = DEFAULT_PRUNE_DEPTH):
+        self.path = Path(path)
+        self.prune_depth = prune_depth
+        self.tip = 0
+        self._seen: Dict[bytes, int] = {}
+        self._records = 0
+        self._lock = threading.Lock()
+        self._load()
+        self._log = open(self.path, "ab")
+
+    # ─── Persistence ───
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        usable = len(data) - len(data) % _RECORD.size   # drop a torn tail record
+        for txid, height in _RECORD.iter_unpack(data[:usable]):
+            self._seen[txid] = height
+            if height > self.tip:
+                self.tip = height
+        self._records = usable // _RECORD.size
+        cutoff = self.tip - self.prune_depth
+        self._seen = {t: h for t, h in self._seen.items() if h >= cutoff}
+        if usable != len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(usable)
+
+    def _append(self, txid: bytes, height: int):
+        self._log.write(_RECORD.pack(txid, height))
+        self._records += 1
+
+    def flush(self):
+        with self._lock:
+            self._log.flush()
+
+    def compact(self):
+        """Rewrite the log so it only holds live entries."""
+        with self._lock:
+            self._log.close()
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                f.write(b"".join(_RECORD.pack(t, h) for t, h in self._seen.items()))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._records = len(self._seen)
+            self._log = open(self.path, "ab")
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+
+    # ─── Set API ───
+
+    def __contains__(self, txid: str) -> bool:
+        return bytes.fromhex(txid) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, txid: str, height: Optional[int] = None) -> bool:
+        """
+        Record `txid` as processed at `height` (the current tip for mempool
+        transactions). Returns True if the txid was not tracked before.
+        """
+        key = bytes.fromhex(txid)
+        height = self.tip if height is None else height
+        with self._lock:
+            previous = self._seen.get(key)
+            if previous == height:
+                return False
+            self._seen[key] = height
+            self._append(key, height)
+        return previous is None
+
+    def set_tip(self, height: Optional[int] = None) -> int:
+        """
+        Advance the chain tip (by one block when `height` is unknown) and
+        prune entries deeper than `prune_depth`. Returns the pruned count.
+        """
+        with self._lock:
+            unknown = self.tip == 0
+            self.tip = self.tip + 1 if height is None else max(self.tip, height)
+            if unknown and height:
+                # Seen before we knew the tip: count them from here, not from genesis
+                for txid in [t for t, h in self._seen.items() if h == 0]:
+                    self._seen[txid] = self.tip
+                    self._append(txid, self.tip)
+            cutoff = self.tip - self.prune_depth
+            stale = [t for t, h in self._seen.items() if h < cutoff]
+            for txid in stale:
+                del self._seen[txid]
+        if self._records > 2 * max(len(self._seen), 1024):
+            self.compact()
+        return len(stale)
+
+    # ─── Legacy import ───
+
+    def import_json(self, path: Path = LEGACY_PROCESSED_TXIDS_FILE, height: Optional[int] = None) -> int:
+        """
+        Import a legacy JSON list of hex txids and retire the file. The
+        txids are recorded at `height` (the chain height, when the caller
+        knows it), else at the tip, which the first set_tip() fills in.
+        """
+        if not path.exists():
+            return 0
+        if height is not None:
+            with self._lock:
+                self.tip = max(self.tip, height)
+        try:
+            txids = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            txids = []
+        count = 0
+        for txid in txids:
+            try:
+                count += self.add(txid)
+            except ValueError:
+                continue
+        self.flush()
+        path.rename(path.with_name(path.name + ".migrated"))
+        return count
+
+__all__ = [
+    "ProcessedTxids",
+    "PROCESSED_TXIDS_LOG",
+    "DEFAULT_PRUNE_DEPTH",
+]
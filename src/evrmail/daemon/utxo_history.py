@@ -0,0 +1,162 @@
+# ─── 🗃 EvrMail UTXO History ──────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Cold storage for spent outputs. Spending a UTXO only marks it spent, so
+#   without this the confirmed pool would grow forever. `compact()` moves
+#   outputs whose spend is buried deeper than the archive depth out of the
+#   live UTXOSet and into their own SQLite database. The hot store, the
+#   balance code and the coin selection code then only see live outputs,
+#   and history can still be queried here on demand.
+#
+#   Keep the archive depth at least as deep as the sync checkpoint window.
+#   Spends inside the window must stay in the live set so a reorg can undo
+#   them.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from evrmail.daemon import UTXO_DIR
+from evrmail.daemon.utxo_set import UTXOSet, CONFIRMED
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+UTXO_HISTORY_FILE = UTXO_DIR / "history.db"
+
+DEFAULT_ARCHIVE_DEPTH = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    txid         TEXT    NOT NULL,
+    vout         INTEGER NOT NULL,
+    address      TEXT,
+    asset        TEXT,
+    block_height INTEGER,
+    spent_height INTEGER,
+    archived_at  REAL    NOT NULL,
+    data         TEXT    NOT NULL,
+    PRIMARY KEY (txid, vout)
+);
+CREATE INDEX IF NOT EXISTS history_address ON history (address);
+CREATE INDEX IF NOT EXISTS history_asset ON history (asset);
+"""
+
+# ─── 🗄 Store ─────────────────────────────────────────────────────────────────
+
+class UTXOHistory:
+    """Append-mostly SQLite archive of spent outputs."""
+
+    def __init__(self, path: Path = UTXO_HISTORY_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def archive(self, utxos: Iterable[dict]) -> int:
+        """Store spent outputs in one transaction. Re-archiving an outpoint replaces it."""
+        now = time.time()
+        rows = [
+            (u["txid"], u["vout"], u.get("address"), u.get("asset"),
+             u.get("block_height"), u.get("spent_height"), now, json.dumps(u))
+            for u in utxos
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                cur.executemany(
+                    "INSERT OR REPLACE INTO history "
+                    "(txid, vout, address, asset, block_height, spent_height, archived_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    # ─── Queries ───
+
+    def _select(self, where: str = "", params: tuple = (), limit: int = None) -> List[dict]:
+        sql = f"SELECT data FROM history {where} ORDER BY spent_height DESC, block_height DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, txid: str, vout: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM history WHERE txid = ? AND vout = ?", (txid, vout)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def by_address(self, address: str, limit: int = None) -> List[dict]:
+        return self._select("WHERE address = ?", (address,), limit)
+
+    def by_asset(self, asset: Optional[str], limit: int = None) -> List[dict]:
+        if asset is None:
+            return self._select("WHERE asset IS NULL", (), limit)
+        return self._select("WHERE asset = ?", (asset,), limit)
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        return self._select(limit=limit)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+# ─── 🧹 Compaction ────────────────────────────────────────────────────────────
+
+def compact(utxo_set: UTXOSet, history: UTXOHistory, tip_height: int,
+            depth: int = DEFAULT_ARCHIVE_DEPTH) -> int:
+    """
+    Move confirmed outputs spent at or below `tip_height - depth` into
+    `history`. Outputs spent only in the mempool stay live. Returns how many
+    were archived.
+    """
+    cutoff = tip_height - depth
+    buried = [
+        u for u in utxo_set.iter(CONFIRMED)
+        if u.get("spent") and u.get("spent_height") is not None and u["spent_height"] <= cutoff
+    ]
+    # Archive first: a crash before the removal is journaled just re-archives
+    history.archive(buried)
+    for utxo in buried:
+        utxo_set.remove(utxo["txid"], utxo["vout"])
+    return len(buried)
+
+# ─── 🔌 Shared Store ─────────────────────────────────────────────────────────
+
+_history: Optional[UTXOHistory] = None
+_history_lock = threading.Lock()
+
+def get_utxo_history() -> UTXOHistory:
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = UTXOHistory()
+        return _history
+
+__all__ = [
+    "UTXOHistory",
+    "get_utxo_history",
+    "compact",
+    "UTXO_HISTORY_FILE",
+    "DEFAULT_ARCHIVE_DEPTH",
+]
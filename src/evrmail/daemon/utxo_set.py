@@ -0,0 +1,258 @@
+# ─── 📦 EvrMail UTXO Set ──────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   In-memory UTXO set shared by the daemon, balance calculation and the
+#   send builders. Outputs are keyed by outpoint (txid, vout) with secondary
+#   indexes by address, asset and txid, so spends, confirmations and balance
+#   lookups never scan the whole pool.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from evrmail.daemon import UTXO_DIR
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+# Legacy JSON pools, now only used for migration and debug exports
+MEMPOOL_UTXO_FILE = UTXO_DIR / "mempool.json"
+CONFIRMED_UTXO_FILE = UTXO_DIR / "confirmed.json"
+
+MEMPOOL = "mempool"
+CONFIRMED = "confirmed"
+POOLS = (MEMPOOL, CONFIRMED)
+
+Outpoint = Tuple[str, int]
+
+LOAD_ATTEMPTS = 5
+
+# ─── 🧠 UTXO Set ───────────────────────────────────────────────────────────────
+
+class UTXOSet:
+    """Outpoint-keyed UTXO set with address, asset and txid indexes."""
+
+    def __init__(self):
+        self._utxos: Dict[Outpoint, dict] = {}
+        self._pool: Dict[Outpoint, str] = {}
+        self._by_address: Dict[str, set] = {}
+        self._by_asset: Dict[Optional[str], set] = {}
+        self._by_txid: Dict[str, set] = {}
+        self._dirty: set = set()
+
+    # ─── Index helpers ───
+
+    @staticmethod
+    def _index_add(index: dict, key, outpoint: Outpoint):
+        index.setdefault(key, set()).add(outpoint)
+
+    @staticmethod
+    def _index_discard(index: dict, key, outpoint: Outpoint):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(outpoint)
+            if not bucket:
+                del index[key]
+
+    # ─── Mutation ───
+
+    def add(self, utxo: dict, pool: str = CONFIRMED) -> dict:
+        """Insert or replace a UTXO in the given pool."""
+        outpoint = (utxo["txid"], utxo["vout"])
+        if outpoint in self._utxos:
+            self.remove(*outpoint)
+        self._utxos[outpoint] = utxo
+        self._pool[outpoint] = pool
+        self._index_add(self._by_address, utxo.get("address"), outpoint)
+        self._index_add(self._by_asset, utxo.get("asset"), outpoint)
+        self._index_add(self._by_txid, utxo["txid"], outpoint)
+        self._dirty.add(outpoint)
+        return utxo
+
+    def remove(self, txid: str, vout: int) -> Optional[dict]:
+        """Drop a UTXO from the set and all indexes."""
+        outpoint = (txid, vout)
+        utxo = self._utxos.pop(outpoint, None)
+        if utxo is None:
+            return None
+        del self._pool[outpoint]
+        self._index_discard(self._by_address, utxo.get("address"), outpoint)
+        self._index_discard(self._by_asset, utxo.get("asset"), outpoint)
+        self._index_discard(self._by_txid, txid, outpoint)
+        self._dirty.add(outpoint)
+        return utxo
+
+    def mark_spent(self, txid: str, vout: int) -> Optional[Tuple[str, dict]]:
+        """Flag an outpoint as spent. Returns (pool, utxo) or None if unknown."""
+        outpoint = (txid, vout)
+        utxo = self._utxos.get(outpoint)
+        if utxo is None:
+            return None
+        utxo["spent"] = True
+        self._dirty.add(outpoint)
+        return self._pool[outpoint], utxo
+
+    def update(self, txid: str, vout: int, **fields) -> Optional[dict]:
+        """Set fields on a tracked UTXO so the change is persisted."""
+        outpoint = (txid, vout)
+        utxo = self._utxos.get(outpoint)
+        if utxo is None:
+            return None
+        utxo.update(fields)
+        self._dirty.add(outpoint)
+        return utxo
+
+    def confirm_tx(self, txid: str, height: int = None) -> bool:
+        """Move every mempool output of `txid` into the confirmed pool."""
+        moved = False
+        for outpoint in self._by_txid.get(txid, ()):
+            if self._pool[outpoint] == MEMPOOL:
+                self._pool[outpoint] = CONFIRMED
+                self._utxos[outpoint]["confirmations"] = 1
+                if height is not None:
+                    self._utxos[outpoint]["block_height"] = height
+                self._dirty.add(outpoint)
+                moved = True
+        return moved
+
+    def remove_tx(self, txid: str, pool: str = None) -> List[dict]:
+        """Drop every output of `txid` (optionally only those in `pool`)."""
+        removed = []
+        for outpoint in list(self._by_txid.get(txid, ())):
+            if pool is None or self._pool[outpoint] == pool:
+                removed.append(self.remove(*outpoint))
+        return removed
+
+    def clear_pool(self, pool: str):
+        """Remove every UTXO held in `pool`."""
+        for outpoint in [op for op, p in self._pool.items() if p == pool]:
+            self.remove(*outpoint)
+
+    def take_dirty(self) -> set:
+        """Return and reset the outpoints changed since the last call."""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    # ─── Lookup ───
+
+    def get(self, txid: str, vout: int) -> Optional[dict]:
+        return self._utxos.get((txid, vout))
+
+    def pool_of(self, txid: str, vout: int) -> Optional[str]:
+        return self._pool.get((txid, vout))
+
+    def has_tx(self, txid: str) -> bool:
+        return bool(self._by_txid.get(txid))
+
+    def __contains__(self, outpoint: Outpoint) -> bool:
+        return tuple(outpoint) in self._utxos
+
+    def __len__(self) -> int:
+        return len(self._utxos)
+
+    def count(self, pool: str = None) -> int:
+        if pool is None:
+            return len(self._utxos)
+        return sum(1 for p in self._pool.values() if p == pool)
+
+    def _select(self, outpoints, pool: str = None, include_spent: bool = False) -> List[dict]:
+        result = []
+        for outpoint in outpoints:
+            utxo = self._utxos[outpoint]
+            if pool is not None and self._pool[outpoint] != pool:
+                continue
+            if not include_spent and utxo.get("spent", False):
+                continue
+            result.append(utxo)
+        return result
+
+    def iter(self, pool: str = None, include_spent: bool = True) -> Iterator[dict]:
+        """Iterate UTXOs, optionally restricted to one pool and/or unspent outputs."""
+        for outpoint, utxo in self._utxos.items():
+            if pool is not None and self._pool[outpoint] != pool:
+                continue
+            if not include_spent and utxo.get("spent", False):
+                continue
+            yield utxo
+
+    def by_address(self, address: str, pool: str = None, include_spent: bool = False) -> List[dict]:
+        return self._select(self._by_address.get(address, ()), pool, include_spent)
+
+    def by_asset(self, asset: Optional[str], pool: str = None, include_spent: bool = False) -> List[dict]:
+        """UTXOs carrying `asset`; pass None for plain EVR outputs."""
+        return self._select(self._by_asset.get(asset, ()), pool, include_spent)
+
+    def addresses(self) -> List[str]:
+        return [a for a in self._by_address if a is not None]
+
+    def balances(self) -> dict:
+        """
+        Unspent balances in the `calculate_balances` format:
+        {"evr": {address: amount}, "assets": {asset: {address: amount}}}
+        """
+        balances = {"evr": {}, "assets": {}}
+        for utxo in self.iter(include_spent=False):
+            addr = utxo.get("address")
+            asset_name = utxo.get("asset")
+            amount = utxo.get("amount", 0) or 0
+            if asset_name is None:
+                balances["evr"][addr] = balances["evr"].get(addr, 0) + amount
+            else:
+                per_asset = balances["assets"].setdefault(asset_name, {})
+                per_asset[addr] = per_asset.get(addr, 0) + amount
+        return balances
+
+    # ─── Legacy pool format ───
+
+    def to_dict(self) -> dict:
+        """Export as {"mempool": {address: [utxo, ...]}, "confirmed": {...}}."""
+        pools = {pool: {} for pool in POOLS}
+        for outpoint, utxo in self._utxos.items():
+            pools[self._pool[outpoint]].setdefault(utxo.get("address"), []).append(utxo)
+        return pools
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UTXOSet":
+        utxo_set = cls()
+        for pool in POOLS:
+            for address, utxos in (data.get(pool) or {}).items():
+                for utxo in utxos:
+                    utxo.setdefault("address", address)
+                    utxo_set.add(utxo, pool)
+        return utxo_set
+
+# ─── 💾 Persistence ───────────────────────────────────────────────────────────
+
+def load_utxo_set() -> UTXOSet:
+    """
+    Load the UTXO set: the on-disk snapshot plus the journaled deltas the
+    daemon has committed but not yet folded into it.
+    """
+    from evrmail.daemon.utxo_store import get_utxo_store
+    from evrmail.daemon.journal import generation, read_journal, replay_records
+    store = get_utxo_store()
+    for _ in range(LOAD_ATTEMPTS):
+        # A snapshot between reading the log and the store would have the old
+        # log replayed over newer rows; the generation changes when one runs
+        before = generation(store)
+        records = read_journal()
+        utxo_set = store.load()
+        if generation(store) == before:
+            break
+    replay_records(utxo_set, records)
+    utxo_set.take_dirty()
+    return utxo_set
+
+def save_utxo_set(utxo_set: UTXOSet, full: bool = False):
+    """Persist changed outpoints (or everything with `full=True`)."""
+    from evrmail.daemon.utxo_store import get_utxo_store
+    get_utxo_store().save(utxo_set, full=full)
+
+__all__ = [
+    "UTXOSet",
+    "load_utxo_set",
+    "save_utxo_set",
+    "MEMPOOL",
+    "CONFIRMED",
+    "POOLS",
+    "MEMPOOL_UTXO_FILE",
+    "CONFIRMED_UTXO_FILE",
+]
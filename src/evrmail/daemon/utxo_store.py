@@ -0,0 +1,212 @@
+# ─── 💾 EvrMail UTXO Store ────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Transactional on-disk storage for the UTXO set. A single SQLite database
+#   in WAL mode replaces the confirmed.json / mempool.json rewrites: saving a
+#   UTXOSet only touches the rows whose outpoints changed since the last save.
+#   The legacy JSON files are imported once and kept as a debug export format.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+from evrmail.daemon import UTXO_DIR
+from evrmail.daemon.utxo_set import (
+    UTXOSet, MEMPOOL, CONFIRMED, POOLS,
+    MEMPOOL_UTXO_FILE, CONFIRMED_UTXO_FILE
+)
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+UTXO_DB_FILE = UTXO_DIR / "utxos.db"
+UTXO_EXPORT_DIR = UTXO_DIR / "export"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS utxos (
+    txid    TEXT    NOT NULL,
+    vout    INTEGER NOT NULL,
+    pool    TEXT    NOT NULL,
+    address TEXT,
+    asset   TEXT,
+    spent   INTEGER NOT NULL DEFAULT 0,
+    data    TEXT    NOT NULL,
+    PRIMARY KEY (txid, vout)
+);
+CREATE INDEX IF NOT EXISTS utxos_address ON utxos (address);
+CREATE INDEX IF NOT EXISTS utxos_asset ON utxos (asset);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# ─── 🗄 Store ─────────────────────────────────────────────────────────────────
+
+class UTXOStore:
+    """SQLite-backed UTXO storage with row-level writes."""
+
+    def __init__(self, path: Path = UTXO_DB_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ─── Meta ───
+
+    def get_meta(self, key: str, default: str = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ─── Read ───
+
+    def load(self) -> UTXOSet:
+        """Build a UTXOSet from every stored row."""
+        utxo_set = UTXOSet()
+        with self._lock:
+            rows = self._conn.execute("SELECT pool, data FROM utxos").fetchall()
+        for pool, data in rows:
+            utxo_set.add(json.loads(data), pool)
+        utxo_set.take_dirty()
+        return utxo_set
+
+    def count(self, pool: str = None) -> int:
+        with self._lock:
+            if pool is None:
+                return self._conn.execute("SELECT COUNT(*) FROM utxos").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM utxos WHERE pool = ?", (pool,)).fetchone()[0]
+
+    # ─── Write ───
+
+    @staticmethod
+    def _row(utxo: dict, pool: str) -> tuple:
+        return (
+            utxo["txid"], utxo["vout"], pool, utxo.get("address"), utxo.get("asset"),
+            1 if utxo.get("spent", False) else 0, json.dumps(utxo)
+        )
+
+    def _write(self, upserts: Iterable[tuple], deletes: Iterable[tuple], truncate: bool = False,
+               meta: dict = None):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                if truncate:
+                    cur.execute("DELETE FROM utxos")
+                cur.executemany(
+                    "INSERT OR REPLACE INTO utxos (txid, vout, pool, address, asset, spent, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    upserts
+                )
+                cur.executemany("DELETE FROM utxos WHERE txid = ? AND vout = ?", deletes)
+                if meta:
+                    cur.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items())
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def save(self, utxo_set: UTXOSet, full: bool = False):
+        """
+        Persist the outpoints changed since the last save in one transaction.
+        With `full=True` the table is rewritten to match the set exactly.
+        """
+        dirty = utxo_set.take_dirty()
+        if full:
+            upserts = [self._row(u, utxo_set.pool_of(u["txid"], u["vout"])) for u in utxo_set.iter()]
+            self._write(upserts, [], truncate=True)
+            return
+
+        changes = {}
+        for txid, vout in dirty:
+            utxo = utxo_set.get(txid, vout)
+            changes[(txid, vout)] = None if utxo is None else (utxo_set.pool_of(txid, vout), utxo)
+        self.apply(changes)
+
+    def apply(self, changes: dict, meta: dict = None):
+        """
+        Apply {(txid, vout): (pool, utxo) | None} in one transaction;
+        None deletes the row. `meta` values are written in the same transaction.
+        """
+        upserts, deletes = [], []
+        for outpoint, entry in changes.items():
+            if entry is None:
+                deletes.append(outpoint)
+            else:
+                pool, utxo = entry
+                upserts.append(self._row(utxo, pool))
+        if upserts or deletes or meta:
+            self._write(upserts, deletes, meta=meta)
+
+    # ─── JSON import / export ───
+
+    def migrate_json(self, mempool_file: Path = MEMPOOL_UTXO_FILE,
+                     confirmed_file: Path = CONFIRMED_UTXO_FILE) -> int:
+        """
+        One-shot import of the legacy JSON pools. The files are renamed to
+        *.json.migrated afterwards so the import never runs twice.
+        """
+        if self.get_meta("json_migrated"):
+            return 0
+        data = {}
+        for pool, path in ((MEMPOOL, mempool_file), (CONFIRMED, confirmed_file)):
+            if path.exists():
+                try:
+                    data[pool] = json.loads(path.read_text())
+                except json.JSONDecodeError:
+                    data[pool] = {}
+        utxo_set = UTXOSet.from_dict(data)
+        if len(utxo_set):
+            self.save(utxo_set)
+        for path in (mempool_file, confirmed_file):
+            if path.exists():
+                path.rename(path.with_name(path.name + ".migrated"))
+        self.set_meta("json_migrated", "1")
+        return len(utxo_set)
+
+    def export_json(self, out_dir: Path = UTXO_EXPORT_DIR) -> dict:
+        """Write mempool.json / confirmed.json snapshots for debugging."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        pools = self.load().to_dict()
+        paths = {}
+        for pool in POOLS:
+            path = out_dir / f"{pool}.json"
+            path.write_text(json.dumps(pools[pool], indent=2))
+            paths[pool] = path
+        return paths
+
+# ─── 🔌 Shared Store ─────────────────────────────────────────────────────────
+
+_store: Optional[UTXOStore] = None
+_store_lock = threading.Lock()
+
+def get_utxo_store() -> UTXOStore:
+    """Return the process-wide store, migrating legacy JSON on first open."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UTXOStore()
+            _store.migrate_json()
+        return _store
+
+__all__ = [
+    "UTXOStore",
+    "get_utxo_store",
+    "UTXO_DB_FILE",
+    "UTXO_EXPORT_DIR",
+]
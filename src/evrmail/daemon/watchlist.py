@@ -0,0 +1,101 @@
+# ─── 🎯 EvrMail Script Watchlist ──────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Raw-bytes prefilter for transaction outputs. Known addresses are reduced
+#   once to their 20-byte pubkey / script hashes so `process_transaction` can
+#   reject outputs that are not ours without decoding the script or
+#   base58-encoding an address. Only hits and asset outputs carrying an IPFS
+#   message go through the full `wallet.script.decode`.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import base58
+
+# ─── 🔢 Script Layout ─────────────────────────────────────────────────────────
+
+P2PKH_VERSION = 0x21   # addresses starting with E
+P2SH_VERSION = 0x5c    # addresses starting with e
+
+OP_DUP = 0x76
+OP_HASH160 = 0xa9
+OP_EQUALVERIFY = 0x88
+OP_CHECKSIG = 0xac
+OP_EQUAL = 0x87
+OP_EVR_ASSET = 0xc0
+
+# ─── 🧠 Watchlist ──────────────────────────────────────────────────────────────
+
+class Watchlist:
+    """Hash160 sets for the addresses the daemon is watching."""
+
+    def __init__(self, addresses: Iterable[str] = ()):
+        self.pubkey_hashes: Dict[bytes, str] = {}
+        self.script_hashes: Dict[bytes, str] = {}
+        for address in addresses:
+            self.add(address)
+
+    def add(self, address: str) -> bool:
+        """Watch `address`. Returns False if it isn't a valid P2PKH/P2SH address."""
+        try:
+            raw = base58.b58decode_check(address)
+        except ValueError:
+            return False
+        if len(raw) != 21:
+            return False
+        if raw[0] == P2PKH_VERSION:
+            self.pubkey_hashes[raw[1:]] = address
+        elif raw[0] == P2SH_VERSION:
+            self.script_hashes[raw[1:]] = address
+        else:
+            return False
+        return True
+
+    def discard(self, address: str):
+        """Stop watching `address`."""
+        try:
+            raw = base58.b58decode_check(address)
+        except ValueError:
+            return
+        self.pubkey_hashes.pop(raw[1:], None)
+        self.script_hashes.pop(raw[1:], None)
+
+    def copy(self) -> "Watchlist":
+        clone = Watchlist()
+        clone.pubkey_hashes = dict(self.pubkey_hashes)
+        clone.script_hashes = dict(self.script_hashes)
+        return clone
+
+    def __len__(self) -> int:
+        return len(self.pubkey_hashes) + len(self.script_hashes)
+
+    def match(self, script: bytes) -> Tuple[Optional[str], bool]:
+        """
+        Classify a raw scriptPubKey.
+        Returns (watched address or None, whether it carries an IPFS message).
+        """
+        size = len(script)
+        if size >= 25 and script[0] == OP_DUP and script[1] == OP_HASH160 and script[2] == 0x14 \
+                and script[23] == OP_EQUALVERIFY and script[24] == OP_CHECKSIG:
+            address = self.pubkey_hashes.get(bytes(script[3:23]))
+            return address, size > 25 and _has_message(script, 25)
+        if size >= 23 and script[0] == OP_HASH160 and script[1] == 0x14 and script[-1] == OP_EQUAL:
+            return self.script_hashes.get(bytes(script[2:22])), False
+        if size and script[0] == OP_EVR_ASSET:
+            return None, _has_message(script, 0)
+        return None, False
+
+def _has_message(script: bytes, offset: int) -> bool:
+    """True if the OP_EVR_ASSET payload at `offset` ends with an IPFS hash."""
+    if script[offset] != OP_EVR_ASSET or len(script) < offset + 2:
+        return False
+    start = offset + 2
+    payload = script[start:start + script[offset + 1]]
+    if payload[:3] != b"evr" or len(payload) < 5:
+        return False
+    i = 5 + payload[4] + 8     # 'evr' + op, name length, name, amount
+    return len(payload) > i + 1 and payload[i] == 0x12 and payload[i + 1] == 0x20
+
+__all__ = [
+    "Watchlist",
+]
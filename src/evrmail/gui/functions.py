@@ -5,7 +5,6 @@
 import json
 import time
 import logging
-import threading
 from pathlib import Path
 from datetime import datetime
 from PyQt5.QtCore import QObject, pyqtSlot, pyqtSignal
@@ -24,14 +23,23 @@ from evrmail.utils import (
 from evrmail.daemon import start_daemon_threaded
 from evrmail.config import load_config, save_config
 from evrmail.crypto import validate_evr_address
+from evrmail.utils.events import subscribe, publish as publish_event, CONTACT, TOPICS
 from evrmail.daemon import EVRMailDaemon
 
 # QWebChannel wrapper class for all functions
 class WebUIBridge(QObject):
     """Bridge class to expose functions to the web UI via QWebChannel"""
     
+    # (topic, JSON payload) for wallet/address/contact/UTXO changes
+    stateChanged = pyqtSignal(str, str)
+    
     def __init__(self):
         super().__init__()
+        # Forward event bus changes so the UI refreshes only what changed
+        self._unsubscribe_events = [subscribe(topic, self._on_event) for topic in TOPICS]
+        
+    def _on_event(self, topic, payload):
+        self.stateChanged.emit(topic, json.dumps(payload, default=str))
         
     @pyqtSlot(str)
     def log(self, message):
@@ -610,13 +618,8 @@ def _start_daemon():
     def daemon_log_callback(message):
         gui_log("info", f"Daemon: {message}")
     
-    # Start the daemon in a thread
-    _daemon_thread = threading.Thread(
-        target=start_daemon_threaded,
-        args=(daemon_log_callback, False),
-        daemon=True
-    )
-    _daemon_thread.start()
+    # start_daemon_threaded already runs the daemon on its own thread
+    _daemon_thread = start_daemon_threaded(daemon_log_callback, False)
     gui_log("info", "Daemon thread started")
 
 # Start daemon on module import
@@ -777,50 +780,23 @@ def get_wallet_list():
 def get_utxos():
     """Get UTXOs for the wallet"""
     try:
-        # Load UTXOs from cache files
-        utxo_dir = Path.home() / ".evrmail" / "utxos"
-        confirmed_file = utxo_dir / "confirmed.json"
-        mempool_file = utxo_dir / "mempool.json"
+        # Load UTXOs from the shared UTXO set
+        from evrmail.daemon.utxo_set import load_utxo_set, CONFIRMED, MEMPOOL
+        utxo_set = load_utxo_set()
         
         utxos = []
-        
-        # Load confirmed UTXOs
-        if confirmed_file.exists():
-            try:
-                confirmed = json.loads(confirmed_file.read_text())
-                for address, address_utxos in confirmed.items():
-                    for utxo in address_utxos:
-                        utxos.append({
-                            "txid": utxo["txid"],
-                            "vout": utxo["vout"],
-                            "address": address,
-                            "asset": utxo.get("asset", "EVR"),
-                            "amount": utxo["amount"] / 1e8 if isinstance(utxo["amount"], int) else utxo["amount"],
-                            "confirmations": utxo.get("confirmations", 1),
-                            "status": "Confirmed",
-                            "spent": utxo.get("spent", False)
-                        })
-            except Exception as e:
-                gui_log("error", f"Error loading confirmed UTXOs: {str(e)}")
-        
-        # Load mempool UTXOs
-        if mempool_file.exists():
-            try:
-                mempool = json.loads(mempool_file.read_text())
-                for address, address_utxos in mempool.items():
-                    for utxo in address_utxos:
-                        utxos.append({
-                            "txid": utxo["txid"],
-                            "vout": utxo["vout"],
-                            "address": address,
-                            "asset": utxo.get("asset", "EVR"),
-                            "amount": utxo["amount"] / 1e8 if isinstance(utxo["amount"], int) else utxo["amount"],
-                            "confirmations": 0,
-                            "status": "Unconfirmed",
-                            "spent": utxo.get("spent", False)
-                        })
-            except Exception as e:
-                gui_log("error", f"Error loading mempool UTXOs: {str(e)}")
+        for pool, label in ((CONFIRMED, "Confirmed"), (MEMPOOL, "Unconfirmed")):
+            for utxo in utxo_set.iter(pool):
+                utxos.append({
+                    "txid": utxo["txid"],
+                    "vout": utxo["vout"],
+                    "address": utxo.get("address"),
+                    "asset": utxo.get("asset", "EVR"),
+                    "amount": utxo["amount"] / 1e8 if isinstance(utxo["amount"], int) else utxo["amount"],
+                    "confirmations": utxo.get("confirmations", 1) if pool == CONFIRMED else 0,
+                    "status": label,
+                    "spent": utxo.get("spent", False)
+                })
         
         return utxos
     except Exception as e:
@@ -1018,8 +994,6 @@ def navigate_browser(url):
         
         # For EVR domains, fetch from IPFS via blockchain
         if url.endswith(".evr"):
-            from evrmail import rpc_client
-            
             # Extract domain name (strip .evr extension)
             domain_parts = url.split('.')
             domain_name = domain_parts[0].upper()
@@ -1027,11 +1001,17 @@ def navigate_browser(url):
             gui_log("info", f"Looking up EVR domain: {domain_name}")
             
             # Get asset data for the domain using RPC
-            rpc = rpc_client
+            from evrmail.utils.rpc import get_rpc
+            rpc = get_rpc()
             
             try:
-                # Get asset data for the domain
-                asset_data = rpc.getassetdata(domain_name)
+                # Asset data and owners in one batch round trip
+                asset_data, owner_addresses = rpc.batch(
+                    [("getassetdata", [domain_name]), ("listaddressesbyasset", [domain_name])],
+                    raise_errors=False
+                )
+                if isinstance(asset_data, Exception):
+                    raise asset_data
                 
                 if not asset_data:
                     return {
@@ -1041,8 +1021,9 @@ def navigate_browser(url):
                 
                 gui_log("info", f"Asset data for {domain_name}: {asset_data}")
                 
-                # Get addresses that own this asset
-                owner_addresses = rpc.listaddressesbyasset(domain_name)
+                # Addresses that own this asset
+                if isinstance(owner_addresses, Exception):
+                    raise owner_addresses
                 if not owner_addresses:
                     return {
                         "success": False,
@@ -1502,12 +1483,17 @@ def get_message_stats():
 def get_network_status():
     """Get network connection status"""
     try:
-        from evrmail import rpc_client
+        from evrmail.utils.rpc import get_rpc
         
-        rpc = rpc_client
+        rpc = get_rpc()
         
         try:
-            info = rpc.getnetworkinfo()
+            # One round trip for both; a failed blockchain info only zeroes the height
+            info, blockchain_info = rpc.batch(
+                [("getnetworkinfo", []), ("getblockchaininfo", [])], raise_errors=False
+            )
+            if isinstance(info, Exception):
+                raise info
             
             # Extract network from networks list if present
             network_name = "unknown"
@@ -1519,12 +1505,11 @@ def get_network_status():
                         break
             
             # Get blockchain info for height
-            try:
-                blockchain_info = rpc.getblockchaininfo()
-                height = blockchain_info.get("blocks", 0)
-            except Exception as e:
-                gui_log("error", f"Error getting blockchain info: {e}")
+            if isinstance(blockchain_info, Exception):
+                gui_log("error", f"Error getting blockchain info: {blockchain_info}")
                 height = 0
+            else:
+                height = blockchain_info.get("blocks", 0)
             
             # Log for debugging
             gui_log("debug", f"Network status: connected to {network_name} with {info.get('connections', 0)} peers")
@@ -1763,6 +1748,7 @@ def remove_contact(address: str):
         del contacts[address]
         config["contacts"] = contacts
         save_config(config)
+        publish_event(CONTACT, action="removed", address=address)
         return {"success": True}
         
     except Exception as e:
@@ -1792,6 +1778,7 @@ def accept_contact_request(address: str):
         config["contact_requests"] = requests
         config["contacts"] = contacts
         save_config(config)
+        publish_event(CONTACT, action="accepted", address=address)
         
         return {"success": True}
         
@@ -1815,6 +1802,7 @@ def reject_contact_request(address: str):
         # Update config
         config["contact_requests"] = requests
         save_config(config)
+        publish_event(CONTACT, action="rejected", address=address)
         
         return {"success": True}
         
@@ -11,7 +11,9 @@ from .logger import (
     APP, GUI, DAEMON, WALLET, CHAIN, NETWORK, DEBUG,
     set_enabled_categories,
     set_colored_output,
-    set_daemon_console_output
+    set_daemon_console_output,
+    set_category_level,
+    is_enabled
 )
 
 # Log entry storage - for use by the GUI
@@ -59,5 +61,7 @@ __all__ = [
     "APP", "GUI", "DAEMON", "WALLET", "CHAIN", "NETWORK", "DEBUG",
     "set_enabled_categories",
     "set_colored_output",
-    "set_daemon_console_output"
+    "set_daemon_console_output",
+    "set_category_level",
+    "is_enabled"
 ]
\ No newline at end of file
@@ -20,6 +20,45 @@ def get_channel_pubkey(channel_name):
     address_info = client.validateaddress(address)
     return address_info.get("pubkey", address_info.get("scriptPubKey"))
 
+def encrypt_to_pubkey(plaintext: bytes, recipient_pubkey_hex: str, ephemeral_private_key=None, nonce: bytes = None) -> dict:
+    """
+    ECDH with a fresh ephemeral key, HKDF-SHA256, then AES-GCM; the scheme
+    `decrypt_message` reverses. Returns the base64 `ephemeral_pubkey`,
+    `nonce` and `ciphertext` fields. Pass `ephemeral_private_key` / `nonce`
+    only for reproducible test data.
+    """
+    recipient_pubkey_bytes = bytes.fromhex(recipient_pubkey_hex)
+    recipient_pubkey = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), recipient_pubkey_bytes)
+
+    # Generate ephemeral private key
+    if ephemeral_private_key is None:
+        ephemeral_private_key = ec.generate_private_key(ec.SECP256K1())
+    shared_key = ephemeral_private_key.exchange(ec.ECDH(), recipient_pubkey)
+
+    # Derive a symmetric key
+    derived_key = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"evrmail-encryption"
+    ).derive(shared_key)
+
+    aesgcm = AESGCM(derived_key)
+    if nonce is None:
+        nonce = os.urandom(12)
+    ciphertext = aesgcm.encrypt(nonce, plaintext, None)
+
+    # Return ephemeral pubkey, nonce, and ciphertext
+    ephemeral_pubkey_bytes = ephemeral_private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.X962,
+        format=serialization.PublicFormat.UncompressedPoint
+    )
+    return {
+        "ephemeral_pubkey": base64.b64encode(ephemeral_pubkey_bytes).decode(),
+        "nonce": base64.b64encode(nonce).decode(),
+        "ciphertext": base64.b64encode(ciphertext).decode(),
+    }
+
 def encrypt_message(message_json: dict, to_address: str, from_address: str=config.get('active_address')):
 
     # First we outta encode the content in base64
@@ -63,30 +102,7 @@ def encrypt_message(message_json: dict, to_address: str, from_address: str=confi
             raise Exception(f"{to} is not in your contacts")
             
     recipient_pubkey_hex = contacts.get(to_address).get('pubkey')
-    recipient_pubkey_bytes = bytes.fromhex(recipient_pubkey_hex)
-    recipient_pubkey = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), recipient_pubkey_bytes)
-
-    # Generate ephemeral private key
-    ephemeral_private_key = ec.generate_private_key(ec.SECP256K1())
-    shared_key = ephemeral_private_key.exchange(ec.ECDH(), recipient_pubkey)
-
-    # Derive a symmetric key
-    derived_key = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=b"evrmail-encryption"
-    ).derive(shared_key)
-
-    aesgcm = AESGCM(derived_key)
-    nonce = os.urandom(12)
-    ciphertext = aesgcm.encrypt(nonce, str(message_json).encode(), None)
-
-    # Return ephemeral pubkey, nonce, and ciphertext
-    ephemeral_pubkey_bytes = ephemeral_private_key.public_key().public_bytes(
-        encoding=serialization.Encoding.X962,
-        format=serialization.PublicFormat.UncompressedPoint
-    )
+    encrypted = encrypt_to_pubkey(str(message_json).encode(), recipient_pubkey_hex)
 
     address_data = get_address(from_address)
     from_publickey = address_data.get("public_key")
@@ -96,9 +112,9 @@ def encrypt_message(message_json: dict, to_address: str, from_address: str=confi
         "from": None,
         "to_pubkey": recipient_pubkey_hex,
         "from_pubkey": from_publickey,
-        "ephemeral_pubkey": base64.b64encode(ephemeral_pubkey_bytes).decode(),
-        "nonce": base64.b64encode(nonce).decode(),
-        "ciphertext": base64.b64encode(ciphertext).decode(),
+        "ephemeral_pubkey": encrypted["ephemeral_pubkey"],
+        "nonce": encrypted["nonce"],
+        "ciphertext": encrypted["ciphertext"],
         "signature": message_json.get("signature")
     }
     return encrypted_payload
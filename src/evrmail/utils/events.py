@@ -0,0 +1,67 @@
+# ─── 📣 EvrMail Event Bus ─────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   In-process publish/subscribe for state changes. The module that changes
+#   something publishes it here, and the daemon and GUI update themselves
+#   from the event. They no longer reload everything because a file changed.
+#   Subscribers run synchronously on the publisher's thread. A subscriber
+#   that raises is logged and skipped.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import threading
+from typing import Callable, Dict, List
+
+# ─── 🏷 Topics ─────────────────────────────────────────────────────────────────
+
+WALLET = "wallet"      # wallet created, saved or removed        {action, wallet}
+ADDRESS = "address"    # addresses derived / high-water moved    {action, wallet, addresses}
+CONTACT = "contact"    # contact or contact request changed      {action, address}
+UTXO = "utxo"          # UTXO set changed                        {action, txid, ...}
+
+TOPICS = (WALLET, ADDRESS, CONTACT, UTXO)
+
+# ─── 🧠 Registry ──────────────────────────────────────────────────────────────
+
+_subscribers: Dict[str, List[Callable]] = {}
+_lock = threading.Lock()
+
+def subscribe(topic: str, callback: Callable[[str, dict], None]) -> Callable:
+    """
+    Call `callback(topic, payload)` for every event on `topic` (None for all).
+    Returns an unsubscribe function.
+    """
+    key = topic or "all"
+    with _lock:
+        _subscribers.setdefault(key, []).append(callback)
+
+    def unsubscribe():
+        with _lock:
+            if callback in _subscribers.get(key, []):
+                _subscribers[key].remove(callback)
+
+    return unsubscribe
+
+def publish(topic: str, **payload) -> int:
+    """Deliver an event to its subscribers. Returns how many were called."""
+    with _lock:
+        callbacks = list(_subscribers.get(topic, ())) + list(_subscribers.get("all", ()))
+    for callback in callbacks:
+        try:
+            callback(topic, payload)
+        except Exception as e:
+            from evrmail.utils import app as app_log
+            app_log("error", f"⚠️ Event subscriber failed on {topic}: {e}", details={
+                "topic": topic,
+                "payload": payload
+            })
+    return len(callbacks)
+
+__all__ = [
+    "subscribe",
+    "publish",
+    "WALLET",
+    "ADDRESS",
+    "CONTACT",
+    "UTXO",
+    "TOPICS",
+]
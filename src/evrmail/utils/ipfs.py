@@ -11,15 +11,27 @@ import urllib.request
 import requests
 import base64
 import json
+from evrmail.utils.ipfs_cache import get_ipfs_cache
+from evrmail.utils.metrics import histogram
+
+IPFS_FETCH_SECONDS = histogram(
+    "evrmail_ipfs_fetch_seconds", "IPFS JSON fetch latency by source (cache, local, gateway) and outcome",
+    ("source", "outcome")
+)
 
 # evrmail/utils/ipfs.py
 
 def fetch_ipfs_text(cid: str) -> str:
+    cache = get_ipfs_cache()
+    cached = cache.get_text(cid)
+    if cached is not None:
+        return cached[1]
     try:
         # 🚀 Using public IPFS gateway
         url = f"https://ipfs.io/ipfs/{cid}"
         response = requests.get(url)
         if response.ok:
+            cache.put(cid, response.text, response.headers.get("Content-Type"))
             return response.text
         else:
             return None
@@ -52,6 +64,13 @@ def fetch_ipfs_resource(hash_or_path, use_ipns=False, timeout=10):
     hash_or_path = hash_or_path.strip()
     hash_or_path = hash_or_path.replace('ipfs://', '').replace('ipns://', '')
     
+    # IPFS content is immutable, so serve it from the local cache when we can
+    cache = None if use_ipns else get_ipfs_cache()
+    if cache is not None:
+        cached = cache.get_text(hash_or_path)
+        if cached is not None:
+            return cached[0] or 'text/html', cached[1]
+    
     # Determine the gateway URL
     gateway_type = 'ipns' if use_ipns else 'ipfs'
     base_url = f"https://ipfs.io/{gateway_type}/{hash_or_path}"
@@ -68,6 +87,8 @@ def fetch_ipfs_resource(hash_or_path, use_ipns=False, timeout=10):
             
             if response.status_code == 200:
                 content_type = response.headers.get('Content-Type', 'text/html')
+                if cache is not None:
+                    cache.put(hash_or_path, response.text, content_type)
                 return content_type, response.text
             
             # If the resource is not found or gateway error
@@ -88,6 +109,8 @@ def fetch_ipfs_resource(hash_or_path, use_ipns=False, timeout=10):
                             alt_response = requests.get(alt_url, timeout=timeout)
                             if alt_response.status_code == 200:
                                 content_type = alt_response.headers.get('Content-Type', 'text/html')
+                                if cache is not None:
+                                    cache.put(hash_or_path, alt_response.text, content_type)
                                 return content_type, alt_response.text
                         except Exception as e:
                             logging.warning(f"Alternative gateway failed: {alt_url} - {str(e)}")
@@ -249,26 +272,47 @@ def fetch_ipfs_json(cid: str, port: int = 5101) -> dict:
     local_url = f"http://127.0.0.1:{port}/api/v0/cat?arg={cid}"
     public_url = f"https://ipfs.io/ipfs/{cid}"
 
+    cache = get_ipfs_cache()
+    started = time.perf_counter()
+    cached = cache.get_text(cid)
+    if cached is not None:
+        try:
+            data = json.loads(cached[1])
+            IPFS_FETCH_SECONDS.observe(time.perf_counter() - started, source="cache", outcome="ok")
+            return data
+        except json.JSONDecodeError:
+            pass
+
     # Try local IPFS node first
+    started = time.perf_counter()
     try:
         response = requests.post(local_url, timeout=5)
         response.raise_for_status()
-        return json.loads(response.text)
+        data = json.loads(response.text)
+        cache.put(cid, response.text, "application/json")
+        IPFS_FETCH_SECONDS.observe(time.perf_counter() - started, source="local", outcome="ok")
+        return data
     except requests.exceptions.RequestException as e:
         print(f"⚠️ Local IPFS node failed: {e}")
     except json.JSONDecodeError:
         print("❌ Local IPFS returned invalid JSON.")
+    IPFS_FETCH_SECONDS.observe(time.perf_counter() - started, source="local", outcome="error")
 
     # Fallback to public gateway
+    started = time.perf_counter()
     try:
         response = requests.get(public_url, timeout=10)
         response.raise_for_status()
         print("🌐 Fetched from public IPFS gateway.")
-        return json.loads(response.text)
+        data = json.loads(response.text)
+        cache.put(cid, response.text, "application/json")
+        IPFS_FETCH_SECONDS.observe(time.perf_counter() - started, source="gateway", outcome="ok")
+        return data
     except requests.exceptions.RequestException as e:
         print(f"❌ Public IPFS fetch failed: {e}")
     except json.JSONDecodeError:
         print("❌ Public IPFS returned invalid JSON.")
+    IPFS_FETCH_SECONDS.observe(time.perf_counter() - started, source="gateway", outcome="error")
 
     return {}
 
@@ -0,0 +1,202 @@
+# ─── 🗃 EvrMail IPFS Cache ────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Local content-addressed blockstore for IPFS fetches. CIDs are immutable,
+#   so a payload fetched once (batch JSON, ESL site files) is served from
+#   ~/.evrmail/ipfs-cache/ afterwards. The cache is size-bounded with LRU
+#   eviction and keeps hit/miss counters.
+#
+#   Each entry starts with a one-line JSON header (content type, size and
+#   sha256 of the body). With verification enabled, the body is checked
+#   against that stored digest on every read and dropped if it doesn't
+#   match. This catches corrupted or truncated files, not a body that never
+#   matched its CID: the CID itself is not recomputed.
+#
+#   The cache is best-effort. A failed write (disk full, read-only HOME) is
+#   counted in `stats["write_errors"]` and otherwise ignored, so a payload
+#   that was fetched is still returned to the caller.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+IPFS_CACHE_DIR = Path.home() / ".evrmail" / "ipfs-cache"
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# ─── 🧠 Cache ──────────────────────────────────────────────────────────────────
+
+class IPFSCache:
+    """Size-bounded LRU disk cache keyed by CID (or CID/path)."""
+
+    def __init__(self, path: Path = IPFS_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, verify: bool = True):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self._entries: "OrderedDict[str, int]" = OrderedDict()   # key -> file size, oldest first
+        self._size = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "corrupt": 0, "write_errors": 0}
+
+    # ─── Index ───
+
+    def _file(self, key: str) -> Path:
+        name = quote(key, safe="")
+        return self.path / name[-2:] / name
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        entries = []
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            for file in self.path.glob("*/*"):
+                if file.suffix == ".tmp":
+                    continue
+                st = file.stat()
+                entries.append((st.st_mtime, file, st.st_size))
+        except OSError:
+            pass    # unreadable cache directory: serve it as empty
+        for _, file, size in sorted(entries):
+            key = file.name
+            self._entries[key] = size
+            self._size += size
+        self._loaded = True
+
+    def _forget(self, key: str):
+        size = self._entries.pop(quote(key, safe=""), None)
+        if size is not None:
+            self._size -= size
+
+    # ─── Read ───
+
+    def get(self, key: str) -> Optional[Tuple[Optional[str], bytes]]:
+        """Return (content_type, body) for a cached key, or None on a miss."""
+        with self._lock:
+            self._ensure_loaded()
+            name = quote(key, safe="")
+            if name not in self._entries:
+                self.stats["misses"] += 1
+                return None
+            file = self._file(key)
+            try:
+                raw = file.read_bytes()
+                header_line, body = raw.split(b"\n", 1)
+                header = json.loads(header_line)
+            except (OSError, ValueError):
+                header, body = None, b""
+            if header is None or (self.verify and hashlib.sha256(body).hexdigest() != header.get("sha256")):
+                self.stats["corrupt"] += 1
+                self.stats["misses"] += 1
+                self._forget(key)
+                file.unlink(missing_ok=True)
+                return None
+            self._entries.move_to_end(name)
+            os.utime(file)
+            self.stats["hits"] += 1
+            return header.get("content_type"), body
+
+    def get_text(self, key: str) -> Optional[Tuple[Optional[str], str]]:
+        entry = self.get(key)
+        if entry is None:
+            return None
+        content_type, body = entry
+        return content_type, body.decode("utf-8", errors="replace")
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return quote(key, safe="") in self._entries
+
+    # ─── Write ───
+
+    def put(self, key: str, body, content_type: str = None):
+        """Store `body` (bytes or str) under `key` and evict down to `max_bytes`."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        header = json.dumps({
+            "content_type": content_type,
+            "size": len(body),
+            "sha256": hashlib.sha256(body).hexdigest(),
+        }).encode()
+        data = header + b"\n" + body
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            file = self._file(key)
+            tmp = file.with_name(file.name + ".tmp")
+            self._ensure_loaded()
+            try:
+                file.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_bytes(data)
+                os.replace(tmp, file)
+            except OSError:
+                self.stats["write_errors"] += 1
+                try:
+                    tmp.unlink(missing_ok=True)
+                except OSError:
+                    pass
+                return
+            self._forget(key)
+            self._entries[quote(key, safe="")] = len(data)
+            self._size += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            (self.path / name[-2:] / name).unlink(missing_ok=True)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._ensure_loaded()
+            for name in list(self._entries):
+                (self.path / name[-2:] / name).unlink(missing_ok=True)
+            self._entries.clear()
+            self._size = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "path": str(self.path),
+            }
+
+# ─── 🔌 Shared Cache ─────────────────────────────────────────────────────────
+
+_cache: Optional[IPFSCache] = None
+_cache_lock = threading.Lock()
+
+def get_ipfs_cache() -> IPFSCache:
+    """Return the process-wide cache configured from config.json."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from evrmail.config import load_config
+            config = load_config()
+            _cache = IPFSCache(
+                max_bytes=int(config.get("ipfs_cache_max_mb", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+                verify=bool(config.get("ipfs_cache_verify", True)),
+            )
+        return _cache
+
+__all__ = [
+    "IPFSCache",
+    "get_ipfs_cache",
+    "IPFS_CACHE_DIR",
+]
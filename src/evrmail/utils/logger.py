@@ -38,9 +38,17 @@ LEVELS = {
     "critical": logging.CRITICAL
 }
 
+# Categories that can be switched off with set_enabled_categories()
+SWITCHABLE_CATEGORIES = (APP, GUI, DAEMON, WALLET, CHAIN, NETWORK)
+
+# Logger level of a switched-off category: above everything, so the
+# level check that guards formatting also rules it out
+_DISABLED_LEVEL = logging.CRITICAL + 1
+
 # Global state
 _log_callbacks: Dict[str, List[Callable]] = {}
-_enabled_categories: Set[str] = {APP, GUI, DAEMON, WALLET, CHAIN, NETWORK}
+_enabled_categories: Set[str] = set(SWITCHABLE_CATEGORIES)
+_category_levels: Dict[str, int] = {}
 _colored_output = True
 _log_level = logging.INFO
 _daemon_console_output = True
@@ -60,7 +68,7 @@ def configure_logging(
     _colored_output = colored
     _log_level = level
     if categories:
-        _enabled_categories = categories
+        set_enabled_categories(categories)
     _daemon_console_output = daemon_to_console
     
     # Set up log directory
@@ -131,10 +139,11 @@ class ColorizedHandler(logging.StreamHandler):
     def emit(self, record):
         global _colored_output, _enabled_categories, _daemon_console_output
         
-        # Check if this message should be shown based on category
+        # Switched-off categories never get here, their logger level rules
+        # them out; debug-category records only show when enabled explicitly
         if hasattr(record, 'category'):
             category = record.category
-            if category not in _enabled_categories:
+            if category not in SWITCHABLE_CATEGORIES and category not in _enabled_categories:
                 return
                 
             # Check if daemon logs should be shown on console
@@ -188,9 +197,15 @@ def register_callback(callback: Callable[[str, str, int, str, dict], None], cate
 
 # Set enabled categories
 def set_enabled_categories(categories: Set[str]):
-    """Set which log categories are enabled"""
+    """
+    Set which log categories are enabled. The others are skipped before any
+    formatting, so they reach neither the console, the log files nor the
+    registered callbacks.
+    """
     global _enabled_categories
     _enabled_categories = categories
+    for category in SWITCHABLE_CATEGORIES:
+        _apply_category_level(category)
 
 # Enable/disable colored output
 def set_colored_output(enabled: bool):
@@ -204,50 +219,86 @@ def set_daemon_console_output(enabled: bool):
     global _daemon_console_output
     _daemon_console_output = enabled
 
+# Per-category loggers, built once by get_logger()
+_loggers: Dict[str, logging.Logger] = {}
+
+# Set the level of one category
+def set_category_level(category: str, level: Optional[int]):
+    """
+    Set a level for one category, e.g. silence chain logs with
+    `set_category_level(CHAIN, logging.WARNING)`. None follows the
+    level given to configure_logging() again.
+    """
+    if level is None:
+        _category_levels.pop(category, None)
+    else:
+        _category_levels[category] = level
+    _apply_category_level(category)
+
+def _apply_category_level(category: str):
+    """Logger level for `category`: its own level, or above everything while switched off."""
+    if category in SWITCHABLE_CATEGORIES and category not in _enabled_categories:
+        level = _DISABLED_LEVEL
+    else:
+        level = _category_levels.get(category, logging.NOTSET)
+    get_logger(category).setLevel(level)
+
+# Check a category/level before building a message
+def is_enabled(category: str, level: str = "info") -> bool:
+    """
+    Whether a `level` message in `category` would be emitted at all,
+    counting both its level and set_enabled_categories().
+    Check this before formatting anything expensive on a hot path.
+    """
+    logger = _loggers.get(category) or get_logger(category)
+    return logger.isEnabledFor(LEVELS.get(level) or LEVELS.get(level.lower(), logging.INFO))
+
+def _emit(logger: logging.Logger, category: str, level: int, msg, args, kwargs):
+    """Format, hand to the callbacks and the handlers. Callers have checked the level."""
+    if args:
+        msg = msg % args
+    record = logging.LogRecord(
+        name=logger.name,
+        level=level,
+        pathname="",
+        lineno=0,
+        msg=msg,
+        args=(),
+        exc_info=kwargs.get('exc_info'),
+    )
+    record.category = category
+    
+    # Call category-specific, then general callbacks
+    specific = _log_callbacks.get(category)
+    general = _log_callbacks.get("all")
+    if specific or general:
+        level_name = logging.getLevelName(level).lower()
+        
+        # Details may be a callable so they are only built when someone reads them
+        details = kwargs.get('details', None)
+        if callable(details):
+            details = details()
+        
+        for callbacks in (specific, general):
+            for callback in callbacks or ():
+                try:
+                    callback(category, level_name, level, msg, details)
+                except Exception as e:
+                    print(f"Error in log callback: {e}")
+    
+    logger.handle(record)
+
 # Get a logger for a specific category
 def get_logger(category: str):
-    """Get a logger for a specific category"""
+    """Get the (cached) logger for a specific category"""
+    logger = _loggers.get(category)
+    if logger is not None:
+        return logger
     logger = logging.getLogger(f"evrmail.{category}")
     
-    # Define wrapper methods to include category
     def _log(level, msg, *args, **kwargs):
-        if args:
-            msg = msg % args
-        record = logging.LogRecord(
-            name=logger.name,
-            level=level,
-            pathname="",
-            lineno=0,
-            msg=msg,
-            args=(),
-            exc_info=kwargs.get('exc_info'),
-        )
-        record.category = category
-        
-        # Extract details if provided
-        details = kwargs.get('details', None)
-        
-        # Call callbacks
-        if _log_callbacks:
-            level_name = logging.getLevelName(level).lower()
-            
-            # Call category-specific callbacks
-            if category in _log_callbacks:
-                for callback in _log_callbacks[category]:
-                    try:
-                        callback(category, level_name, level, msg, details)
-                    except Exception as e:
-                        print(f"Error in log callback: {e}")
-            
-            # Call general callbacks
-            if "all" in _log_callbacks:
-                for callback in _log_callbacks["all"]:
-                    try:
-                        callback(category, level_name, level, msg, details)
-                    except Exception as e:
-                        print(f"Error in log callback: {e}")
-        
-        logger.handle(record)
+        if logger.isEnabledFor(level):
+            _emit(logger, category, level, msg, args, kwargs)
     
     # Replace logger methods with our custom ones
     logger.debug = lambda msg, *args, **kwargs: _log(logging.DEBUG, msg, *args, **kwargs)
@@ -256,6 +307,7 @@ def get_logger(category: str):
     logger.error = lambda msg, *args, **kwargs: _log(logging.ERROR, msg, *args, **kwargs)
     logger.critical = lambda msg, *args, **kwargs: _log(logging.CRITICAL, msg, *args, **kwargs)
     
+    _loggers[category] = logger
     return logger
 
 # Shortcut functions for each category
@@ -289,18 +341,12 @@ def debug_log(msg: str, *args, **kwargs):
 
 # Helper function for the shortcut functions
 def _log_with_category(category: str, level: str, msg: str, *args, **kwargs):
-    """Log a message with a specific category and level"""
-    logger = get_logger(category)
-    log_level = LEVELS.get(level.lower(), logging.INFO)
-    
-    # Pass all kwargs (including details) to the logger methods
-    if log_level == logging.DEBUG:
-        logger.debug(msg, *args, **kwargs)
-    elif log_level == logging.INFO:
-        logger.info(msg, *args, **kwargs)
-    elif log_level == logging.WARNING:
-        logger.warning(msg, *args, **kwargs)
-    elif log_level == logging.ERROR:
-        logger.error(msg, *args, **kwargs)
-    elif log_level == logging.CRITICAL:
-        logger.critical(msg, *args, **kwargs) 
\ No newline at end of file
+    """
+    Log a message with a specific category and level. Nothing is formatted
+    when the category or the level is disabled; pass `%`-style args and a
+    callable `details` to keep the disabled case close to free.
+    """
+    logger = _loggers.get(category) or get_logger(category)
+    log_level = LEVELS.get(level) or LEVELS.get(level.lower(), logging.INFO)
+    if logger.isEnabledFor(log_level):
+        _emit(logger, category, log_level, msg, args, kwargs)
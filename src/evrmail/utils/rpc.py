@@ -0,0 +1,223 @@
+# ─── 🔌 EvrMail RPC Facade ────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Thin JSON-RPC client used on hot paths instead of one-request-per-call
+#   round trips. Calls go over a per-thread keep-alive HTTP session.
+#   Independent calls can be sent together as one JSON-RPC batch array.
+#   Per-method latency stats are recorded. Any attribute works like the
+#   evrmore_rpc client: `rpc.getblockcount()`.
+#
+#   Without explicit credentials, the node's .cookie file is used. The node
+#   writes a new cookie each time it starts, so a 401 re-reads the file and
+#   retries once. If no cookie is readable either, calls are delegated to
+#   evrmore_rpc one at a time.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import itertools
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+import requests
+
+from evrmail.utils.metrics import counter, histogram
+
+RPC_SECONDS = histogram("evrmail_rpc_call_seconds", "Node RPC latency by method (batched calls share the batch time)", ("method",))
+RPC_ERRORS = counter("evrmail_rpc_errors_total", "Node RPC calls that failed, by method", ("method",))
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+DEFAULT_COOKIE_FILE = Path.home() / ".evrmore" / ".cookie"
+
+# ─── ⚠️ Errors ────────────────────────────────────────────────────────────────
+
+class RPCError(Exception):
+    """Error object returned by the node for a single call."""
+
+    def __init__(self, method: str, code: int = None, message: str = ""):
+        super().__init__(f"{method}: {message} (code {code})")
+        self.method = method
+        self.code = code
+        self.message = message
+
+# ─── 🧠 Facade ────────────────────────────────────────────────────────────────
+
+class RPCFacade:
+    """Keep-alive JSON-RPC client with batch support and latency stats."""
+
+    def __init__(self, url: str, user: str = None, password: str = None,
+                 timeout: float = 30, fallback=None, cookie_file: Path = None):
+        self.url = url
+        self.auth = (user, password) if user and password else None
+        self.timeout = timeout
+        self.fallback = fallback
+        self.cookie_file = cookie_file      # re-read on 401 when the credentials came from it
+        self._ids = itertools.count()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.stats: dict = {}
+        self.batches = 0
+
+    # ─── Transport ───
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["Content-Type"] = "application/json"
+            self._local.session = session
+        return session
+
+    def _record(self, method: str, seconds: float, error: bool = False):
+        with self._stats_lock:
+            entry = self.stats.setdefault(method, {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        RPC_SECONDS.observe(seconds, method=method)
+        if error:
+            RPC_ERRORS.inc(method=method)
+
+    def _reload_cookie(self) -> bool:
+        """Re-read the cookie file. Returns True if the credentials changed."""
+        if self.cookie_file is None:
+            return False
+        try:
+            user, _, password = Path(self.cookie_file).read_text().strip().partition(":")
+        except OSError:
+            return False
+        if not (user and password) or (user, password) == self.auth:
+            return False
+        self.auth = (user, password)
+        return True
+
+    def _post(self, payload):
+        response = self._session().post(self.url, json=payload, auth=self.auth, timeout=self.timeout)
+        if response.status_code == 401 and self._reload_cookie():
+            # The node restarted and wrote a new cookie
+            response = self._session().post(self.url, json=payload, auth=self.auth, timeout=self.timeout)
+        # bitcoind-style nodes answer RPC errors with HTTP 500 and a JSON body
+        if response.status_code not in (200, 404, 500):
+            response.raise_for_status()
+        return response.json()
+
+    # ─── Calls ───
+
+    def call(self, method: str, *params) -> Any:
+        """Single RPC call over the keep-alive session."""
+        started = time.perf_counter()
+        if self.auth is None and self.fallback is not None:
+            try:
+                result = getattr(self.fallback, method)(*params)
+            except Exception:
+                self._record(method, time.perf_counter() - started, error=True)
+                raise
+            self._record(method, time.perf_counter() - started)
+            return result
+        reply = self._post({"jsonrpc": "1.0", "id": next(self._ids), "method": method, "params": list(params)})
+        error = reply.get("error")
+        self._record(method, time.perf_counter() - started, error=bool(error))
+        if error:
+            raise RPCError(method, error.get("code"), error.get("message", ""))
+        return reply.get("result")
+
+    def batch(self, calls: Sequence[Tuple[str, Sequence]], raise_errors: bool = True) -> List[Any]:
+        """
+        Send independent calls as one JSON-RPC batch and return their results
+        in order. With `raise_errors=False` failed calls yield RPCError objects.
+        """
+        calls = list(calls)
+        if not calls:
+            return []
+        if self.auth is None and self.fallback is not None:
+            results = []
+            for method, params in calls:
+                try:
+                    results.append(self.call(method, *params))
+                except Exception as e:
+                    if raise_errors:
+                        raise
+                    results.append(e)
+            return results
+
+        started = time.perf_counter()
+        first_id = next(self._ids)
+        ids = [first_id] + [next(self._ids) for _ in calls[1:]]
+        payload = [
+            {"jsonrpc": "1.0", "id": request_id, "method": method, "params": list(params)}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        replies = {reply.get("id"): reply for reply in self._post(payload)}
+        elapsed = (time.perf_counter() - started) / len(calls)
+        self.batches += 1
+
+        results = []
+        for request_id, (method, _) in zip(ids, calls):
+            reply = replies.get(request_id, {"error": {"code": None, "message": "missing reply"}})
+            error = reply.get("error")
+            self._record(method, elapsed, error=bool(error))
+            if error:
+                exc = RPCError(method, error.get("code"), error.get("message", ""))
+                if raise_errors:
+                    raise exc
+                results.append(exc)
+            else:
+                results.append(reply.get("result"))
+        return results
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return lambda *params: self.call(method, *params)
+
+    # ─── Stats ───
+
+    def latency_report(self) -> dict:
+        """Per-method call counts, errors and average/max latency in ms."""
+        with self._stats_lock:
+            return {
+                method: {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "avg_ms": round(1000 * s["total_seconds"] / s["calls"], 2) if s["calls"] else 0.0,
+                    "max_ms": round(1000 * s["max_seconds"], 2),
+                }
+                for method, s in sorted(self.stats.items())
+            }
+
+# ─── ⚙️ Config ────────────────────────────────────────────────────────────────
+
+def rpc_from_config(config: dict, fallback=None) -> RPCFacade:
+    host = config.get("rpc_host", "tcp://127.0.0.1").replace("tcp://", "http://")
+    url = f"{host}:{config.get('rpc_port', 8819)}"
+    user, password = config.get("rpc_user"), config.get("rpc_password")
+    cookie_file = None
+    if not (user and password) and DEFAULT_COOKIE_FILE.exists():
+        cookie_file = DEFAULT_COOKIE_FILE
+        user, _, password = cookie_file.read_text().strip().partition(":")
+    return RPCFacade(url, user, password, fallback=fallback, cookie_file=cookie_file)
+
+_rpc: Optional[RPCFacade] = None
+_rpc_lock = threading.Lock()
+
+def get_rpc() -> RPCFacade:
+    """Process-wide facade built from config.json, falling back to evrmail.rpc_client."""
+    global _rpc
+    with _rpc_lock:
+        if _rpc is None:
+            from evrmail.config import load_config
+            config = load_config()
+            fallback = None
+            if not (config.get("rpc_user") and config.get("rpc_password")) and not DEFAULT_COOKIE_FILE.exists():
+                from evrmail import rpc_client as fallback
+            _rpc = rpc_from_config(config, fallback)
+        return _rpc
+
+__all__ = [
+    "RPCFacade",
+    "RPCError",
+    "rpc_from_config",
+    "get_rpc",
+]
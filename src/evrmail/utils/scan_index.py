@@ -0,0 +1,143 @@
+# ─── 🔎 EvrMail Scan Index ────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Persistent record of which batch payloads have already been scanned, and
+#   against which local keys. Most payloads carry other users' traffic, and
+#   the same CID shows up again when its transaction confirms. A CID is only
+#   scanned again once a wallet or address has been added since its last scan.
+#
+#   Keys are stored as short fingerprints (truncated sha256 of the address).
+#   Each distinct key set is stored once and scans reference it by id.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# ─── 📂 Paths ──────────────────────────────────────────────────────────────────
+
+SCAN_INDEX_FILE = Path.home() / ".evrmail" / "scan_index.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keysets (
+    id           INTEGER PRIMARY KEY,
+    digest       TEXT NOT NULL UNIQUE,
+    fingerprints TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scans (
+    cid        TEXT PRIMARY KEY,
+    keyset     INTEGER NOT NULL,
+    messages   TEXT NOT NULL,
+    scanned_at REAL NOT NULL
+);
+"""
+
+# ─── 🔑 Fingerprints ──────────────────────────────────────────────────────────
+
+def key_fingerprint(address: str) -> str:
+    return hashlib.sha256(address.encode()).hexdigest()[:16]
+
+def key_fingerprints(addresses: Iterable[str]) -> frozenset:
+    return frozenset(key_fingerprint(a) for a in addresses)
+
+def message_id(message: dict) -> str:
+    """Stable id for a decrypted message, derived from its raw payload entry."""
+    raw = message.get("raw", message)
+    return hashlib.sha256(json.dumps(raw, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+# ─── 🗄 Index ─────────────────────────────────────────────────────────────────
+
+class ScanIndex:
+    """CID → scan result, tagged with the key set it was evaluated against."""
+
+    def __init__(self, path: Path = SCAN_INDEX_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._keysets: Dict[int, frozenset] = {
+            row[0]: frozenset(json.loads(row[1]))
+            for row in self._conn.execute("SELECT id, fingerprints FROM keysets")
+        }
+        self.stats = {"skipped": 0, "scanned": 0}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _keyset_id(self, fingerprints: frozenset) -> int:
+        for keyset_id, stored in self._keysets.items():
+            if stored == fingerprints:
+                return keyset_id
+        encoded = json.dumps(sorted(fingerprints))
+        digest = hashlib.sha256(encoded.encode()).hexdigest()
+        self._conn.execute("INSERT OR IGNORE INTO keysets (digest, fingerprints) VALUES (?, ?)", (digest, encoded))
+        keyset_id = self._conn.execute("SELECT id FROM keysets WHERE digest = ?", (digest,)).fetchone()[0]
+        self._keysets[keyset_id] = fingerprints
+        return keyset_id
+
+    def lookup(self, cid: str, fingerprints: frozenset) -> Optional[List[str]]:
+        """
+        Message ids from the last scan of `cid` if it covered every key in
+        `fingerprints`; None if the CID needs (re)scanning.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT keyset, messages FROM scans WHERE cid = ?", (cid,)).fetchone()
+        if row is None or not fingerprints <= self._keysets.get(row[0], frozenset()):
+            return None
+        self.stats["skipped"] += 1
+        return json.loads(row[1])
+
+    def message_ids(self, cid: str) -> List[str]:
+        """Message ids recorded for `cid`, whatever keys it was scanned with."""
+        with self._lock:
+            row = self._conn.execute("SELECT messages FROM scans WHERE cid = ?", (cid,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def record(self, cid: str, fingerprints: frozenset, message_ids: List[str]):
+        with self._lock:
+            keyset_id = self._keyset_id(fingerprints)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scans (cid, keyset, messages, scanned_at) VALUES (?, ?, ?, ?)",
+                (cid, keyset_id, json.dumps(message_ids), time.time())
+            )
+        self.stats["scanned"] += 1
+
+    def forget(self, cid: str = None):
+        """Drop one CID (or every CID) so it is scanned again."""
+        with self._lock:
+            if cid is None:
+                self._conn.execute("DELETE FROM scans")
+            else:
+                self._conn.execute("DELETE FROM scans WHERE cid = ?", (cid,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+
+# ─── 🔌 Shared Index ─────────────────────────────────────────────────────────
+
+_index: Optional[ScanIndex] = None
+_index_lock = threading.Lock()
+
+def get_scan_index() -> ScanIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ScanIndex()
+        return _index
+
+__all__ = [
+    "ScanIndex",
+    "get_scan_index",
+    "key_fingerprint",
+    "key_fingerprints",
+    "message_id",
+    "SCAN_INDEX_FILE",
+]
@@ -7,6 +7,9 @@ from rich import print
 from evrmail.wallet.utils import list_wallets, load_wallet
 import logging
 
+class PayloadUnavailable(Exception):
+    """Raised by `scan_payload(..., raise_unavailable=True)` when a CID can't be fetched yet."""
+
 def get_wallet_decryption_keys() -> Dict[str, str]:
     """Returns a mapping of addresses to their private keys from all wallets."""
     keymap = {}
@@ -18,12 +21,13 @@ def get_wallet_decryption_keys() -> Dict[str, str]:
             keymap[address] = address_data.get("private_key")
     return keymap
 
-def scan_payload(cid: str) -> List[Dict[str, Any]]:
+def scan_payload(cid: str, raise_unavailable: bool = False) -> List[Dict[str, Any]]:
     """
     Scan a batch payload by IPFS CID and return a list of decrypted messages for known addresses.
 
     Args:
         cid (str): IPFS CID of the batch payload.
+        raise_unavailable (bool): Raise PayloadUnavailable instead of returning [] when the fetch fails.
 
     Returns:
         List[Dict]: Decrypted message dictionaries with 'to', 'from', 'content', and 'raw'.
@@ -31,9 +35,16 @@ def scan_payload(cid: str) -> List[Dict[str, Any]]:
     batch = fetch_ipfs_json(cid)
     if not batch:
         print(f"[red]❌ Could not fetch or decode payload for CID: {cid}[/red]")
+        if raise_unavailable:
+            raise PayloadUnavailable(cid)
         return []
+    return decrypt_batch(batch, get_wallet_decryption_keys(), cid)
 
-    keymap = get_wallet_decryption_keys()
+def decrypt_batch(batch: Dict[str, Any], keymap: Dict[str, str], cid: str = "unknown") -> List[Dict[str, Any]]:
+    """
+    Decrypt the messages in an already fetched batch that are addressed to
+    `keymap` (address → private key), in payload order.
+    """
     messages = batch.get("messages", [])
     batch_id = batch.get("batch_id", "unknown")
     found_messages = []
@@ -1,2 +1,3 @@
 from .decode import decode
-__all__=["decode"]
\ No newline at end of file
+from .stream import BlockView, TxView, iter_block_transactions
+__all__=["decode", "BlockView", "TxView", "iter_block_transactions"]
\ No newline at end of file
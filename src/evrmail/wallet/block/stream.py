@@ -0,0 +1,191 @@
+import struct
+from typing import Dict, Iterator, List, Optional
+
+from .decode import read_varint, sha256d
+
+# ─────────────────────────────────────────────────────────────
+# 🌊 evrmail.wallet.block.stream
+#
+# 📌 PURPOSE:
+#   Streaming block parser over a single memoryview of the raw block.
+#   Transactions are yielded as lightweight TxView objects that only record
+#   offsets while parsing; inputs, outputs and scripts are materialised on
+#   first access. Txids are computed during the walk, so no hex round-trip
+#   is needed anywhere on the hot path.
+# ─────────────────────────────────────────────────────────────
+
+HEADER_SIZE = 80          # version, prev hash, merkle root, time, bits, nonce
+KAWPOW_HEADER_SIZE = 120  # + mixhash and nonce64
+
+class TxView:
+    """Lazily decoded transaction backed by a slice of the block buffer."""
+
+    __slots__ = ("_buf", "_inputs", "_outputs", "_vin", "_vout", "txid", "segwit", "size")
+
+    def __init__(self, buf: memoryview, cursor: int = 0):
+        start = cursor
+        cursor += 4                                    # version
+        self.segwit = buf[cursor] == 0x00 and buf[cursor + 1] != 0x00
+        if self.segwit:
+            cursor += 2
+        body_start = cursor
+
+        inputs = []
+        vin_count, cursor = read_varint(buf, cursor)
+        for _ in range(vin_count):
+            outpoint = cursor
+            cursor += 36
+            script_len, cursor = read_varint(buf, cursor)
+            inputs.append((outpoint, cursor, cursor + script_len))
+            cursor += script_len + 4                   # script + sequence
+
+        outputs = []
+        vout_count, cursor = read_varint(buf, cursor)
+        for _ in range(vout_count):
+            value_at = cursor
+            cursor += 8
+            script_len, cursor = read_varint(buf, cursor)
+            outputs.append((value_at, cursor, cursor + script_len))
+            cursor += script_len
+        body_end = cursor
+
+        if self.segwit:
+            for _ in range(vin_count):
+                item_count, cursor = read_varint(buf, cursor)
+                for _ in range(item_count):
+                    item_size, cursor = read_varint(buf, cursor)
+                    cursor += item_size
+        cursor += 4                                    # locktime
+
+        if self.segwit:
+            stripped = b"".join((buf[start:start + 4], buf[body_start:body_end], buf[cursor - 4:cursor]))
+        else:
+            stripped = buf[start:cursor]
+        self.txid = sha256d(stripped)[::-1].hex()
+
+        self._buf = buf[start:cursor]
+        self._inputs = [(o - start, s - start, e - start) for o, s, e in inputs]
+        self._outputs = [(v - start, s - start, e - start) for v, s, e in outputs]
+        self._vin: Optional[List[dict]] = None
+        self._vout: Optional[List[dict]] = None
+        self.size = cursor - start
+
+    @classmethod
+    def from_bytes(cls, raw) -> "TxView":
+        return cls(memoryview(raw))
+
+    # ─── Raw access ───
+
+    def raw(self) -> memoryview:
+        return self._buf
+
+    def script(self, n: int) -> memoryview:
+        """scriptPubKey of output `n` as a view into the block buffer."""
+        _, start, end = self._outputs[n]
+        return self._buf[start:end]
+
+    @property
+    def input_count(self) -> int:
+        return len(self._inputs)
+
+    @property
+    def output_count(self) -> int:
+        return len(self._outputs)
+
+    def value(self, n: int) -> int:
+        return struct.unpack_from("<q", self._buf, self._outputs[n][0])[0]
+
+    def outpoints(self) -> Iterator[tuple]:
+        """(prev_txid, prev_vout) for every non-coinbase input."""
+        for outpoint, _, _ in self._inputs:
+            prev = self._buf[outpoint:outpoint + 32]
+            if prev == b"\x00" * 32:
+                continue
+            yield prev[::-1].hex(), struct.unpack_from("<I", self._buf, outpoint + 32)[0]
+
+    # ─── decode_transaction-compatible fields ───
+
+    @property
+    def vin(self) -> List[dict]:
+        if self._vin is None:
+            vin = []
+            for outpoint, start, end in self._inputs:
+                prev = self._buf[outpoint:outpoint + 32][::-1].hex()
+                sequence = struct.unpack_from("<I", self._buf, end)[0]
+                if prev == "0" * 64:
+                    vin.append({"coinbase": self._buf[start:end].hex(), "sequence": sequence})
+                else:
+                    vin.append({
+                        "txid": prev,
+                        "vout": struct.unpack_from("<I", self._buf, outpoint + 32)[0],
+                        "scriptSig": {"hex": self._buf[start:end].hex()},
+                        "sequence": sequence
+                    })
+            self._vin = vin
+        return self._vin
+
+    @property
+    def vout(self) -> List[dict]:
+        """Outputs with undecoded scripts, as decode_transaction(decode_scripts=False) returns them."""
+        if self._vout is None:
+            self._vout = [
+                {"value": self.value(n), "n": n, "scriptPubKey": {"hex": self.script(n).hex()}}
+                for n in range(len(self._outputs))
+            ]
+        return self._vout
+
+    def get(self, key: str, default=None):
+        if key in ("vin", "vout", "txid", "size"):
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in ("vin", "vout", "txid", "size"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+class BlockView:
+    """Block header fields plus a lazy transaction stream over one buffer."""
+
+    def __init__(self, raw, header_size: int = KAWPOW_HEADER_SIZE):
+        self._buf = memoryview(raw)
+        buf = self._buf
+        self.version = struct.unpack_from("<I", buf, 0)[0]
+        self.previous_block_hash = buf[4:36][::-1].hex()
+        self.merkleroot = buf[36:68][::-1].hex()
+        self.time, bits, self.nonce = struct.unpack_from("<III", buf, 68)
+        self.bits = f"{bits:08x}"
+        self.hash = sha256d(buf[:HEADER_SIZE])[::-1].hex()
+        self.size = len(buf)
+        self.tx_count, self.tx_start = read_varint(buf, header_size)
+        self._height: Optional[int] = None
+
+    def __iter__(self) -> Iterator[TxView]:
+        cursor = self.tx_start
+        for _ in range(self.tx_count):
+            tx = TxView(self._buf, cursor)
+            cursor += tx.size
+            yield tx
+
+    @property
+    def height(self) -> Optional[int]:
+        """Height committed in the coinbase scriptSig (BIP34), if present."""
+        if self._height is None:
+            try:
+                coinbase = next(iter(self))
+                script = coinbase.vin[0].get("coinbase", "")
+                push = int(script[:2], 16)
+                if 1 <= push <= 8:
+                    self._height = int.from_bytes(bytes.fromhex(script[2:2 + push * 2]), "little")
+            except (StopIteration, ValueError, IndexError):
+                return None
+        return self._height
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+def iter_block_transactions(raw) -> Iterator[TxView]:
+    """Yield a TxView for every transaction in a raw block."""
+    return iter(BlockView(raw))
+
+__all__ = ["BlockView", "TxView", "iter_block_transactions"]
@@ -19,18 +19,19 @@ WALLET_DIR = Path(WALLET_DIR)
 MAP_DIR = WALLET_DIR / "maps"
 MAP_DIR.mkdir(parents=True, exist_ok=True)
 
-# 🤔 Create new HD wallet and store to disk
-def create_wallet(name: str, mnemonic: str = None, passphrase: str = "", address_count: int = 1000) -> dict:
-    mnemonic = mnemonic or generate_mnemonic()
-    passphrase = passphrase or ""
+# 🔭 Gap limit: how many unused addresses are kept derived past the last used one
+DEFAULT_GAP_LIMIT = 20
 
-    hdwallet = HDWallet(cryptocurrency=Evrmore, passphrase=passphrase)
-    hdwallet.from_mnemonic(BIP39Mnemonic(mnemonic=mnemonic))
+def get_gap_limit() -> int:
+    from evrmail.config import load_config
+    return int(load_config().get("address_gap_limit", DEFAULT_GAP_LIMIT))
 
+# 🔑 Derive BIP44 receive addresses [start, start + count) and their map entries
+def _derive_addresses(hdwallet: HDWallet, name: str, start: int, count: int) -> tuple[dict, dict]:
     addresses = {}
-    by_index, by_path, by_name, by_pubkey = {}, {}, {}, {}
+    maps = {"by-index": {}, "by-path": {}, "by-friendly-name": {}, "by-pubkey": {}}
 
-    for i in range(address_count):
+    for i in range(start, start + count):
         derivation = BIP44Derivation(coin_type=175, account=0, change=0, address=i)
         hdwallet.update_derivation(derivation)
 
@@ -45,16 +46,30 @@ def create_wallet(name: str, mnemonic: str = None, passphrase: str = "", address
         addr = address_data["address"]
         addresses[addr] = address_data
 
-        by_index[str(i)] = {"address": addr, "wallet": name}
-        by_path[address_data["path"]] = {"address": addr, "wallet": name}
-        by_name[address_data["friendly_name"]] = {"address": addr, "wallet": name}
-        by_pubkey[address_data["public_key"]] = {"address": addr, "wallet": name}
+        maps["by-index"][str(i)] = {"address": addr, "wallet": name}
+        maps["by-path"][address_data["path"]] = {"address": addr, "wallet": name}
+        maps["by-friendly-name"][address_data["friendly_name"]] = {"address": addr, "wallet": name}
+        maps["by-pubkey"][address_data["public_key"]] = {"address": addr, "wallet": name}
+
+    return addresses, maps
+
+# 🤔 Create new HD wallet and store to disk
+def create_wallet(name: str, mnemonic: str = None, passphrase: str = "", address_count: int = None) -> dict:
+    """
+    Only a gap-limit lookahead window is derived up front; the daemon extends
+    it via `mark_address_used` as higher addresses see activity.
+    """
+    mnemonic = mnemonic or generate_mnemonic()
+    passphrase = passphrase or ""
+    gap_limit = get_gap_limit()
+
+    hdwallet = HDWallet(cryptocurrency=Evrmore, passphrase=passphrase)
+    hdwallet.from_mnemonic(BIP39Mnemonic(mnemonic=mnemonic))
+
+    addresses, maps = _derive_addresses(hdwallet, name, 0, max(address_count or 0, gap_limit))
 
     # 📆 Save maps to global map files
-    _update_map_file("by-index.json", by_index)
-    _update_map_file("by-path.json", by_path)
-    _update_map_file("by-friendly-name.json", by_name)
-    _update_map_file("by-pubkey.json", by_pubkey)
+    update_map_files(maps)
 
     # 📆 Save the wallet itself
     wallet_data = {
@@ -65,19 +80,75 @@ def create_wallet(name: str, mnemonic: str = None, passphrase: str = "", address
         "extended_public_key": hdwallet.xpublic_key(),
         "extended_private_key": hdwallet.xprivate_key(),
         "HD_seed": hdwallet.seed(),
+        "gap_limit": gap_limit,
+        "highest_used_index": -1,
         "addresses": addresses
     }
 
     with open(wallet_file_path(name), "w") as f:
         json.dump(wallet_data, f, indent=2)
 
+    from evrmail.utils.events import publish, WALLET
+    publish(WALLET, action="created", wallet=name)
     return wallet_data
 
+# 👀 Addresses inside the gap-limit window (all of them for wallets never scanned)
+def watched_addresses(wallet: dict) -> list[str]:
+    entries = wallet.get("addresses", {})
+    entries = entries.values() if isinstance(entries, dict) else entries
+    highest = wallet.get("highest_used_index")
+    limit = None if highest is None else highest + wallet.get("gap_limit", DEFAULT_GAP_LIMIT)
+    watched = []
+    for entry in entries:
+        if isinstance(entry, str):
+            watched.append(entry)
+        elif limit is None or entry.get("index", 0) <= limit:
+            watched.append(entry["address"])
+    return watched
+
+# 📈 Raise the high-water mark and derive the lookahead past it
+def mark_address_used(name: str, index: int) -> list[dict]:
+    """
+    Record activity on address `index` of wallet `name`. When it's above the
+    persisted high-water mark, the mark moves up and addresses are derived so
+    `gap_limit` unused ones follow it. Returns the newly derived addresses.
+    """
+    wallet = load_wallet(name)
+    if wallet is None:
+        return []
+    highest = wallet.get("highest_used_index")
+    if highest is not None and index <= highest:
+        return []
+    wallet["highest_used_index"] = max(index, -1 if highest is None else highest)
+    gap_limit = wallet.setdefault("gap_limit", get_gap_limit())
+
+    addresses = wallet.setdefault("addresses", {})
+    derived = len(addresses)
+    needed = wallet["highest_used_index"] + gap_limit + 1 - derived
+    new_addresses = {}
+    if needed > 0 and isinstance(addresses, dict):
+        hdwallet = HDWallet(cryptocurrency=Evrmore, passphrase=wallet.get("mnemonic_passphrase", ""))
+        hdwallet.from_mnemonic(BIP39Mnemonic(mnemonic=wallet["mnemonic"]))
+        new_addresses, maps = _derive_addresses(hdwallet, name, derived, needed)
+        addresses.update(new_addresses)
+        update_map_files(maps)
+
+    _write_wallet(wallet)
+    from evrmail.utils.events import publish, ADDRESS
+    publish(ADDRESS, action="derived", wallet=name,
+            addresses=list(new_addresses), highest_used_index=wallet["highest_used_index"])
+    return list(new_addresses.values())
+
 # 📄 Save a wallet object to file
-def save_wallet(wallet: dict):
+def _write_wallet(wallet: dict):
     with open(wallet_file_path(wallet["name"]), "w") as f:
         json.dump(wallet, f, indent=2)
 
+def save_wallet(wallet: dict):
+    _write_wallet(wallet)
+    from evrmail.utils.events import publish, WALLET
+    publish(WALLET, action="saved", wallet=wallet["name"])
+
 # 📅 Load a wallet by name
 def load_wallet(name: str) -> dict | None:
     path = wallet_file_path(name)
@@ -163,7 +234,7 @@ def export_wallet(name: str, include_addresses: bool = True):
         raise typer.Exit()
 
 # 📅 Restore Wallet from Mnemonic (like init)
-def restore_wallet(name: str="", mnemonic: str=None, passphrase: str = "", address_count: int = 1000):
+def restore_wallet(name: str="", mnemonic: str=None, passphrase: str = "", address_count: int = None):
     """
     🔄 Restore wallet from existing mnemonic phrase and update maps.
     """
@@ -67,17 +67,18 @@ def create_send_asset_transaction(
     asset_amount: int,
     fee_rate: int = 1_000_000,  # sat/kB
     ipfs_cidv0: str = None,
+    utxo_set=None,
 ) -> Tuple[str, str]:
-    from evrmail import rpc_client
-    from evrmail.daemon.__main__ import load_utxos
-    utxos = combine_utxos(load_utxos())
-    print(utxos)
-    asset_utxos =  filter_utxos_by_asset(utxos, asset_name)
-    evr_utxos = filter_utxos_by_asset(utxos, None)
+    from evrmail.daemon.utxo_set import load_utxo_set
+    if utxo_set is None:
+        utxo_set = load_utxo_set()
+    asset_utxos = utxo_set.by_asset(asset_name)
+    evr_utxos = utxo_set.by_asset(None)
     if len(asset_utxos) == 0:
         raise Exception(f"No matching asset utxos found for {asset_name} across {len(from_addresses)} addresses.")
     private_keys = {
-        utxo["address"]: get_private_key_for_address(utxo["address"]) for utxo in flatten_utxos(utxos)
+        address: get_private_key_for_address(address)
+        for address in {utxo["address"] for utxo in asset_utxos + evr_utxos}
     }
     wif_privkeys = {
         addr: wif_from_privkey(bytes.fromhex(key))
@@ -164,6 +165,7 @@ def create_send_asset(
     change_address = pubkey_hash_to_address(change_pubkey_hash)
 
     # ─── Step 1: Add ONLY asset inputs (required for asset transfer) ──────────────
+    asset_outpoints = {(u["txid"], u["vout"]) for u in asset_utxos}
     asset_inputs = []
     for u in asset_utxos:
         asset_inputs.append(CMutableTxIn(COutPoint(lx(u["txid"]), u["vout"])))
@@ -184,7 +186,7 @@ def create_send_asset(
 
     for u in utxos:
         print(u)
-        if u in asset_utxos:
+        if (u["txid"], u["vout"]) in asset_outpoints:
             continue
         dummy_fee_inputs.append(CMutableTxIn(COutPoint(lx(u["txid"]), u["vout"])))
         dummy_utxos.append(u)
@@ -204,7 +206,7 @@ def create_send_asset(
     fee_input_total = 0
 
     for u in utxos:
-        if u in asset_utxos:
+        if (u["txid"], u["vout"]) in asset_outpoints:
             continue
         fee_inputs.append(CMutableTxIn(COutPoint(lx(u["txid"]), u["vout"])))
         fee_utxos.append(u)
@@ -24,7 +24,11 @@ def read_varint(f: memoryview, cursor: int) -> Tuple[int, int]:
         cursor += 8
         return val, cursor
 
-def decode_transaction(tx_hex: str) -> Dict[str, any]:
+def decode_transaction(tx_hex: str, decode_scripts: bool = True) -> Dict[str, any]:
+    """
+    Decode a raw transaction. With `decode_scripts=False` each scriptPubKey
+    is left as {"hex": ...} so callers can prefilter outputs themselves.
+    """
     tx_bytes = bytes.fromhex(tx_hex)
     f = memoryview(tx_bytes)
     cursor = 0
@@ -79,16 +83,19 @@ def decode_transaction(tx_hex: str) -> Dict[str, any]:
         script_pubkey_hex = script_pubkey_bytes.hex()
         cursor += script_len
 
-        try:
-            decoded_script = script_decoder.decode(script_pubkey_hex)
-            script_pubkey = decoded_script
-            script_pubkey["hex"] = script_pubkey_hex
-        except Exception:
-            script_pubkey = {
-                "hex": script_pubkey_hex,
-                "asm": '',
-                "type": "unknown"
-            }
+        if not decode_scripts:
+            script_pubkey = {"hex": script_pubkey_hex}
+        else:
+            try:
+                decoded_script = script_decoder.decode(script_pubkey_hex)
+                script_pubkey = decoded_script
+                script_pubkey["hex"] = script_pubkey_hex
+            except Exception:
+                script_pubkey = {
+                    "hex": script_pubkey_hex,
+                    "asm": '',
+                    "type": "unknown"
+                }
 
         vout.append({
             "value": round(value, 8),
@@ -15,22 +15,14 @@ from evrmail.wallet import (
 )
 
 def load_utxos():
-    from evrmail.daemon.__main__ import MEMPOOL_UTXO_FILE, CONFIRMED_UTXO_FILE
-    mempool = {}
-    confirmed = {}
-    if MEMPOOL_UTXO_FILE.exists():
-        mempool = json.loads(MEMPOOL_UTXO_FILE.read_text())
-    if CONFIRMED_UTXO_FILE.exists():
-        confirmed = json.loads(CONFIRMED_UTXO_FILE.read_text())
-    return {"mempool": mempool, "confirmed": confirmed}
+    from evrmail.daemon.utxo_set import load_utxo_set
+    return load_utxo_set().to_dict()
 def load_asset_utxos(unspent: bool = True):
-    utxos = load_utxos()
+    from evrmail.daemon.utxo_set import load_utxo_set, CONFIRMED
     asset_utxos = {}
-    for address, utxos in utxos.get("confirmed", {}).items():
-        for utxo in utxos:
-            if utxo.get("spent") == False:
-                if utxo.get("asset") is not None:
-                    asset_utxos[address] = utxo
+    for utxo in load_utxo_set().iter(CONFIRMED, include_spent=not unspent):
+        if utxo.get("asset") is not None:
+            asset_utxos[utxo.get("address")] = utxo
     return asset_utxos
 
 def get_first_outbox_utxo():
@@ -297,9 +289,13 @@ def serialize_unsigned_tx(vin, vout, locktime=0):
 import json
 from pathlib import Path
 
-def calculate_balances():
+def calculate_balances(utxo_set=None):
     """
-    Calculate EVR and Asset balances from ~/.evrmail/utxos/confirmed.json and mempool.json.
+    Calculate EVR and Asset balances from the shared UTXO set.
+
+    Args:
+        utxo_set: A live `UTXOSet` (e.g. the daemon's cache). Loaded from
+            ~/.evrmail/utxos when omitted.
 
     Returns:
         {
@@ -310,44 +306,10 @@ def calculate_balances():
             }
         }
     """
-    STORAGE_DIR = Path.home() / ".evrmail"
-    UTXO_DIR = STORAGE_DIR / "utxos"
-    CONFIRMED_FILE = UTXO_DIR / "confirmed.json"
-    MEMPOOL_FILE = UTXO_DIR / "mempool.json"
-
-    balances = {
-        "evr": {},
-        "assets": {}
-    }
-
-    # Helper to add a UTXO into balances
-    def add_utxo_to_balance(addr, asset_name, amount):
-        if asset_name is None:
-            balances["evr"][addr] = balances["evr"].get(addr, 0) + amount
-        else:
-            if asset_name not in balances["assets"]:
-                balances["assets"][asset_name] = {}
-            balances["assets"][asset_name][addr] = balances["assets"][asset_name].get(addr, 0) + amount
-
-    # Load from confirmed UTXOs
-    if CONFIRMED_FILE.exists():
-        confirmed = json.loads(CONFIRMED_FILE.read_text())
-        for address, utxos in confirmed.items():
-            for utxo in utxos:
-                if utxo.get("spent", False):
-                    continue
-                add_utxo_to_balance(address, utxo.get("asset"), utxo.get("amount", 0))
-
-    # Load from mempool UTXOs (unconfirmed)
-    if MEMPOOL_FILE.exists():
-        mempool = json.loads(MEMPOOL_FILE.read_text())
-        for address, utxos in mempool.items():
-            for utxo in utxos:
-                if utxo.get("spent", False):
-                    continue
-                add_utxo_to_balance(address, utxo.get("asset"), utxo.get("amount", 0))
-
-    return balances
+    if utxo_set is None:
+        from evrmail.daemon.utxo_set import load_utxo_set
+        utxo_set = load_utxo_set()
+    return utxo_set.balances()
 
 
 def get_sighash(vin, vout, input_index, script_pubkey_hex, locktime=0):
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import './EvrMail.css';
-import { getNetworkStatus, getMessages, getFromBackend, callBackend } from '../utils/bridge';
+import { getNetworkStatus, getMessages, getFromBackend, callBackend, onStateChanged } from '../utils/bridge';
 
 interface EvrMailProps {
   backend: Backend | null;
@@ -75,6 +75,30 @@ const EvrMail: React.FC<EvrMailProps> = ({ backend }) => {
     }
   }, [backend]);
 
+  useEffect(() => {
+    // Refresh only what a backend state change touched. UTXO events arrive
+    // per transaction, so balance reloads are coalesced.
+    let balanceTimer: ReturnType<typeof setTimeout> | null = null;
+    const unsubscribe = onStateChanged(backend, (topic) => {
+      if (topic === 'contact') {
+        getFromBackend<Contact[]>(backend, 'get_contacts')
+          .then(contacts => setContacts(contacts || []))
+          .catch(err => console.warn('Failed to refresh contacts:', err));
+      } else if (!balanceTimer) {
+        balanceTimer = setTimeout(() => {
+          balanceTimer = null;
+          getFromBackend<WalletBalance>(backend, 'get_wallet_balances')
+            .then(setWalletBalance)
+            .catch(err => console.warn('Failed to refresh wallet balance:', err));
+        }, 500);
+      }
+    });
+    return () => {
+      unsubscribe();
+      if (balanceTimer) clearTimeout(balanceTimer);
+    };
+  }, [backend]);
+
   const loadAppData = async () => {
     try {
       if (!backend) {
@@ -20,7 +20,15 @@ interface UIControl {
   log: (message: string) => void;
 }
 
+interface QtSignal<T extends any[]> {
+  connect: (callback: (...args: T) => void) => void;
+  disconnect: (callback: (...args: T) => void) => void;
+}
+
 interface Backend {
+  // (topic, JSON payload) for wallet/address/contact/utxo changes
+  stateChanged: QtSignal<[string, string]>;
+
   // Navigation and UI functions
   openTab: (tab: string) => void;
   set_browser_geometry: (x: number, y: number, w: number, h: number) => void;
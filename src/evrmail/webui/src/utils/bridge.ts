@@ -49,6 +49,32 @@ export async function callBackend<T>(
   }
 }
 
+/**
+ * Subscribes to backend state changes (wallet, address, contact, utxo)
+ * @param backend The backend object from QWebChannel
+ * @param handler Called with the topic and the parsed event payload
+ * @returns Function that removes the subscription
+ */
+export function onStateChanged(
+  backend: Backend | null,
+  handler: (topic: string, payload: any) => void
+): () => void {
+  if (!backend || !backend.stateChanged) {
+    return () => {};
+  }
+  const listener = (topic: string, payload: string) => {
+    let parsed: any = payload;
+    try {
+      parsed = JSON.parse(payload);
+    } catch (e) {
+      // Not JSON, pass as is
+    }
+    handler(topic, parsed);
+  };
+  backend.stateChanged.connect(listener);
+  return () => backend.stateChanged.disconnect(listener);
+}
+
 /**
  * Helper for common get operations with no parameters
  */
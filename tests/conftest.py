@@ -0,0 +1,16 @@
+# ─── 🧪 Test Setup ────────────────────────────────────────────────────────────
+#
+# 📌 PURPOSE:
+#   Run the suite without an Evrmore node and without touching the real
+#   ~/.evrmail: skip evrmail's import-time RPC check, point HOME at a
+#   scratch directory and import evrmail from this checkout.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("EVRMAIL_OFFLINE", "1")
+os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="evrmail-tests-")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,17 @@
+from evrmail.bench.replay import run_isolated
+from evrmail.bench.synthetic import generate_recording
+
+
+def test_bench_daemon_runs_offline(tmp_path, monkeypatch):
+    # The child must go offline on its own, not by inheriting the suite's setting
+    monkeypatch.delenv("EVRMAIL_OFFLINE")
+    recording = tmp_path / "recording.jsonl"
+    stats = generate_recording(recording, blocks=3, txs_per_block=50, owned_fraction=0.1,
+                               message_fraction=0.2, seed=3)
+    document = run_isolated(recording, output=tmp_path / "result.json")
+
+    results = document["results"]
+    assert (tmp_path / "result.json").exists()
+    assert results["blocks"]["count"] == 3
+    assert results["utxos"]["confirmed"] == stats["owned_outputs"]
+    assert results["ipfs"]
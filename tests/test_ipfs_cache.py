@@ -0,0 +1,66 @@
+import os
+
+import requests
+
+from evrmail.utils import ipfs
+from evrmail.utils.ipfs_cache import IPFSCache
+
+
+def test_put_then_get_round_trip(tmp_path):
+    cache = IPFSCache(tmp_path)
+    cache.put("QmA", '{"a": 1}', "application/json")
+    assert cache.get_text("QmA") == ("application/json", '{"a": 1}')
+    assert cache.get("QmB") is None
+    assert (cache.stats["hits"], cache.stats["misses"]) == (1, 1)
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    cache = IPFSCache(tmp_path)
+    cache.put("QmA", b"x" * 100)
+    entry = cache.info()["size_bytes"]
+    cache.max_bytes = entry * 2
+    cache.put("QmB", b"x" * 100)
+    cache.get("QmA")                    # QmB is now the oldest
+    cache.put("QmC", b"x" * 100)
+    assert "QmA" in cache and "QmC" in cache
+    assert "QmB" not in cache
+    assert cache.stats["evictions"] == 1
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = IPFSCache(tmp_path)
+    cache.put("QmA", b"payload")
+    file = cache._file("QmA")
+    file.write_bytes(file.read_bytes()[:-1] + b"!")
+    assert cache.get("QmA") is None
+    assert cache.stats["corrupt"] == 1
+    assert not file.exists()
+
+
+def test_failed_write_is_counted_not_raised(tmp_path, monkeypatch):
+    cache = IPFSCache(tmp_path)
+
+    def replace(src, dst):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "replace", replace)
+
+    cache.put("QmA", b"payload")
+    assert cache.stats["write_errors"] == 1
+    assert "QmA" not in cache
+    assert list(tmp_path.glob("*/*.tmp")) == []
+
+
+def test_fetch_returns_payload_when_cache_write_fails(tmp_path, monkeypatch):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    cache = IPFSCache(blocker / "cache")   # parent is a file: every write fails
+    monkeypatch.setattr(ipfs, "get_ipfs_cache", lambda: cache)
+
+    class Response:
+        text = '{"messages": []}'
+        def raise_for_status(self):
+            pass
+    monkeypatch.setattr(requests, "post", lambda url, timeout: Response())
+
+    assert ipfs.fetch_ipfs_json("QmA") == {"messages": []}
+    assert cache.stats["write_errors"] == 1
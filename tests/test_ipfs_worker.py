@@ -0,0 +1,91 @@
+import threading
+import time
+
+from evrmail.daemon.ipfs_worker import IPFSWorkerPool
+
+
+def make_pool(tmp_path, fetch=None, deliver=None, **kwargs):
+    return IPFSWorkerPool(
+        fetch or (lambda cid: []),
+        deliver or (lambda cid, txid, result: None),
+        path=tmp_path / "ipfs_queue.json",
+        **kwargs
+    )
+
+
+def test_retry_backoff_doubles_up_to_the_cap(tmp_path, monkeypatch):
+    pool = make_pool(tmp_path, max_attempts=10, retry_base=5.0, retry_max=60.0)
+    monkeypatch.setattr(time, "time", lambda: 1000.0)
+    pool.submit("QmA", "aa" * 32)
+    job = pool._due()[0]
+
+    delays = []
+    for _ in range(6):
+        pool._retry(job, RuntimeError("not yet"))
+        delays.append(job["next_attempt"] - 1000.0)
+    assert delays == [5.0, 10.0, 20.0, 40.0, 60.0, 60.0]
+    assert job["attempts"] == 6
+    assert pool.stats["retries"] == 6
+    assert pool._due() == []            # not due until the backoff passes
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    pool = make_pool(tmp_path, max_attempts=3)
+    pool.submit("QmA")
+    job = pool._due()[0]
+    for _ in range(3):
+        pool._retry(job, RuntimeError("gone"))
+    assert pool.pending() == 0
+    assert pool.stats["retries"] == 2 and pool.stats["failed"] == 1
+
+
+def test_submit_defers_the_queue_file_to_flush(tmp_path):
+    pool = make_pool(tmp_path)
+    assert pool.submit("QmA", "aa" * 32) is True
+    assert pool.submit("QmA", "aa" * 32) is False
+    assert not pool.path.exists()
+    pool.flush()
+    assert pool.path.exists()
+
+
+def test_pending_jobs_reload_with_their_retry_state(tmp_path):
+    pool = make_pool(tmp_path)
+    pool.submit("QmA", "aa" * 32)
+    pool.submit("QmB", "bb" * 32)
+    pool._retry(pool._jobs["QmB"], RuntimeError("not yet"))
+    pool._finish(pool._jobs["QmA"])
+    pool.submit("QmC")
+    pool.flush()
+
+    again = make_pool(tmp_path)
+    assert again.pending() == 2
+    assert again._jobs["QmB"]["attempts"] == 1
+    assert again._jobs["QmB"]["txid"] == "bb" * 32
+    assert [job["cid"] for job in again._due()] == ["QmC"]
+
+
+def test_threads_retry_then_deliver_and_forget_the_job(tmp_path):
+    calls = {"QmA": 0}
+    delivered = threading.Event()
+    results = []
+
+    def fetch(cid):
+        calls[cid] += 1
+        if calls[cid] == 1:
+            raise RuntimeError("not pinned yet")
+        return ["message"]
+
+    def deliver(cid, txid, result):
+        results.append((cid, txid, result))
+        delivered.set()
+
+    pool = make_pool(tmp_path, fetch, deliver, workers=2, retry_base=0.01)
+    pool.start()
+    try:
+        pool.submit("QmA", "aa" * 32)
+        assert delivered.wait(10)
+    finally:
+        pool.stop()
+    assert results == [("QmA", "aa" * 32, ["message"])]
+    assert pool.stats["retries"] == 1 and pool.stats["completed"] == 1
+    assert make_pool(tmp_path).pending() == 0
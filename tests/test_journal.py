@@ -0,0 +1,126 @@
+from evrmail.daemon.journal import JOURNAL_FILE, PersistenceJournal, read_journal
+from evrmail.daemon.utxo_set import CONFIRMED, MEMPOOL, UTXOSet, load_utxo_set
+from evrmail.daemon.utxo_store import UTXOStore, get_utxo_store
+
+
+def utxo(txid, vout=0, address="EAddress", amount=100):
+    return {"txid": txid, "vout": vout, "amount": amount, "asset": None, "address": address, "spent": False}
+
+
+def open_journal(tmp_path, store=None):
+    store = store or UTXOStore(tmp_path / "utxos.db")
+    journal = PersistenceJournal(store, path=tmp_path / "daemon.journal", durability="flush")
+    journal.start(thread=False)
+    return journal
+
+
+def test_recover_replays_committed_records(tmp_path):
+    journal = open_journal(tmp_path)
+    cache = UTXOSet()
+    cache.add(utxo("aa" * 32), CONFIRMED)
+    cache.add(utxo("bb" * 32), CONFIRMED)
+    journal.record(cache)
+    journal.snapshot()
+
+    # Deltas that only reach the log before a crash
+    cache.mark_spent("aa" * 32, 0)
+    cache.remove("bb" * 32, 0)
+    cache.add(utxo("cc" * 32), MEMPOOL)
+    journal.record(cache, {"checkpoint": "42"})
+    journal.commit()
+    assert journal.store.count() == 2
+
+    store = UTXOStore(tmp_path / "utxos.db")
+    recovered = store.load()
+    replayed = open_journal(tmp_path, store).recover(recovered)
+    assert replayed == 4
+    assert recovered.get("aa" * 32, 0)["spent"] is True
+    assert recovered.get("bb" * 32, 0) is None
+    assert recovered.pool_of("cc" * 32, 0) == MEMPOOL
+    # Recovery folds the log into the snapshot
+    assert read_journal(tmp_path / "daemon.journal") == []
+    assert store.load().to_dict() == recovered.to_dict()
+    assert store.get_meta("checkpoint") == "42"
+
+
+def test_recover_stops_at_torn_tail(tmp_path):
+    journal = open_journal(tmp_path)
+    cache = UTXOSet()
+    cache.add(utxo("aa" * 32), CONFIRMED)
+    journal.record(cache)
+    journal.commit()
+    with open(tmp_path / "daemon.journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "pool": "confirmed", "utxo": {"txid": "')
+
+    recovered = UTXOSet()
+    assert open_journal(tmp_path).recover(recovered) == 1
+    assert len(recovered) == 1
+
+
+def test_snapshot_folds_pending_and_truncates(tmp_path):
+    journal = open_journal(tmp_path)
+    cache = UTXOSet()
+    cache.add(utxo("aa" * 32), CONFIRMED)
+    journal.record(cache)
+    journal.commit()
+    assert read_journal(journal.path)
+    assert journal.store.count() == 0
+
+    journal.snapshot()
+    assert read_journal(journal.path) == []
+    assert journal.store.load().get("aa" * 32, 0)["amount"] == 100
+
+
+def test_load_utxo_set_includes_journaled_deltas():
+    store = get_utxo_store()
+    journal = PersistenceJournal(store, path=JOURNAL_FILE, durability="flush")
+    journal.start(thread=False)
+    cache = UTXOSet()
+    cache.add(utxo("dd" * 32), CONFIRMED)
+    journal.record(cache)
+    journal.snapshot()
+
+    cache.mark_spent("dd" * 32, 0)
+    cache.add(utxo("ee" * 32), MEMPOOL)
+    journal.record(cache)
+    journal.commit()
+    try:
+        loaded = load_utxo_set()
+        assert loaded.get("dd" * 32, 0)["spent"] is True
+        assert loaded.pool_of("ee" * 32, 0) == MEMPOOL
+        assert not store.load().get("dd" * 32, 0)["spent"]
+    finally:
+        journal.stop()
+
+
+def test_load_utxo_set_ignores_a_log_folded_under_it(monkeypatch):
+    import evrmail.daemon.journal as journal_module
+
+    store = get_utxo_store()
+    journal = PersistenceJournal(store, path=JOURNAL_FILE, durability="flush")
+    journal.start(thread=False)
+    cache = UTXOSet()
+    cache.add(utxo("ff" * 32), CONFIRMED)
+    journal.record(cache)
+    journal.commit()
+
+    # The daemon spends the output and snapshots right after the reader took the log
+    real_read = journal_module.read_journal
+    reads = []
+
+    def read_then_snapshot(*args):
+        records = real_read(*args)
+        if not reads:
+            cache.mark_spent("ff" * 32, 0)
+            journal.record(cache)
+            journal.snapshot()
+        reads.append(len(records))
+        return records
+
+    monkeypatch.setattr(journal_module, "read_journal", read_then_snapshot)
+    try:
+        loaded = load_utxo_set()
+        assert loaded.get("ff" * 32, 0)["spent"] is True
+        assert len(reads) == 2
+    finally:
+        journal.stop()
@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+
+from evrmail.utils import logger as log
+from evrmail.utils.logger import CHAIN, SWITCHABLE_CATEGORIES, WALLET
+
+
+class Probe:
+    """A `%` argument and `details` callable that record whether they were evaluated."""
+
+    def __init__(self):
+        self.formatted = 0
+        self.details = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "probe"
+
+    def build_details(self):
+        self.details += 1
+        return {"probe": True}
+
+
+@pytest.fixture
+def callbacks():
+    """Restore category state afterwards and record what reaches the callbacks."""
+    enabled, levels = set(log._enabled_categories), dict(log._category_levels)
+    seen = []
+    unsubscribe = log.register_callback(lambda *entry: seen.append(entry))
+    yield seen
+    unsubscribe()
+    log._category_levels.clear()
+    log._category_levels.update(levels)
+    log.set_enabled_categories(enabled)
+
+
+def test_disabled_category_is_never_formatted(callbacks):
+    log.set_enabled_categories(set(SWITCHABLE_CATEGORIES) - {CHAIN})
+    probe = Probe()
+    log.chain("error", "spent %s", probe, details=probe.build_details)
+    assert (probe.formatted, probe.details) == (0, 0)
+    assert callbacks == []
+    assert not log.is_enabled(CHAIN, "critical")
+
+
+def test_level_below_the_category_level_is_never_formatted(callbacks):
+    log.set_category_level(WALLET, logging.WARNING)
+    probe = Probe()
+    log.wallet("info", "address %s", probe, details=probe.build_details)
+    assert (probe.formatted, probe.details) == (0, 0)
+    assert callbacks == []
+
+    log.wallet("warning", "address %s", probe, details=probe.build_details)
+    assert (probe.formatted, probe.details) == (1, 1)
+    assert callbacks == [(WALLET, "warning", logging.WARNING, "address probe", {"probe": True})]
+
+
+def test_reenabled_category_logs_again(callbacks):
+    log.set_enabled_categories(set())
+    log.set_category_level(CHAIN, logging.INFO)
+    log.chain("info", "block %s", 1)
+    assert callbacks == []
+
+    log.set_enabled_categories({CHAIN})
+    log.chain("info", "block %s", 2)
+    assert [entry[3] for entry in callbacks] == ["block 2"]
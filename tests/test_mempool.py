@@ -0,0 +1,119 @@
+import time
+
+import evrmail.daemon.__main__ as daemon
+from evrmail.daemon.mempool import RECONCILE_GRACE, MempoolTracker
+from evrmail.daemon.utxo_set import CONFIRMED, MEMPOOL, UTXOSet
+
+
+def utxo(txid, vout=0, **fields):
+    return {"txid": txid, "vout": vout, "address": "EA", "amount": 100, **fields}
+
+
+def receive(tracker, utxos, txid, spends=(), first_seen=None):
+    """Apply a mempool tx of ours the way the daemon does: replace, spend, add output, track."""
+    evicted = tracker.replace_conflicts(txid, spends, utxos)
+    for outpoint in spends:
+        utxos.mark_spent(*outpoint)
+    utxos.add(utxo(txid, first_seen=first_seen or time.time()), MEMPOOL)
+    tracker.track(txid, spends, utxos)
+    if first_seen is not None:
+        tracker.txs[txid]["first_seen"] = first_seen
+    return evicted
+
+
+def funded():
+    utxos = UTXOSet()
+    utxos.add(utxo("funding", block_height=10), CONFIRMED)
+    return MempoolTracker(expiry=3600), utxos
+
+
+def test_replacement_evicts_the_earlier_spend():
+    tracker, utxos = funded()
+    receive(tracker, utxos, "first", [("funding", 0)])
+    assert utxos.get("funding", 0)["spent_by"] == "first"
+
+    assert receive(tracker, utxos, "second", [("funding", 0)]) == 1
+    assert not utxos.has_tx("first")
+    assert utxos.get("funding", 0)["spent"] is True
+    assert tracker.spends == {("funding", 0): "second"}
+    assert tracker.stats["replaced"] == 1
+
+
+def test_eviction_takes_mempool_descendants():
+    tracker, utxos = funded()
+    receive(tracker, utxos, "parent", [("funding", 0)])
+    receive(tracker, utxos, "child", [("parent", 0)])
+    receive(tracker, utxos, "grandchild", [("child", 0)])
+
+    assert tracker.evict("parent", utxos, "conflicted") == 3
+    assert [u["txid"] for u in utxos.iter()] == ["funding"]
+    assert utxos.get("funding", 0)["spent"] is False
+    assert utxos.get("funding", 0)["spent_by"] is None
+    assert tracker.txs == {} and tracker.spends == {}
+
+
+def test_confirmed_spend_is_never_undone():
+    tracker, utxos = funded()
+    receive(tracker, utxos, "ours", [("funding", 0)])
+    utxos.update("funding", 0, spent_height=11)
+    tracker.evict("ours", utxos, "dropped")
+    assert utxos.get("funding", 0)["spent"] is True
+
+
+def test_expire_only_old_transactions():
+    tracker, utxos = funded()
+    now = 100_000.0
+    receive(tracker, utxos, "old", [("funding", 0)], first_seen=now - 7200)
+    receive(tracker, utxos, "new", first_seen=now - 60)
+    assert tracker.expire(utxos, now) == 1
+    assert set(tracker.txs) == {"new"}
+    assert utxos.get("funding", 0)["spent"] is False
+    assert tracker.stats["expired"] == 1
+
+
+def test_reconcile_spares_young_transactions():
+    tracker, utxos = funded()
+    now = 100_000.0
+    receive(tracker, utxos, "dropped", first_seen=now - RECONCILE_GRACE - 1)
+    receive(tracker, utxos, "listed", first_seen=now - 3000)
+    receive(tracker, utxos, "young", first_seen=now - RECONCILE_GRACE + 1)
+    assert tracker.reconcile({"listed"}, utxos, now) == 1
+    assert set(tracker.txs) == {"listed", "young"}
+    assert not tracker.reconcile_due()
+
+
+def test_load_restores_spends_after_restart():
+    tracker, utxos = funded()
+    utxos.add(utxo("settled", block_height=9), CONFIRMED)
+    receive(tracker, utxos, "pending", [("funding", 0)], first_seen=5000.0)
+    utxos.mark_spent("settled", 0)
+    utxos.update("settled", 0, spent_by="mined", spent_height=12)
+
+    reloaded = UTXOSet.from_dict(utxos.to_dict())
+    restarted = MempoolTracker()
+    restarted.load(reloaded)
+    assert restarted.spends == {("funding", 0): "pending"}
+    assert restarted.txs["pending"]["first_seen"] == 5000.0
+
+    # The restored spend is still replaceable
+    assert receive(restarted, reloaded, "bump", [("funding", 0)]) == 1
+    assert not reloaded.has_tx("pending")
+
+
+def test_node_mempool_is_fetched_only_when_reconcile_is_due(monkeypatch):
+    tracker, utxos = funded()
+    receive(tracker, utxos, "gone", first_seen=time.time() - RECONCILE_GRACE - 1)
+    calls = []
+
+    class Node:
+        def getrawmempool(self):
+            calls.append(1)
+            return []
+    monkeypatch.setattr(daemon, "rpc", Node())
+    monkeypatch.setattr(daemon, "mempool_tracker", tracker)
+
+    node_txids = daemon.fetch_node_mempool()
+    assert node_txids == set() and calls == [1]
+    assert daemon.evict_stale_mempool(utxos, node_txids) == 1
+    assert daemon.fetch_node_mempool() is None and calls == [1]    # reconciled just now
+    assert daemon.evict_stale_mempool(utxos) == 0
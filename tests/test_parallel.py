@@ -0,0 +1,109 @@
+import pytest
+
+import evrmail.daemon.__main__ as daemon
+from evrmail.bench.synthetic import SyntheticChain
+from evrmail.daemon.parallel import ParallelIngestor, matching_outputs
+from evrmail.daemon.shards import ShardPool
+from evrmail.daemon.utxo_set import UTXOSet
+from evrmail.daemon.watchlist import Watchlist
+from evrmail.wallet.block.stream import BlockView
+from evrmail.wallet.script.create import create_p2pkh_script
+
+LOOKAHEAD = 3
+
+
+class Txids:
+    def add(self, txid, height=None):
+        pass
+
+    def set_tip(self, height):
+        pass
+
+
+@pytest.fixture(params=["parallel", "sharded"])
+def ingestor(request):
+    pool = ParallelIngestor(2, min_txs=1) if request.param == "parallel" else ShardPool(2)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def paying(chain, *keys):
+    """A transaction paying each of `keys`, spending an output nobody watches."""
+    outputs = [(1000, bytes.fromhex(create_p2pkh_script(key.hash160.hex()))) for key in keys]
+    return chain.serialize([(chain.rng.randbytes(32), 0, b"")], outputs)
+
+
+def gap_limit_block(chain):
+    """Address #3 is used mid-block, which brings #4-#6 into view for the transactions after it."""
+    keys = chain.ours
+    height = chain.start_height + 1
+    txs = [chain.coinbase(height)]
+    txs += [chain.transaction({}, height) for _ in range(10)]
+    txs.append(paying(chain, keys[3]))
+    txs += [chain.transaction({}, height) for _ in range(10)]
+    txs.append(paying(chain, keys[6]))
+    txs.append(paying(chain, keys[2], keys[5], keys[7]))
+    return BlockView(chain.block(chain.start_hash, height, txs)), height
+
+
+def watch_with_gap_limit(monkeypatch, chain):
+    """Stand-in wallet: watches addresses up to LOOKAHEAD past the highest used one."""
+    keys = chain.ours
+    state = {"used": 0}
+
+    def refresh():
+        watched = {key.address for key in keys[:state["used"] + 1 + LOOKAHEAD]}
+        monkeypatch.setattr(daemon, "known_addresses", {address: "bench0" for address in watched})
+        monkeypatch.setattr(daemon, "high_water", {"bench0": state["used"]})
+        monkeypatch.setattr(daemon, "watchlist", Watchlist(watched))
+
+    def mark_address_used(name, index):
+        state["used"] = index
+        refresh()
+        return []
+
+    monkeypatch.setattr(daemon, "mark_address_used", mark_address_used)
+    monkeypatch.setattr(daemon, "address_indexes", {key.address: ("bench0", i) for i, key in enumerate(keys)})
+    monkeypatch.setattr(daemon, "mempool_tracker", None)
+    refresh()
+
+
+def ingest(block, height, ingestor):
+    utxo_cache = UTXOSet()
+    daemon._ingest_block(block, utxo_cache, Txids(), height, ingestor, False)
+    return sorted((u["txid"], u["vout"], u["address"], u["amount"]) for u in utxo_cache.iter())
+
+
+def test_classify_matches_sequential_scan(ingestor):
+    chain = SyntheticChain(owned_fraction=0.2, message_fraction=0.2, p2sh_fraction=0.3, seed=5)
+    height = chain.start_height + 1
+    txs = [chain.coinbase(height)] + [chain.transaction({}, height) for _ in range(80)]
+    block = BlockView(chain.block(chain.start_hash, height, txs))
+    watchlist = Watchlist(key.address for key in chain.ours)
+    if isinstance(ingestor, ShardPool):
+        ingestor.sync_watchlist(watchlist)
+
+    summaries = ingestor.classify(block, watchlist)
+    assert [s["txid"] for s in summaries] == [tx.txid for tx in block]
+    for summary, tx in zip(summaries, block):
+        assert summary["vin"] == [{"txid": txid, "vout": n} for txid, n in tx.outpoints()]
+        assert summary["vout"] == matching_outputs(tx, watchlist)
+    assert any(summary["vout"] for summary in summaries)
+
+
+def test_ingest_matches_sequential_when_gap_limit_grows_mid_block(monkeypatch, ingestor):
+    chain = SyntheticChain(wallets=1, addresses_per_wallet=8, strangers=10, message_fraction=0, seed=7)
+    block, height = gap_limit_block(chain)
+
+    watch_with_gap_limit(monkeypatch, chain)
+    sequential = ingest(block, height, None)
+    watch_with_gap_limit(monkeypatch, chain)
+    if isinstance(ingestor, ShardPool):
+        ingestor.sync_watchlist(daemon.watchlist)
+    concurrent = ingest(block, height, ingestor)
+
+    assert concurrent == sequential
+    found = {address for _, _, address, _ in sequential}
+    # #6 and #7 are only watched once #3 and #6 have been seen earlier in the block
+    assert {chain.ours[i].address for i in (2, 3, 5, 6, 7)} <= found
@@ -0,0 +1,173 @@
+import pytest
+
+import evrmail.daemon.__main__ as daemon
+from evrmail.bench.synthetic import SyntheticChain
+from evrmail.daemon.checkpoint import Checkpoint, addresses_digest, find_common_ancestor, rollback_to
+from evrmail.daemon.utxo_set import CONFIRMED, UTXOSet
+from evrmail.daemon.watchlist import Watchlist
+from evrmail.wallet.block.stream import BlockView
+from evrmail.wallet.script.create import create_p2pkh_script
+
+
+class Node:
+    """Stub RPC serving one best chain of raw blocks, keyed by height."""
+
+    def __init__(self, base_height, base_hash):
+        self.base_height = base_height
+        self.blocks = {base_height: (base_hash, None)}
+
+    def getblockcount(self):
+        return max(self.blocks)
+
+    def getblockhash(self, height):
+        return self.blocks[height][0]
+
+    def getblock(self, block_hash, verbosity=1):
+        return next(raw for bh, raw in self.blocks.values() if bh == block_hash)
+
+    def getrawmempool(self):
+        return []
+
+    def batch(self, calls, raise_errors=True):
+        return [getattr(self, method)(*params) for method, params in calls]
+
+
+class Txids:
+    def add(self, txid, height=None):
+        pass
+
+    def set_tip(self, height):
+        pass
+
+
+class Journal:
+    def record(self, utxo_set, meta=None):
+        return False
+
+
+class Chain:
+    """Blocks on a SyntheticChain, with helpers to pay and spend our first address."""
+
+    def __init__(self, monkeypatch):
+        self.synthetic = SyntheticChain(wallets=1, addresses_per_wallet=2, strangers=5, seed=3)
+        self.key = self.synthetic.ours[0]
+        self.node = Node(self.synthetic.start_height, self.synthetic.start_hash)
+        monkeypatch.setattr(daemon, "rpc", self.node)
+        monkeypatch.setattr(daemon, "known_addresses", {self.key.address: "bench0"})
+        monkeypatch.setattr(daemon, "address_indexes", {})
+        monkeypatch.setattr(daemon, "watchlist", Watchlist([self.key.address]))
+        monkeypatch.setattr(daemon, "mempool_tracker", None)
+
+    def pay(self, *spends):
+        """A transaction paying our key, spending `spends` (outpoints) or a foreign coin."""
+        inputs = [(bytes.fromhex(txid)[::-1], vout, b"") for txid, vout in spends]
+        inputs = inputs or [(self.synthetic.rng.randbytes(32), 0, b"")]
+        script = bytes.fromhex(create_p2pkh_script(self.key.hash160.hex()))
+        return self.synthetic.serialize(inputs, [(1000, script)])
+
+    def mine(self, height, *txs):
+        """Put a block with `txs` at `height` on the node's best chain, dropping anything above."""
+        prev_hash = self.node.blocks[height - 1][0]
+        raw = self.synthetic.block(prev_hash, height, [self.synthetic.coinbase(height), *txs])
+        block = BlockView(raw)
+        for h in [h for h in self.node.blocks if h >= height]:
+            del self.node.blocks[h]
+        self.node.blocks[height] = (block.hash, raw.hex())
+        return block
+
+    def checkpoint(self, window=10):
+        return Checkpoint(self.synthetic.start_height, self.synthetic.start_hash, window=window,
+                          addresses=addresses_digest(daemon.known_addresses))
+
+
+def txids(block):
+    return [tx.txid for tx in block]
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    return Chain(monkeypatch)
+
+
+def main_chain(chain):
+    """Heights +1..+3: an output at +1 spent at +3, and an output created at +2."""
+    base = chain.synthetic.start_height
+    first = chain.mine(base + 1, chain.pay())
+    kept = (txids(first)[1], 0)
+    second = chain.mine(base + 2, chain.pay())
+    orphaned = (txids(second)[1], 0)
+    third = chain.mine(base + 3, chain.pay(kept))
+    spend = (txids(third)[1], 0)
+    return kept, orphaned, spend
+
+
+def test_fork_inside_window_rolls_back_and_replays(chain):
+    base = chain.synthetic.start_height
+    kept, orphaned, spend = main_chain(chain)
+    checkpoint, utxos = chain.checkpoint(), UTXOSet()
+    assert daemon.catch_up(checkpoint, utxos, Txids()) == 3
+    assert utxos.get(*kept)["spent_height"] == base + 3
+
+    # The node switches to a longer branch forking after +1
+    fork = chain.mine(base + 2, chain.pay())
+    chain.mine(base + 3)
+    tip = chain.mine(base + 4)
+    assert find_common_ancestor(chain.node, checkpoint) == base + 1
+    assert daemon.catch_up(checkpoint, utxos, Txids()) == 3
+
+    assert utxos.get(*orphaned) is None and utxos.get(*spend) is None
+    assert utxos.get(*kept)["spent"] is False and utxos.get(*kept)["spent_height"] is None
+    assert utxos.get(txids(fork)[1], 0)["block_height"] == base + 2
+    assert (checkpoint.height, checkpoint.hash) == (base + 4, tip.hash)
+
+
+def test_rollback_to_only_touches_state_above_the_ancestor():
+    utxos = UTXOSet()
+    utxos.add({"txid": "aa", "vout": 0, "block_height": 5, "spent": True, "spent_height": 7}, CONFIRMED)
+    utxos.add({"txid": "bb", "vout": 0, "block_height": 8}, CONFIRMED)
+    utxos.add({"txid": "cc", "vout": 0, "block_height": 4, "spent": True, "spent_height": 6}, CONFIRMED)
+    assert rollback_to(utxos, 6) == (1, 1)
+    assert utxos.get("aa", 0)["spent"] is False
+    assert utxos.get("bb", 0) is None
+    assert utxos.get("cc", 0)["spent_height"] == 6
+
+
+def test_fork_deeper_than_window_returns_none(chain):
+    base = chain.synthetic.start_height
+    main_chain(chain)
+    checkpoint, utxos = chain.checkpoint(window=2), UTXOSet()
+    daemon.catch_up(checkpoint, utxos, Txids())
+    assert [h for h, _ in checkpoint.recent] == [base + 2, base + 3]
+
+    for height in range(base + 1, base + 5):
+        chain.mine(height)
+    before = {(u["txid"], u["vout"]) for u in utxos.iter()}
+    assert find_common_ancestor(chain.node, checkpoint) is None
+    assert daemon.catch_up(checkpoint, utxos, Txids()) is None
+    assert {(u["txid"], u["vout"]) for u in utxos.iter()} == before
+    assert checkpoint.height == base + 3
+
+
+def test_apply_block_extends_or_catches_up(chain, monkeypatch):
+    base = chain.synthetic.start_height
+    kept, orphaned, spend = main_chain(chain)
+    checkpoint, utxos = chain.checkpoint(), UTXOSet()
+    daemon.catch_up(checkpoint, utxos, Txids())
+
+    # Extends our tip: ingested directly
+    block = chain.mine(base + 4, chain.pay())
+    count, checkpoint = daemon.apply_block(block, checkpoint, utxos, Txids(), Journal())
+    assert count == 2 and checkpoint.hash == block.hash
+    assert utxos.get(txids(block)[1], 0)["block_height"] == base + 4
+
+    # Doesn't extend it: the reorg is rolled back and the new branch replayed
+    resyncs = []
+    monkeypatch.setattr(daemon, "sync_utxos_from_node", lambda *a, **k: resyncs.append(a))
+    chain.mine(base + 2)
+    chain.mine(base + 3)
+    chain.mine(base + 4)
+    block = chain.mine(base + 5)
+    count, checkpoint = daemon.apply_block(block, checkpoint, utxos, Txids(), Journal())
+    assert count == 0 and resyncs == []
+    assert (checkpoint.height, checkpoint.hash) == (base + 5, block.hash)
+    assert utxos.get(*orphaned) is None and utxos.get(*kept)["spent"] is False
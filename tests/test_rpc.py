@@ -0,0 +1,100 @@
+import pytest
+
+from evrmail.utils import rpc as rpc_module
+from evrmail.utils.rpc import RPCError, RPCFacade, rpc_from_config
+
+
+class Response:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class Session:
+    """Stands in for requests.Session; `reply(payload, auth)` builds each response."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.posts = []
+
+    def post(self, url, json=None, auth=None, timeout=None):
+        self.posts.append((json, auth))
+        return self.reply(json, auth)
+
+
+def facade(reply, **kwargs):
+    rpc = RPCFacade("http://127.0.0.1:8819", "user", "pass", **kwargs)
+    session = Session(reply)
+    rpc._local.session = session
+    return rpc, session
+
+
+def test_batch_results_follow_request_order_not_reply_order():
+    def reply(payload, auth):
+        return Response([{"id": call["id"], "result": call["params"][0], "error": None}
+                         for call in reversed(payload)])
+    rpc, _ = facade(reply)
+    assert rpc.batch([("getblockhash", [h]) for h in (1, 2, 3)]) == [1, 2, 3]
+    assert rpc.batches == 1
+    assert rpc.latency_report()["getblockhash"]["calls"] == 3
+
+
+def test_batch_errors_are_returned_with_raise_errors_false():
+    def reply(payload, auth):
+        first, second, _ = payload      # the third reply is missing
+        return Response([
+            {"id": second["id"], "result": None, "error": {"code": -5, "message": "No such tx"}},
+            {"id": first["id"], "result": "ok", "error": None},
+        ], 500)
+    rpc, _ = facade(reply)
+
+    results = rpc.batch([("getrawtransaction", ["aa"])] * 3, raise_errors=False)
+    assert results[0] == "ok"
+    assert isinstance(results[1], RPCError) and results[1].code == -5
+    assert isinstance(results[2], RPCError) and results[2].message == "missing reply"
+    assert rpc.latency_report()["getrawtransaction"]["errors"] == 2
+
+    with pytest.raises(RPCError):
+        rpc.batch([("getrawtransaction", ["aa"])] * 3)
+
+
+def test_new_cookie_is_read_after_a_401(tmp_path, monkeypatch):
+    cookie = tmp_path / ".cookie"
+    cookie.write_text("__cookie__:old\n")
+    monkeypatch.setattr(rpc_module, "DEFAULT_COOKIE_FILE", cookie)
+    rpc = rpc_from_config({})
+    assert rpc.auth == ("__cookie__", "old")
+
+    session = Session(lambda payload, auth: (
+        Response({"id": payload["id"], "result": 7, "error": None}) if auth == ("__cookie__", "new")
+        else Response(None, 401)
+    ))
+    rpc._local.session = session
+
+    cookie.write_text("__cookie__:new\n")       # the node restarted
+    assert rpc.getblockcount() == 7
+    assert [auth for _, auth in session.posts] == [("__cookie__", "old"), ("__cookie__", "new")]
+
+    # An unchanged cookie is not retried
+    cookie.write_text("__cookie__:stale\n")
+    rpc.auth = ("__cookie__", "stale")
+    with pytest.raises(RuntimeError, match="401"):
+        rpc.getblockcount()
+    assert len(session.posts) == 3
+
+
+def test_explicit_credentials_are_not_replaced_by_the_cookie(tmp_path, monkeypatch):
+    cookie = tmp_path / ".cookie"
+    cookie.write_text("__cookie__:secret\n")
+    monkeypatch.setattr(rpc_module, "DEFAULT_COOKIE_FILE", cookie)
+    rpc = rpc_from_config({"rpc_user": "user", "rpc_password": "pass"})
+    rpc._local.session = Session(lambda payload, auth: Response(None, 401))
+    with pytest.raises(RuntimeError, match="401"):
+        rpc.getblockcount()
+    assert rpc.auth == ("user", "pass")
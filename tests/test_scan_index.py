@@ -0,0 +1,87 @@
+import pytest
+
+import evrmail.daemon.__main__ as daemon
+from evrmail.utils.scan_index import ScanIndex, key_fingerprints, message_id
+
+
+def message(n):
+    return {"content": {"subject": f"#{n}"}, "raw": {"n": n}}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ScanIndex(tmp_path / "scan_index.db")
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def payloads(monkeypatch, index):
+    """Route scan_new_payload/deliver_payload through `index` and a fake scanner."""
+    state = {"messages": {}, "scans": 0, "delivered": []}
+
+    def scan_payload(cid, raise_unavailable=False):
+        state["scans"] += 1
+        return list(state["messages"].get(cid, []))
+
+    monkeypatch.setattr(daemon, "get_scan_index", lambda: index)
+    monkeypatch.setattr(daemon, "scan_payload", scan_payload)
+    monkeypatch.setattr(daemon, "shard_pool", None)
+    monkeypatch.setattr(daemon, "handle_payload_messages",
+                        lambda cid, txid, messages: state["delivered"].extend(messages))
+    monkeypatch.setattr(daemon, "known_addresses", {"EA": "w"})
+    return state
+
+
+def test_lookup_after_record(index):
+    keys = key_fingerprints(["EA", "EB"])
+    assert index.lookup("QmA", keys) is None
+    index.record("QmA", keys, ["m1", "m2"])
+    assert index.lookup("QmA", keys) == ["m1", "m2"]
+    assert index.lookup("QmA", key_fingerprints(["EA"])) == ["m1", "m2"]   # subset is covered
+    assert index.stats == {"skipped": 2, "scanned": 1}
+
+
+def test_lookup_misses_once_the_key_set_grows(tmp_path, index):
+    index.record("QmA", key_fingerprints(["EA"]), [])
+    assert index.lookup("QmA", key_fingerprints(["EA", "EB"])) is None
+
+    reopened = ScanIndex(tmp_path / "scan_index.db")
+    assert reopened.lookup("QmA", key_fingerprints(["EA"])) == []
+    assert reopened.lookup("QmA", key_fingerprints(["EA", "EB"])) is None
+    reopened.close()
+
+
+def test_scan_new_payload_skips_a_recorded_cid(payloads):
+    payloads["messages"]["QmA"] = [message(1)]
+    daemon.deliver_payload("QmA", "aa" * 32, daemon.scan_new_payload("QmA"))
+    assert daemon.scan_new_payload("QmA") == ([], None)
+    assert payloads["scans"] == 1
+    assert payloads["delivered"] == [message(1)]
+
+
+def test_rescan_after_new_key_delivers_only_new_messages(payloads):
+    payloads["messages"]["QmA"] = [message(1)]
+    daemon.deliver_payload("QmA", "aa" * 32, daemon.scan_new_payload("QmA"))
+
+    # A new address decrypts one more message from the same payload
+    daemon.known_addresses = {"EA": "w", "EB": "w"}
+    payloads["messages"]["QmA"] = [message(1), message(2)]
+    daemon.deliver_payload("QmA", "aa" * 32, daemon.scan_new_payload("QmA"))
+
+    assert payloads["scans"] == 2
+    assert payloads["delivered"] == [message(1), message(2)]
+    assert daemon.get_scan_index().message_ids("QmA") == [message_id(message(1)), message_id(message(2))]
+
+
+def test_failed_delivery_is_not_recorded(payloads):
+    payloads["messages"]["QmA"] = [message(1)]
+
+    def fail(cid, txid, messages):
+        raise RuntimeError("inbox locked")
+    daemon.handle_payload_messages = fail
+    with pytest.raises(RuntimeError):
+        daemon.deliver_payload("QmA", "aa" * 32, daemon.scan_new_payload("QmA"))
+
+    messages, record = daemon.scan_new_payload("QmA")
+    assert messages == [message(1)] and record is not None
@@ -0,0 +1,82 @@
+from evrmail.daemon.sequence import GapRecovery, SequenceTracker, SEQUENCE_MODULUS
+
+
+def test_sequence_in_order_has_no_gap():
+    tracker = SequenceTracker()
+    assert [tracker.observe("rawtx", n) for n in range(5)] == [0] * 5
+    assert tracker.stats["rawtx"] == {"received": 5, "gaps": 0, "missed": 0, "resets": 0}
+
+
+def test_sequence_gap_counts_missed_messages():
+    tracker = SequenceTracker()
+    tracker.observe("rawblock", 10)
+    assert tracker.observe("rawblock", 14) == 3
+    assert tracker.observe("rawblock", 15) == 0
+    assert tracker.stats["rawblock"]["gaps"] == 1
+    assert tracker.stats["rawblock"]["missed"] == 3
+
+
+def test_sequence_topics_are_independent():
+    tracker = SequenceTracker()
+    tracker.observe("rawtx", 1)
+    tracker.observe("rawblock", 7)
+    assert tracker.observe("rawtx", 2) == 0
+    assert tracker.observe("rawblock", 9) == 1
+
+
+def test_sequence_wraps_around():
+    tracker = SequenceTracker()
+    tracker.observe("rawtx", SEQUENCE_MODULUS - 1)
+    assert tracker.observe("rawtx", 0) == 0
+    assert tracker.observe("rawtx", 2) == 1
+
+
+def test_sequence_node_restart_is_a_gap():
+    tracker = SequenceTracker()
+    tracker.observe("rawtx", 41)
+    assert tracker.observe("rawtx", 0) == 1
+    assert tracker.stats["rawtx"]["resets"] == 1
+
+
+def test_sequence_reset_and_missing_numbers():
+    tracker = SequenceTracker()
+    tracker.observe("rawtx", 3)
+    tracker.reset("rawtx")
+    assert tracker.observe("rawtx", 90) == 0
+    assert tracker.observe("rawtx", None) == 0
+    assert tracker.observe("rawtx", 91) == 0
+
+
+def test_gap_recovery_merges_requests_and_runs_blocks_first():
+    calls = []
+    recovery = GapRecovery(lambda: calls.append("blocks"), lambda: calls.append("mempool"))
+    recovery.request(blocks=False)
+    recovery.request(blocks=True)
+    recovery.run_pending()
+    assert calls == ["blocks", "mempool"]
+    recovery.run_pending()
+    assert calls == ["blocks", "mempool"]
+    assert recovery.stats["requests"] == 2
+    assert recovery.stats["block_recoveries"] == 1
+
+
+def test_gap_recovery_failure_is_counted():
+    def fail():
+        raise RuntimeError("node went away")
+    recovery = GapRecovery(fail, lambda: None)
+    recovery.request(blocks=True)
+    recovery.run_pending()
+    assert recovery.stats["failures"] == 1
+    assert recovery.stats["block_recoveries"] == 0
+
+
+def test_gap_recovery_thread_runs_requests():
+    import threading
+    done = threading.Event()
+    recovery = GapRecovery(lambda: None, done.set)
+    recovery.start()
+    try:
+        recovery.request()
+        assert done.wait(5)
+    finally:
+        recovery.stop()
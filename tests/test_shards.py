@@ -0,0 +1,58 @@
+import pytest
+
+from evrmail.bench.synthetic import SyntheticChain
+from evrmail.daemon.shards import ShardPool, partition, shard_of_address
+from evrmail.daemon.watchlist import Watchlist
+from evrmail.utils import ipfs
+from evrmail.utils import scan_payload as scan_payload_module
+from evrmail.utils.scan_payload import decrypt_batch
+
+SHARDS = 3
+
+
+@pytest.fixture
+def chain():
+    return SyntheticChain(wallets=1, addresses_per_wallet=12, strangers=6, owned_fraction=0.6,
+                          messages_per_batch=12, seed=11)
+
+
+@pytest.fixture
+def pool(monkeypatch, chain):
+    """Shards holding the chain's wallet keys; they read them when forked."""
+    keys = {key.address: key.privkey for key in chain.ours}
+    monkeypatch.setattr(scan_payload_module, "get_wallet_decryption_keys", lambda: keys)
+    pool = ShardPool(SHARDS, timeout=30)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def test_partition_assigns_each_address_to_one_shard(chain):
+    addresses = {key.address for key in chain.ours}
+    parts = partition(Watchlist(addresses), SHARDS)
+    assert set().union(*parts) == addresses
+    assert sum(len(part) for part in parts) == len(addresses)
+    for index, part in enumerate(parts):
+        assert all(shard_of_address(address, SHARDS) == index for address in part)
+
+
+def test_split_batch_keeps_payload_positions(chain):
+    _, batch = chain.batch_payload(chain.strangers[0], chain.start_height)
+    parts = ShardPool(SHARDS)._split_batch(batch)
+    positions = sorted(p for _, ps in parts.values() for p in ps)
+    assert positions == list(range(len(batch["messages"])))
+    for shard, (part, ps) in parts.items():
+        assert part["messages"] == [batch["messages"][p] for p in ps]
+        assert all(shard_of_address(m["to"], SHARDS) == shard for m in part["messages"])
+
+
+def test_scan_payload_matches_decrypt_batch_order(monkeypatch, chain, pool):
+    cid, batch = chain.batch_payload(chain.strangers[0], chain.start_height)
+    monkeypatch.setattr(ipfs, "fetch_ipfs_json", lambda requested: batch if requested == cid else None)
+    keys = {key.address: key.privkey for key in chain.ours}
+
+    expected = decrypt_batch(batch, keys, cid)
+    found = pool.scan_payload(cid)
+    assert len({shard_of_address(m["raw"]["to"], SHARDS) for m in expected}) > 1
+    assert [m["raw"] for m in found] == [m["raw"] for m in expected]
+    assert pool.stats["fallbacks"] == 0
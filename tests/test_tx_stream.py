@@ -0,0 +1,38 @@
+from evrmail.bench.synthetic import SyntheticChain
+from evrmail.wallet.block.stream import BlockView, TxView
+from evrmail.wallet.tx.decode import decode_transaction
+
+
+def synthetic_block(txs=40, seed=1):
+    chain = SyntheticChain(message_fraction=0.2, p2sh_fraction=0.3, seed=seed)
+    height = chain.start_height + 1
+    raw_txs = [chain.coinbase(height)] + [chain.transaction({}, height) for _ in range(txs)]
+    return BlockView(chain.block(chain.start_hash, height, raw_txs))
+
+
+def test_txview_matches_decode_transaction():
+    block = synthetic_block()
+    assert block.tx_count == 41
+    for tx in block:
+        decoded = decode_transaction(bytes(tx.raw()).hex(), decode_scripts=False)
+        assert tx.txid == decoded["txid"]
+        assert tx.size == decoded["size"]
+        assert tx.vin == decoded["vin"]
+        assert tx.vout == decoded["vout"]
+
+
+def test_txview_raw_accessors_match_dict_fields():
+    for tx in synthetic_block(seed=2):
+        assert tx.input_count == len(tx.vin)
+        assert tx.output_count == len(tx.vout)
+        assert list(tx.outpoints()) == [(vin["txid"], vin["vout"]) for vin in tx.vin if "txid" in vin]
+        for vout in tx.vout:
+            assert tx.value(vout["n"]) == vout["value"]
+            assert tx.script(vout["n"]).hex() == vout["scriptPubKey"]["hex"]
+
+
+def test_txview_from_bytes_round_trips():
+    tx = next(iter(synthetic_block(txs=1)))
+    again = TxView.from_bytes(bytes(tx.raw()))
+    assert again.txid == tx.txid
+    assert again.vout == tx.vout
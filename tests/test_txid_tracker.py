@@ -0,0 +1,97 @@
+import json
+
+from evrmail.daemon.txid_tracker import ProcessedTxids, _RECORD
+
+
+def txid(n):
+    return f"{n:064x}"
+
+
+def test_add_and_prune_by_depth(tmp_path):
+    tracker = ProcessedTxids(tmp_path / "txids.bin", prune_depth=10)
+    tracker.set_tip(100)
+    assert tracker.add(txid(1), 95) is True
+    assert tracker.add(txid(1), 95) is False
+    tracker.add(txid(2), 100)
+    tracker.add(txid(3))                      # mempool: seen at the tip
+    assert txid(3) in tracker and len(tracker) == 3
+
+    assert tracker.set_tip(106) == 1          # 95 < 106 - 10
+    assert txid(1) not in tracker
+    assert txid(2) in tracker and txid(3) in tracker
+
+
+def test_reload_keeps_live_entries(tmp_path):
+    path = tmp_path / "txids.bin"
+    tracker = ProcessedTxids(path, prune_depth=10)
+    tracker.add(txid(1), 50)
+    tracker.add(txid(2), 70)
+    tracker.flush()
+    tracker.close()
+
+    again = ProcessedTxids(path, prune_depth=10)
+    assert again.tip == 70
+    assert txid(2) in again and txid(1) not in again
+
+
+def test_torn_tail_record_is_truncated(tmp_path):
+    path = tmp_path / "txids.bin"
+    tracker = ProcessedTxids(path)
+    tracker.add(txid(1), 5)
+    tracker.flush()
+    tracker.close()
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (_RECORD.size - 3))
+
+    again = ProcessedTxids(path)
+    assert txid(1) in again and len(again) == 1
+    assert path.stat().st_size == _RECORD.size
+
+
+def test_compact_rewrites_only_live_entries(tmp_path):
+    path = tmp_path / "txids.bin"
+    tracker = ProcessedTxids(path, prune_depth=5)
+    for n in range(1, 21):
+        tracker.add(txid(n), n)
+    tracker.set_tip(20)
+    tracker.compact()
+    assert path.stat().st_size == len(tracker) * _RECORD.size == 6 * _RECORD.size
+
+    tracker.add(txid(99), 20)
+    tracker.flush()
+    again = ProcessedTxids(path, prune_depth=5)
+    assert len(again) == 7 and txid(99) in again
+
+
+def test_set_tip_compacts_when_pruned_records_dominate(tmp_path):
+    path = tmp_path / "txids.bin"
+    tracker = ProcessedTxids(path, prune_depth=0)
+    for n in range(3000):
+        tracker.add(txid(n), 1)
+    tracker.set_tip(2)
+    tracker.flush()
+    assert len(tracker) == 0
+    assert path.stat().st_size == 0
+
+
+def test_import_json_on_fresh_log_survives_first_tip(tmp_path):
+    legacy = tmp_path / "processed_txids.json"
+    legacy.write_text(json.dumps([txid(1), txid(2), "not-hex"]))
+    tracker = ProcessedTxids(tmp_path / "txids.bin", prune_depth=10)
+    assert tracker.import_json(legacy) == 2
+    assert not legacy.exists() and (tmp_path / "processed_txids.json.migrated").exists()
+
+    assert tracker.set_tip(5000) == 0
+    assert txid(1) in tracker and txid(2) in tracker
+    tracker.flush()
+    assert txid(1) in ProcessedTxids(tmp_path / "txids.bin", prune_depth=10)
+    assert tracker.set_tip(5011) == 2
+
+
+def test_import_json_at_known_height(tmp_path):
+    legacy = tmp_path / "processed_txids.json"
+    legacy.write_text(json.dumps([txid(1)]))
+    tracker = ProcessedTxids(tmp_path / "txids.bin", prune_depth=10)
+    tracker.import_json(legacy, height=800)
+    assert tracker.tip == 800
+    assert tracker.set_tip(805) == 0 and txid(1) in tracker
@@ -0,0 +1,110 @@
+from evrmail.daemon.utxo_set import CONFIRMED, MEMPOOL, UTXOSet
+
+
+def utxo(txid, vout=0, address="EAlice", asset=None, amount=100):
+    return {"txid": txid, "vout": vout, "amount": amount, "asset": asset, "address": address, "spent": False}
+
+
+def outpoints(utxos):
+    return sorted((u["txid"], u["vout"]) for u in utxos)
+
+
+def indexes(utxo_set):
+    """The secondary indexes, with empty buckets as a failure of their own."""
+    return utxo_set._by_address, utxo_set._by_asset, utxo_set._by_txid
+
+
+def test_add_indexes_by_address_asset_and_txid():
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32, 0), CONFIRMED)
+    utxo_set.add(utxo("aa" * 32, 1, address="EBob", asset="EVRMAIL", amount=1), CONFIRMED)
+    utxo_set.add(utxo("bb" * 32, 0), MEMPOOL)
+
+    assert outpoints(utxo_set.by_address("EAlice")) == [("aa" * 32, 0), ("bb" * 32, 0)]
+    assert outpoints(utxo_set.by_address("EAlice", pool=CONFIRMED)) == [("aa" * 32, 0)]
+    assert outpoints(utxo_set.by_asset("EVRMAIL")) == [("aa" * 32, 1)]
+    assert outpoints(utxo_set.by_asset(None)) == [("aa" * 32, 0), ("bb" * 32, 0)]
+    assert utxo_set.has_tx("aa" * 32) and ("bb" * 32, 0) in utxo_set
+    assert sorted(utxo_set.addresses()) == ["EAlice", "EBob"]
+    assert utxo_set.count(CONFIRMED) == 2 and utxo_set.count(MEMPOOL) == 1
+
+
+def test_add_replaces_and_reindexes_an_outpoint():
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32, address="EAlice"), MEMPOOL)
+    utxo_set.add(utxo("aa" * 32, address="EBob", asset="EVRMAIL"), CONFIRMED)
+
+    assert len(utxo_set) == 1
+    assert utxo_set.by_address("EAlice") == []
+    assert utxo_set.by_asset(None) == []
+    assert outpoints(utxo_set.by_address("EBob")) == [("aa" * 32, 0)]
+    assert utxo_set.pool_of("aa" * 32, 0) == CONFIRMED
+
+
+def test_remove_and_remove_tx_drop_every_index_entry():
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32, 0), CONFIRMED)
+    utxo_set.add(utxo("aa" * 32, 1, asset="EVRMAIL"), MEMPOOL)
+    utxo_set.add(utxo("bb" * 32, 0, address="EBob"), CONFIRMED)
+
+    assert utxo_set.remove("bb" * 32, 0)["address"] == "EBob"
+    assert utxo_set.remove("bb" * 32, 0) is None
+    assert [u["vout"] for u in utxo_set.remove_tx("aa" * 32, MEMPOOL)] == [1]
+    assert outpoints(utxo_set.iter()) == [("aa" * 32, 0)]
+
+    utxo_set.remove_tx("aa" * 32)
+    assert len(utxo_set) == 0
+    assert indexes(utxo_set) == ({}, {}, {})
+    assert not utxo_set.has_tx("aa" * 32)
+
+
+def test_confirm_tx_moves_only_mempool_outputs():
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32, 0), MEMPOOL)
+    utxo_set.add(dict(utxo("aa" * 32, 1), block_height=5), CONFIRMED)
+    utxo_set.take_dirty()
+
+    assert utxo_set.confirm_tx("aa" * 32, height=9) is True
+    assert utxo_set.pool_of("aa" * 32, 0) == CONFIRMED
+    assert utxo_set.get("aa" * 32, 0)["block_height"] == 9
+    assert utxo_set.get("aa" * 32, 1)["block_height"] == 5
+    assert utxo_set.take_dirty() == {("aa" * 32, 0)}
+    assert utxo_set.confirm_tx("aa" * 32, height=9) is False
+    assert utxo_set.confirm_tx("cc" * 32) is False
+    assert outpoints(utxo_set.by_address("EAlice", pool=CONFIRMED)) == [("aa" * 32, 0), ("aa" * 32, 1)]
+
+
+def test_mark_spent_hides_outputs_from_unspent_lookups():
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32), CONFIRMED)
+    pool, spent = utxo_set.mark_spent("aa" * 32, 0)
+    assert pool == CONFIRMED and spent["spent"] is True
+    assert utxo_set.mark_spent("cc" * 32, 0) is None
+    assert utxo_set.by_address("EAlice") == []
+    assert outpoints(utxo_set.by_address("EAlice", include_spent=True)) == [("aa" * 32, 0)]
+    assert list(utxo_set.iter(include_spent=False)) == []
+
+
+def test_balances_sum_unspent_evr_and_assets_per_address():
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32, 0, amount=100), CONFIRMED)
+    utxo_set.add(utxo("aa" * 32, 1, amount=50), MEMPOOL)
+    utxo_set.add(utxo("bb" * 32, 0, address="EBob", amount=7), CONFIRMED)
+    utxo_set.add(utxo("bb" * 32, 1, asset="EVRMAIL", amount=3), CONFIRMED)
+    utxo_set.add(utxo("bb" * 32, 2, asset="EVRMAIL", amount=4), CONFIRMED)
+    utxo_set.add(utxo("cc" * 32, 0, amount=1000), CONFIRMED)
+    utxo_set.mark_spent("cc" * 32, 0)
+
+    assert utxo_set.balances() == {
+        "evr": {"EAlice": 150, "EBob": 7},
+        "assets": {"EVRMAIL": {"EAlice": 7}},
+    }
+
+
+def test_dict_round_trip_keeps_pools():
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32), CONFIRMED)
+    utxo_set.add(utxo("bb" * 32, address="EBob"), MEMPOOL)
+    again = UTXOSet.from_dict(utxo_set.to_dict())
+    assert again.pool_of("bb" * 32, 0) == MEMPOOL
+    assert again.to_dict() == utxo_set.to_dict()
@@ -0,0 +1,76 @@
+import json
+
+from evrmail.daemon.utxo_set import CONFIRMED, MEMPOOL, UTXOSet
+from evrmail.daemon.utxo_store import UTXOStore
+
+
+def utxo(txid, vout=0, address="EAddress", asset=None, amount=100):
+    return {"txid": txid, "vout": vout, "amount": amount, "asset": asset, "address": address, "spent": False}
+
+
+def test_migrate_json_imports_legacy_pools_once(tmp_path):
+    mempool_file = tmp_path / "mempool.json"
+    confirmed_file = tmp_path / "confirmed.json"
+    mempool_file.write_text(json.dumps({"EMine": [utxo("aa" * 32, address="EMine")]}))
+    # Legacy files could omit the address on each entry
+    legacy = utxo("bb" * 32, asset="EVRMAIL")
+    del legacy["address"]
+    confirmed_file.write_text(json.dumps({"EOther": [legacy, utxo("cc" * 32, 1, address="EOther")]}))
+
+    store = UTXOStore(tmp_path / "utxos.db")
+    assert store.migrate_json(mempool_file, confirmed_file) == 3
+
+    loaded = store.load()
+    assert loaded.pool_of("aa" * 32, 0) == MEMPOOL
+    assert loaded.pool_of("bb" * 32, 0) == CONFIRMED
+    assert loaded.get("bb" * 32, 0)["address"] == "EOther"
+    assert loaded.by_asset("EVRMAIL") == [loaded.get("bb" * 32, 0)]
+    assert not mempool_file.exists() and (tmp_path / "mempool.json.migrated").exists()
+    assert not confirmed_file.exists() and (tmp_path / "confirmed.json.migrated").exists()
+
+    confirmed_file.write_text(json.dumps({"EOther": [utxo("dd" * 32, address="EOther")]}))
+    assert store.migrate_json(mempool_file, confirmed_file) == 0
+    assert store.count() == 3
+
+
+def test_save_writes_only_changed_outpoints(tmp_path):
+    store = UTXOStore(tmp_path / "utxos.db")
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32), CONFIRMED)
+    utxo_set.add(utxo("bb" * 32), MEMPOOL)
+    store.save(utxo_set)
+    assert store.count() == 2 and store.count(MEMPOOL) == 1
+
+    utxo_set.add(utxo("cc" * 32), CONFIRMED)
+    utxo_set.take_dirty()   # pretend "cc" was saved elsewhere: only later changes are written
+    utxo_set.confirm_tx("bb" * 32, height=7)
+    utxo_set.mark_spent("aa" * 32, 0)
+    store.save(utxo_set)
+
+    loaded = store.load()
+    assert loaded.get("aa" * 32, 0)["spent"] is True
+    assert loaded.pool_of("bb" * 32, 0) == CONFIRMED
+    assert loaded.get("bb" * 32, 0)["block_height"] == 7
+    assert loaded.get("cc" * 32, 0) is None
+
+
+def test_save_deletes_removed_outpoints(tmp_path):
+    store = UTXOStore(tmp_path / "utxos.db")
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32), CONFIRMED)
+    utxo_set.add(utxo("aa" * 32, 1), CONFIRMED)
+    store.save(utxo_set)
+    utxo_set.remove("aa" * 32, 1)
+    store.save(utxo_set)
+    assert store.count() == 1
+    assert store.load().to_dict() == utxo_set.to_dict()
+
+
+def test_export_json_writes_legacy_format(tmp_path):
+    store = UTXOStore(tmp_path / "utxos.db")
+    utxo_set = UTXOSet()
+    utxo_set.add(utxo("aa" * 32), CONFIRMED)
+    store.save(utxo_set)
+    paths = store.export_json(tmp_path / "export")
+    data = {pool: json.loads(path.read_text()) for pool, path in paths.items()}
+    assert UTXOSet.from_dict(data).to_dict() == utxo_set.to_dict()